@@ -0,0 +1,37 @@
+"""
+Follow CompletedChecklist's switch to UUIDv7 primary keys (checklists 0009):
+keep the checklist's new UUID next to the old foreign key, then drop it.
+0003 restores the foreign key. Not reversible.
+"""
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_checklist_uuids(apps, schema_editor):
+    CompletedChecklist = apps.get_model("checklists", "CompletedChecklist")
+    VehicleDamageAssessment = apps.get_model("ai_assistant", "VehicleDamageAssessment")
+    VehicleDamageAssessment.objects.update(
+        checklist_uuid=Subquery(CompletedChecklist.objects.filter(id=OuterRef("checklist_id")).values("uuid")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_assistant", "0001_initial"),
+        ("checklists", "0009_checklist_uuid_prepare"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicledamageassessment",
+            name="checklist_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.RunPython(copy_checklist_uuids),
+        migrations.RemoveField(
+            model_name="vehicledamageassessment",
+            name="checklist",
+        ),
+    ]
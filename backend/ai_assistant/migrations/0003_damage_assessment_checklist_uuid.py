@@ -0,0 +1,48 @@
+"""
+Restore VehicleDamageAssessment.checklist against CompletedChecklist's new
+UUIDv7 primary key (checklists 0010). Not reversible.
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+
+
+def restore_foreign_key(apps, schema_editor):
+    VehicleDamageAssessment = apps.get_model("ai_assistant", "VehicleDamageAssessment")
+    VehicleDamageAssessment.objects.update(checklist_id=F("checklist_uuid"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_assistant", "0002_damage_assessment_checklist_uuid_prepare"),
+        ("checklists", "0010_checklist_uuid_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicledamageassessment",
+            name="checklist",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="damage_assessments",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.RunPython(restore_foreign_key),
+        migrations.AlterField(
+            model_name="vehicledamageassessment",
+            name="checklist",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="damage_assessments",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="vehicledamageassessment",
+            name="checklist_uuid",
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blobs", "0001_initial"),
+        ("ai_assistant", "0003_damage_assessment_checklist_uuid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tireanalysis",
+            name="image_blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="blobs.blob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="vehicledamageassessment",
+            name="image_blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="blobs.blob",
+            ),
+        ),
+    ]
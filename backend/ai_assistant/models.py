@@ -57,7 +57,8 @@ class VehicleDamageAssessment(models.Model):
     checklist = models.ForeignKey('checklists.CompletedChecklist', on_delete=models.CASCADE, related_name='damage_assessments')
     vehicle = models.ForeignKey('vehicles.Vehicle', on_delete=models.CASCADE, related_name='damage_assessments')
     image_url = models.URLField()
-    image_base64 = models.TextField(blank=True)  # Store base64 for AI processing
+    image_base64 = models.TextField(blank=True)  # Legacy inline copy; see image_blob
+    image_blob = models.ForeignKey('blobs.Blob', on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     damage_detected = models.BooleanField(default=False)
     damage_description = models.TextField(blank=True)
     confidence_score = models.FloatField(
@@ -88,7 +89,8 @@ class TireAnalysis(models.Model):
 
     tire = models.ForeignKey('tires.Tire', on_delete=models.CASCADE, related_name='ai_analyses')
     image_url = models.URLField()
-    image_base64 = models.TextField(blank=True)
+    image_base64 = models.TextField(blank=True)  # Legacy inline copy; see image_blob
+    image_blob = models.ForeignKey('blobs.Blob', on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     wear_level = models.CharField(max_length=50, blank=True)  # e.g., "Good", "Moderate", "Severe"
     wear_percentage = models.FloatField(
         validators=[MinValueValidator(0.0), MaxValueValidator(100.0)],
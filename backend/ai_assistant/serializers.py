@@ -2,7 +2,11 @@
 Serializers for AI Assistant functionality
 """
 
+import io
+
 from rest_framework import serializers
+from blobs.store import BlobError, decode_base64_image, detect_image_type
+from .uploads import ImageUploadField
 from .models import (
     AIAssistantSession, AIAssistantMessage, 
     VehicleDamageAssessment, TireAnalysis, AIConfiguration, AIUsageLog
@@ -28,7 +32,7 @@ class AIAssistantMessageSerializer(serializers.ModelSerializer):
 class VehicleDamageAssessmentSerializer(serializers.ModelSerializer):
     """Serializer for vehicle damage assessments."""
     vehicle_plate = serializers.CharField(source='vehicle.plate', read_only=True)
-    checklist_id = serializers.CharField(source='checklist.id', read_only=True)
+    checklist_id = serializers.CharField(read_only=True)  # the FK column; no join needed
     
     class Meta:
         model = VehicleDamageAssessment
@@ -90,6 +94,13 @@ class VehicleDamageRequestSerializer(serializers.Serializer):
     image_url = serializers.URLField()
     image_base64 = serializers.CharField(required=False)
 
+    def validate_image_base64(self, value):
+        try:
+            detect_image_type(io.BytesIO(decode_base64_image(value)))
+        except BlobError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
 
 class TireAnalysisRequestSerializer(serializers.Serializer):
     """Serializer for tire analysis requests."""
@@ -97,3 +108,18 @@ class TireAnalysisRequestSerializer(serializers.Serializer):
     image_url = serializers.URLField()
     image_base64 = serializers.CharField(required=False)
 
+
+class VehicleDamageUploadSerializer(serializers.Serializer):
+    """Vehicle damage assessment with the image uploaded as a file."""
+    checklist_id = serializers.CharField(max_length=100)
+    vehicle_id = serializers.CharField(max_length=100)
+    image_url = serializers.URLField(required=False)
+    image = ImageUploadField()
+
+
+class TireAnalysisUploadSerializer(serializers.Serializer):
+    """Tire analysis with the image uploaded as a file."""
+    tire_id = serializers.IntegerField()
+    image_url = serializers.URLField(required=False)
+    image = ImageUploadField()
+
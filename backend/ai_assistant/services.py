@@ -6,6 +6,7 @@ import os
 import json
 import time
 import base64
+import tempfile
 import requests
 from typing import Dict, Any, Optional
 from django.conf import settings
@@ -13,6 +14,12 @@ from django.utils import timezone
 from .models import AIConfiguration, AIUsageLog
 from authentication.models import User
 
+# Vision requests built from a file: encoded in 3-byte multiples, spooled
+# to disk past half a MB
+IMAGE_ENCODE_CHUNK = 3 * 64 * 1024
+IMAGE_BODY_SPOOL_BYTES = 512 * 1024
+IMAGE_URL_PLACEHOLDER = '__rodocheck_image_url__'
+
 
 class AIService:
     """Base class for AI services."""
@@ -143,6 +150,60 @@ class OpenAIService(AIService):
         if not self.api_key:
             return {'success': False, 'error': 'OpenAI API key not configured'}
         
+        payload = self._vision_payload(prompt, model, f'data:image/jpeg;base64,{image_base64}')
+        return self._vision_request(json.dumps(payload).encode('utf-8'), user, model)
+    
+    def analyze_image_file(self, image_file, prompt: str, user: User, model: str = 'gpt-4-vision-preview',
+                           content_type: str = 'image/jpeg') -> Dict[str, Any]:
+        """Analyze an image file using OpenAI Vision.
+        
+        The JSON request body is written to a spooled temporary file with the
+        image base64-encoded chunk by chunk, and streamed to the API from
+        there: the image is never held in memory as one (33% larger) string.
+        """
+        if not self.api_key:
+            return {'success': False, 'error': 'OpenAI API key not configured'}
+        
+        with tempfile.SpooledTemporaryFile(max_size=IMAGE_BODY_SPOOL_BYTES) as body:
+            head, tail = json.dumps(
+                self._vision_payload(prompt, model, IMAGE_URL_PLACEHOLDER)
+            ).encode('utf-8').split(IMAGE_URL_PLACEHOLDER.encode('ascii'))
+            body.write(head)
+            body.write(f'data:{content_type};base64,'.encode('ascii'))
+            image_file.seek(0)
+            while True:
+                # A multiple of 3 bytes encodes without padding, so the
+                # chunks concatenate into one valid base64 string
+                chunk = image_file.read(IMAGE_ENCODE_CHUNK)
+                if not chunk:
+                    break
+                body.write(base64.b64encode(chunk))
+            body.write(tail)
+            length = body.tell()
+            body.seek(0)
+            return self._vision_request(body, user, model, content_length=length)
+    
+    def _vision_payload(self, prompt: str, model: str, image_url: str) -> Dict[str, Any]:
+        return {
+            'model': model,
+            'messages': [{
+                'role': 'user',
+                'content': [
+                    {'type': 'text', 'text': prompt},
+                    {
+                        'type': 'image_url',
+                        'image_url': {
+                            'url': image_url
+                        }
+                    }
+                ]
+            }],
+            'max_tokens': 1000,
+            'temperature': 0.3
+        }
+    
+    def _vision_request(self, body, user: User, model: str, content_length: Optional[int] = None) -> Dict[str, Any]:
+        """POST a prepared Vision request body (bytes or file) and log the usage."""
         start_time = time.time()
         
         try:
@@ -150,29 +211,13 @@ class OpenAIService(AIService):
                 'Authorization': f'Bearer {self.api_key}',
                 'Content-Type': 'application/json'
             }
-            
-            data = {
-                'model': model,
-                'messages': [{
-                    'role': 'user',
-                    'content': [
-                        {'type': 'text', 'text': prompt},
-                        {
-                            'type': 'image_url',
-                            'image_url': {
-                                'url': f'data:image/jpeg;base64,{image_base64}'
-                            }
-                        }
-                    ]
-                }],
-                'max_tokens': 1000,
-                'temperature': 0.3
-            }
+            if content_length is not None:
+                headers['Content-Length'] = str(content_length)
             
             response = requests.post(
                 f'{self.base_url}/chat/completions',
                 headers=headers,
-                json=data,
+                data=body,
                 timeout=60
             )
             
@@ -411,8 +456,19 @@ responda com "navigate" e a URL. Se pedir suporte, responda com "link" e o Whats
         
         return {"response": response, "action": "none"}
     
-    def assess_vehicle_damage(self, image_base64: str, checklist_id: str, vehicle_id: str, user: User) -> Dict[str, Any]:
-        """Assess vehicle damage using AI."""
+    def _analyze_image(self, ai_service: AIService, prompt: str, user: User, image_base64: str = '',
+                       image_file=None, content_type: str = 'image/jpeg') -> Dict[str, Any]:
+        """Send the image (uploaded file or legacy base64) to the service, or the prompt alone."""
+        if image_file is not None and hasattr(ai_service, 'analyze_image_file'):
+            return ai_service.analyze_image_file(image_file, prompt, user, content_type=content_type)
+        if image_file is None and hasattr(ai_service, 'analyze_image'):
+            return ai_service.analyze_image(image_base64, prompt, user)
+        # Fallback to text-based analysis
+        return ai_service.generate_response(prompt, user)
+    
+    def assess_vehicle_damage(self, image_base64: str, checklist_id: str, vehicle_id: str, user: User,
+                              image_file=None, content_type: str = 'image/jpeg') -> Dict[str, Any]:
+        """Assess vehicle damage using AI (image as base64 or as an uploaded file)."""
         try:
             ai_service = self.get_ai_service()
             
@@ -432,11 +488,7 @@ Responda em JSON com:
 - damageDescription: descrição dos danos encontrados (se houver)
 """
             
-            if hasattr(ai_service, 'analyze_image'):
-                result = ai_service.analyze_image(image_base64, prompt, user)
-            else:
-                # Fallback to text-based analysis
-                result = ai_service.generate_response(prompt, user)
+            result = self._analyze_image(ai_service, prompt, user, image_base64, image_file, content_type)
             
             if result['success']:
                 # Parse the response
@@ -461,4 +513,46 @@ Responda em JSON com:
                 
         except Exception as e:
             return {'success': False, 'error': f'Damage assessment error: {str(e)}'}
+    
+    def analyze_tire(self, image_file, tire_serial: str, user: User, content_type: str = 'image/jpeg') -> Dict[str, Any]:
+        """Assess tire wear and damage from an uploaded image."""
+        try:
+            ai_service = self.get_ai_service()
+            
+            prompt = f"""Analise esta imagem de pneu de caminhão.
+Número de série: {tire_serial}
+
+Avalie o desgaste da banda de rodagem e procure por cortes, bolhas,
+deformações ou desgaste irregular.
+
+Responda em JSON com:
+- wearLevel: "Bom", "Moderado" ou "Severo"
+- wearPercentage: desgaste estimado de 0 a 100
+- damageDetected: true/false
+- damageDescription: descrição dos danos encontrados (se houver)
+- recommendation: recomendação de manutenção
+"""
+            
+            result = self._analyze_image(ai_service, prompt, user, image_file=image_file, content_type=content_type)
+            
+            if result['success']:
+                response_text = result['response']
+                try:
+                    tire_data = json.loads(response_text)
+                except:
+                    tire_data = {
+                        'damageDetected': 'danos' in response_text.lower() or 'damage' in response_text.lower(),
+                        'damageDescription': response_text,
+                    }
+                
+                return {
+                    'success': True,
+                    'data': tire_data,
+                    'processing_time': result.get('processing_time', 0)
+                }
+            else:
+                return result
+                
+        except Exception as e:
+            return {'success': False, 'error': f'Tire analysis error: {str(e)}'}
 
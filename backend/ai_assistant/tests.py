@@ -1,3 +1,223 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from blobs.backends import reset_blob_backend
+
+from checklists.models import CompletedChecklist
+from rodocheck_backend.testing import QueryBudgetMixin
+from tires.models import Tire
+from vehicles.models import Vehicle
+from .models import AIUsageLog, TireAnalysis, VehicleDamageAssessment
+from .services import IMAGE_ENCODE_CHUNK
+
+User = get_user_model()
+
+
+class AIListQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='gestor', email='gestor@rodoan.com.br', password='senha-teste',
+        )
+        cls.vehicle = Vehicle.objects.create(
+            plate='ABC1234', model='FH 540', brand='Volvo', year=2022,
+            vehicle_type='truck', created_by=cls.user,
+        )
+        cls.tire = Tire.objects.create(
+            serial_number='PN-0001', brand='Michelin', model='X Multi',
+            size='295/80R22.5', vehicle=cls.vehicle, created_by=cls.user,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_damage_assessments(self):
+        def add(count):
+            start = CompletedChecklist.objects.count()
+            for i in range(start, start + count):
+                checklist = CompletedChecklist.objects.create(
+                    external_id=f'chk-{i}', vehicle=self.vehicle, created_by=self.user
+                )
+                VehicleDamageAssessment.objects.create(
+                    checklist=checklist, vehicle=self.vehicle,
+                    image_url='https://example.com/foto.jpg', image_base64='A' * 1000,
+                )
+
+        self.assertQueryBudget('/api/ai/damage-assessments/', 2, add)
+
+        item = self.client.get('/api/ai/damage-assessments/').json()['results'][0]
+        self.assertEqual(item['vehicle_plate'], 'ABC1234')
+        self.assertTrue(CompletedChecklist.objects.filter(id=item['checklist_id']).exists())
+
+    def test_tire_analyses(self):
+        def add(count):
+            TireAnalysis.objects.bulk_create([
+                TireAnalysis(tire=self.tire, image_url='https://example.com/pneu.jpg')
+                for _ in range(count)
+            ])
+
+        self.assertQueryBudget('/api/ai/tire-analysis/', 2, add)
+
+    def test_usage_logs(self):
+        def add(count):
+            AIUsageLog.objects.bulk_create([
+                AIUsageLog(user=self.user, service_name='openai', model_name='gpt-4o-mini')
+                for _ in range(count)
+            ])
+
+        self.assertQueryBudget('/api/ai/usage-logs/', 2, add)
+
+
+def make_jpeg(size=(64, 48)):
+    buffer = io.BytesIO()
+    # Noise compresses badly, like real photos do
+    PILImage.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+class FakeVisionAPI:
+    """Stands in for ``requests.post`` to the OpenAI API; keeps the sent image."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.image_url = None
+
+    def __call__(self, url, headers=None, data=None, timeout=None):
+        body = data.read() if hasattr(data, 'read') else data
+        payload = json.loads(body)
+        self.image_url = payload['messages'][0]['content'][1]['image_url']['url']
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            'choices': [{'message': {'content': json.dumps(self.answer)}}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5},
+        }
+        return response
+
+
+class ImageUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='gestor', password='senha-teste')
+        cls.vehicle = Vehicle.objects.create(
+            plate='ABC1234', model='FH 540', brand='Volvo', year=2022,
+            vehicle_type='truck', created_by=cls.user,
+        )
+        cls.tire = Tire.objects.create(
+            serial_number='PN-0001', brand='Michelin', model='X Multi',
+            size='295/80R22.5', vehicle=cls.vehicle, created_by=cls.user,
+        )
+        cls.checklist = CompletedChecklist.objects.create(
+            external_id='chk-1', vehicle=cls.vehicle, created_by=cls.user
+        )
+
+    def setUp(self):
+        root = tempfile.mkdtemp(prefix='rodocheck-test-blobs-')
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(BLOB_ROOT=root, OPENAI_API_KEY='sk-test')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        reset_blob_backend()
+        self.addCleanup(reset_blob_backend)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_multipart_damage_assessment(self):
+        image = make_jpeg()
+        api = FakeVisionAPI({'damageDetected': True, 'damageDescription': 'Amassado no para-choque'})
+
+        with mock.patch('ai_assistant.services.requests.post', api):
+            response = self.client.post('/api/ai/assess-damage/upload/', {
+                'checklist_id': str(self.checklist.pk),
+                'vehicle_id': str(self.vehicle.id),
+                'image': SimpleUploadedFile('foto.jpg', image, content_type='image/jpeg'),
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()['damage_detected'])
+        self.assertEqual(api.image_url, 'data:image/jpeg;base64,' + base64.b64encode(image).decode())
+        assessment = VehicleDamageAssessment.objects.get()
+        self.assertEqual(assessment.image_base64, '')
+        self.assertEqual(assessment.image_blob_id, hashlib.sha256(image).hexdigest())
+        self.assertIn('/api/blobs/', assessment.image_url)
+
+    def test_raw_body_tire_analysis(self):
+        image = make_jpeg((900, 900))  # several base64 encoding chunks
+        self.assertGreater(len(image), 2 * IMAGE_ENCODE_CHUNK)
+        api = FakeVisionAPI({
+            'wearLevel': 'Moderado', 'wearPercentage': 55, 'damageDetected': False,
+            'recommendation': 'Rodiziar na próxima manutenção',
+        })
+
+        with mock.patch('ai_assistant.services.requests.post', api):
+            response = self.client.post(
+                f'/api/ai/tire-analysis/upload/?tire_id={self.tire.id}', image, content_type='image/jpeg'
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        analysis = response.json()['analysis']
+        self.assertEqual(analysis['wear_level'], 'Moderado')
+        self.assertEqual(analysis['wear_percentage'], 55.0)
+        self.assertEqual(api.image_url, 'data:image/jpeg;base64,' + base64.b64encode(image).decode())
+        self.assertEqual(TireAnalysis.objects.get().image_blob_id, hashlib.sha256(image).hexdigest())
+
+    def test_rejects_non_images_and_oversized_uploads(self):
+        response = self.client.post('/api/ai/assess-damage/upload/', {
+            'checklist_id': str(self.checklist.pk),
+            'vehicle_id': str(self.vehicle.id),
+            'image': SimpleUploadedFile('foto.jpg', b'not an image', content_type='image/jpeg'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
+
+        with override_settings(AI_IMAGE_UPLOAD_MAX_BYTES=100):
+            response = self.client.post(
+                f'/api/ai/tire-analysis/upload/?tire_id={self.tire.id}', make_jpeg(), content_type='image/jpeg'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TireAnalysis.objects.exists())
+
+    def test_blob_type_is_detected_not_declared(self):
+        gif = io.BytesIO()
+        PILImage.new('RGB', (8, 8)).save(gif, 'GIF')
+        response = self.client.post(
+            f'/api/ai/tire-analysis/upload/?tire_id={self.tire.id}', gif.getvalue(), content_type='image/jpeg'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        image = make_jpeg()
+        with mock.patch('ai_assistant.services.requests.post', FakeVisionAPI({'damageDetected': False})):
+            response = self.client.post('/api/ai/assess-damage/upload/', {
+                'checklist_id': str(self.checklist.pk),
+                'vehicle_id': str(self.vehicle.id),
+                'image': SimpleUploadedFile('foto.jpg', image, content_type='image/svg+xml'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(VehicleDamageAssessment.objects.get().image_blob.content_type, 'image/jpeg')
+
+    def test_checklists_of_other_users_are_not_found(self):
+        other = User.objects.create_user(username='outro', password='senha-teste')
+        client = APIClient()
+        client.force_authenticate(other)
+
+        response = client.post('/api/ai/assess-damage/upload/', {
+            'checklist_id': str(self.checklist.pk),
+            'vehicle_id': str(self.vehicle.id),
+            'image': SimpleUploadedFile('foto.jpg', make_jpeg(), content_type='image/jpeg'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(VehicleDamageAssessment.objects.exists())
@@ -0,0 +1,87 @@
+"""
+Binary image uploads for the AI endpoints.
+
+The JSON endpoints take images as base64 strings: the whole payload is
+parsed by the JSON parser and held as a Python str (a third larger than the
+image) before it is decoded. The upload endpoints accept the image as
+bytes instead, either as a ``multipart/form-data`` file field or as the raw
+request body (``Content-Type: image/jpeg``, other fields in the query
+string). Both are copied to a temporary file in chunks as they are read, so
+memory per request stays at one chunk whatever the image size.
+"""
+
+import functools
+import mimetypes
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.datastructures import MultiValueDict
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, DataAndFiles
+
+from blobs.store import BlobError, detect_image_type
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def spool_uploads_to_disk(view):
+    """
+    Make multipart file fields of ``view`` go straight to temporary files.
+
+    Django keeps files under ``FILE_UPLOAD_MAX_MEMORY_SIZE`` in memory by
+    default. Must wrap the outermost view (above ``@api_view``): the
+    handlers can't be changed once the body has been read.
+    """
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ImageUploadParser(BaseParser):
+    """Raw image request body, spooled to a temporary file as ``image``."""
+    media_type = 'image/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            raise ParseError('Corpo da requisição vazio')
+
+        content_type = (media_type or 'application/octet-stream').split(';')[0].strip()
+        extension = mimetypes.guess_extension(content_type) or ''
+        upload = TemporaryUploadedFile(f'upload{extension}', content_type, 0, None)
+        max_bytes = settings.AI_IMAGE_UPLOAD_MAX_BYTES
+        size = 0
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            size += len(chunk)
+            if size > max_bytes:
+                upload.close()
+                raise ParseError('Imagem excede o tamanho máximo permitido')
+            upload.write(chunk)
+        upload.seek(0)
+        upload.size = size
+
+        # The other fields come from the query string
+        request = (parser_context or {}).get('request')
+        data = request.query_params.copy() if request is not None else {}
+        return DataAndFiles(data, MultiValueDict({'image': [upload]}))
+
+
+class ImageUploadField(serializers.ImageField):
+    """
+    Uploaded JPEG, PNG or WebP image, checked with Pillow and against
+    ``AI_IMAGE_UPLOAD_MAX_BYTES``. ``content_type`` is the detected type,
+    not the one the client sent.
+    """
+
+    def to_internal_value(self, data):
+        if getattr(data, 'size', 0) > settings.AI_IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError('Imagem excede o tamanho máximo permitido')
+        image = super().to_internal_value(data)
+        try:
+            image.content_type = detect_image_type(image)
+        except BlobError as e:
+            raise serializers.ValidationError(str(e))
+        return image
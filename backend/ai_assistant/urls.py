@@ -13,10 +13,12 @@ urlpatterns = [
     
     # Vehicle Damage Assessment
     path('assess-damage/', views.assess_vehicle_damage, name='assess_vehicle_damage'),
+    path('assess-damage/upload/', views.assess_vehicle_damage_upload, name='assess_vehicle_damage_upload'),
     path('damage-assessments/', views.VehicleDamageAssessmentView.as_view(), name='damage_assessments'),
     
     # Tire Analysis
     path('tire-analysis/', views.TireAnalysisView.as_view(), name='tire_analysis'),
+    path('tire-analysis/upload/', views.analyze_tire_upload, name='analyze_tire_upload'),
     
     # AI Usage and Configuration
     path('usage-logs/', views.AIUsageLogView.as_view(), name='ai_usage_logs'),
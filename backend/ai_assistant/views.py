@@ -3,7 +3,8 @@ Views for AI Assistant functionality
 """
 
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
@@ -20,11 +21,16 @@ from .serializers import (
     AIAssistantSessionSerializer, AIAssistantMessageSerializer,
     VehicleDamageAssessmentSerializer, TireAnalysisSerializer,
     AIConfigurationSerializer, AIUsageLogSerializer,
-    AIAssistantRequestSerializer, VehicleDamageRequestSerializer, TireAnalysisRequestSerializer
+    AIAssistantRequestSerializer, VehicleDamageRequestSerializer, TireAnalysisRequestSerializer,
+    VehicleDamageUploadSerializer, TireAnalysisUploadSerializer
 )
 from .services import AIAssistantService
+from .uploads import ImageUploadParser, spool_uploads_to_disk
 from authentication.models import User
+from tires.models import Tire
 from vehicles.models import Vehicle
+from blobs.store import decode_base64_image, put_image, put_image_file, signed_blob_url
+from checklists.ids import checklist_lookup
 from checklists.models import CompletedChecklist
 from rodocheck_backend.exceptions import (
     RodoCheckException, AuthenticationError, AuthorizationError, 
@@ -165,58 +171,171 @@ def assess_vehicle_damage(request):
         # Get objects
         checklist = get_object_or_404(
             CompletedChecklist,
-            id=serializer.validated_data['checklist_id']
+            checklist_lookup(serializer.validated_data['checklist_id']),
+            created_by=request.user
         )
         vehicle = get_object_or_404(
             Vehicle,
             id=serializer.validated_data['vehicle_id']
         )
         
-        # Create assessment record
+        # Create assessment record; the image goes to the blob store, not the row
+        image_base64 = serializer.validated_data.get('image_base64', '')
         assessment = VehicleDamageAssessment.objects.create(
             checklist=checklist,
             vehicle=vehicle,
             image_url=serializer.validated_data['image_url'],
-            image_base64=serializer.validated_data.get('image_base64', ''),
+            image_blob=put_image(decode_base64_image(image_base64)) if image_base64 else None,
             status='processing'
         )
         
         # Process with AI
         ai_service = AIAssistantService()
         result = ai_service.assess_vehicle_damage(
-            image_base64=serializer.validated_data.get('image_base64', ''),
+            image_base64=image_base64,
             checklist_id=serializer.validated_data['checklist_id'],
             vehicle_id=serializer.validated_data['vehicle_id'],
             user=request.user
         )
-        
-        if result['success']:
-            # Update assessment
-            assessment.damage_detected = result['data'].get('damageDetected', False)
-            assessment.damage_description = result['data'].get('damageDescription', '')
-            assessment.status = 'completed'
-            assessment.processing_time = result.get('processing_time', 0)
-            assessment.save()
+        return _damage_assessment_response(assessment, result)
             
-            return Response({
-                'success': True,
-                'assessment_id': assessment.id,
-                'damage_detected': assessment.damage_detected,
-                'damage_description': assessment.damage_description,
-                'processing_time': assessment.processing_time
-            }, status=status.HTTP_200_OK)
-        else:
-            # Update assessment with error
-            assessment.status = 'failed'
-            assessment.save()
+    except Exception as e:
+        logger.error(f"Vehicle damage assessment error: {e}")
+        return Response({
+            'success': False,
+            'error': 'Erro interno do servidor'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _damage_assessment_response(assessment, result):
+    """Record the AI result on the assessment and build the API response."""
+    if result['success']:
+        # Update assessment
+        assessment.damage_detected = result['data'].get('damageDetected', False)
+        assessment.damage_description = result['data'].get('damageDescription', '')
+        assessment.status = 'completed'
+        assessment.processing_time = result.get('processing_time', 0)
+        assessment.save()
+        
+        return Response({
+            'success': True,
+            'assessment_id': assessment.id,
+            'damage_detected': assessment.damage_detected,
+            'damage_description': assessment.damage_description,
+            'processing_time': assessment.processing_time
+        }, status=status.HTTP_200_OK)
+    else:
+        # Update assessment with error
+        assessment.status = 'failed'
+        assessment.save()
+        
+        return Response({
+            'success': False,
+            'error': result['error']
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _parse_wear_percentage(value):
+    try:
+        return min(max(float(value), 0.0), 100.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@spool_uploads_to_disk
+@api_view(['POST'])
+@parser_classes([MultiPartParser, ImageUploadParser])
+@permission_classes([IsAuthenticated])
+def assess_vehicle_damage_upload(request):
+    """Assess vehicle damage from an uploaded image file (multipart or raw body)."""
+    serializer = VehicleDamageUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    checklist = get_object_or_404(CompletedChecklist, checklist_lookup(data['checklist_id']), created_by=request.user)
+    vehicle = get_object_or_404(Vehicle, id=data['vehicle_id'])
+    image = data['image']
+    
+    try:
+        blob = put_image_file(image)
+        assessment = VehicleDamageAssessment.objects.create(
+            checklist=checklist,
+            vehicle=vehicle,
+            image_url=data.get('image_url') or signed_blob_url(blob.pk, request),
+            image_blob=blob,
+            status='processing'
+        )
+        
+        result = AIAssistantService().assess_vehicle_damage(
+            image_base64='',
+            checklist_id=data['checklist_id'],
+            vehicle_id=data['vehicle_id'],
+            user=request.user,
+            image_file=image,
+            content_type=image.content_type
+        )
+        return _damage_assessment_response(assessment, result)
             
+    except Exception as e:
+        logger.error(f"Vehicle damage assessment error: {e}")
+        return Response({
+            'success': False,
+            'error': 'Erro interno do servidor'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@spool_uploads_to_disk
+@api_view(['POST'])
+@parser_classes([MultiPartParser, ImageUploadParser])
+@permission_classes([IsAuthenticated])
+def analyze_tire_upload(request):
+    """Analyze tire wear and damage from an uploaded image file (multipart or raw body)."""
+    serializer = TireAnalysisUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    tire = get_object_or_404(Tire, id=data['tire_id'], created_by=request.user)
+    image = data['image']
+    
+    try:
+        blob = put_image_file(image)
+        analysis = TireAnalysis.objects.create(
+            tire=tire,
+            image_url=data.get('image_url') or signed_blob_url(blob.pk, request),
+            image_blob=blob,
+            status='processing'
+        )
+        
+        result = AIAssistantService().analyze_tire(
+            image, tire.serial_number, request.user, content_type=image.content_type
+        )
+        
+        if not result['success']:
+            analysis.status = 'failed'
+            analysis.save()
             return Response({
                 'success': False,
                 'error': result['error']
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        analysis.wear_level = str(result['data'].get('wearLevel', ''))[:50]
+        analysis.wear_percentage = _parse_wear_percentage(result['data'].get('wearPercentage'))
+        analysis.damage_detected = bool(result['data'].get('damageDetected', False))
+        analysis.damage_description = result['data'].get('damageDescription', '')
+        analysis.recommendation = result['data'].get('recommendation', '')
+        analysis.status = 'completed'
+        analysis.processing_time = result.get('processing_time', 0)
+        analysis.save()
+        
+        return Response({
+            'success': True,
+            'analysis': TireAnalysisSerializer(analysis).data
+        }, status=status.HTTP_200_OK)
             
     except Exception as e:
-        logger.error(f"Vehicle damage assessment error: {e}")
+        logger.error(f"Tire analysis error: {e}")
         return Response({
             'success': False,
             'error': 'Erro interno do servidor'
@@ -231,7 +350,7 @@ class VehicleDamageAssessmentView(generics.ListAPIView):
     def get_queryset(self):
         return VehicleDamageAssessment.objects.filter(
             checklist__created_by=self.request.user
-        ).order_by('-created_at')
+        ).select_related('vehicle').defer('image_base64').order_by('-created_at')
 
 
 class TireAnalysisView(generics.ListCreateAPIView):
@@ -242,7 +361,7 @@ class TireAnalysisView(generics.ListCreateAPIView):
     def get_queryset(self):
         return TireAnalysis.objects.filter(
             tire__created_by=self.request.user
-        ).order_by('-created_at')
+        ).select_related('tire').defer('image_base64').order_by('-created_at')
 
 
 class AIUsageLogView(generics.ListAPIView):
@@ -251,7 +370,7 @@ class AIUsageLogView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return AIUsageLog.objects.filter(user=self.request.user).order_by('-created_at')
+        return AIUsageLog.objects.filter(user=self.request.user).select_related('user').order_by('-created_at')
 
 
 class AIConfigurationView(generics.ListAPIView):
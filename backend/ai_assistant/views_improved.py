@@ -25,6 +25,7 @@ from .serializers import (
 from .services import AIAssistantService
 from authentication.models import User
 from vehicles.models import Vehicle
+from checklists.ids import checklist_lookup
 from checklists.models import CompletedChecklist
 from rodocheck_backend.exceptions import (
     RodoCheckException, AuthenticationError, AuthorizationError, 
@@ -228,7 +229,7 @@ def assess_vehicle_damage(request):
     # Buscar checklist
     try:
         checklist = CompletedChecklist.objects.get(
-            id=serializer.validated_data['checklist_id'],
+            checklist_lookup(serializer.validated_data['checklist_id']),
             created_by=request.user
         )
     except CompletedChecklist.DoesNotExist:
@@ -0,0 +1,164 @@
+"""
+Benchmark: memory and time per AI damage assessment request, by upload format.
+
+Compares the JSON endpoint (image as a base64 string in the body) with the
+binary upload endpoint, as multipart and as a raw body. The OpenAI call is
+replaced by a stub that reads the request body the way ``requests`` would
+(in chunks when it is a file), so what is measured is the request parsing,
+the blob store write and building the Vision request. Each format runs in
+a fresh process so the reported peak RSS is not inherited from another.
+
+Uso:
+    SECRET_KEY=... python benchmarks/ai_upload_benchmark.py --requests 10 --image-px 4000
+"""
+
+import argparse
+import base64
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import setup_django
+
+
+def _photo(size):
+    from PIL import Image
+
+    # Noise compresses badly, like real photos do
+    output = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _fake_post(url, headers=None, data=None, timeout=None):
+    from unittest import mock
+
+    if hasattr(data, 'read'):
+        while data.read(64 * 1024):
+            pass
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {
+        'choices': [{'message': {'content': json.dumps({'damageDetected': False})}}],
+        'usage': {},
+    }
+    return response
+
+
+def _run(mode, args, results):
+    workdir = tempfile.mkdtemp(prefix='rodocheck-ai-upload-')
+    os.environ['BLOB_ROOT'] = os.path.join(workdir, 'blobs')
+    os.environ['OPENAI_API_KEY'] = 'sk-benchmark'
+    setup_django(database=os.path.join(workdir, 'db.sqlite3'))
+
+    from unittest import mock
+    from django.core.management import call_command
+    from django.test.client import RequestFactory
+    from rest_framework.test import force_authenticate
+    from ai_assistant import views
+    from authentication.models import User
+    from checklists.models import CompletedChecklist
+    from vehicles.models import Vehicle
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user(username='bench', password='bench-password')
+    vehicle = Vehicle.objects.create(
+        plate='ABC1D23', model='FH 540', brand='Volvo', year=2022, vehicle_type='truck', created_by=user,
+    )
+    checklist = CompletedChecklist.objects.create(external_id='bench', vehicle=vehicle, created_by=user)
+    fields = {'checklist_id': str(checklist.pk), 'vehicle_id': str(vehicle.pk)}
+    factory = RequestFactory()
+
+    def build_request(index):
+        # A different image per request, so the blob store never deduplicates
+        image = _photo((args.image_px + index, args.image_px * 3 // 4))
+        if mode == 'json':
+            body = json.dumps({
+                **fields, 'image_url': 'https://example.com/foto.jpg',
+                'image_base64': base64.b64encode(image).decode('ascii'),
+            })
+            request = factory.post('/api/ai/assess-damage/', body, content_type='application/json')
+            view = views.assess_vehicle_damage
+        elif mode == 'multipart':
+            request = factory.post('/api/ai/assess-damage/upload/', {**fields, 'image': _named(image)})
+            view = views.assess_vehicle_damage_upload
+        else:
+            query = '&'.join(f'{key}={value}' for key, value in fields.items())
+            request = factory.post(f'/api/ai/assess-damage/upload/?{query}', image, content_type='image/jpeg')
+            view = views.assess_vehicle_damage_upload
+        force_authenticate(request, user)
+        return request, view, int(request.META['CONTENT_LENGTH'])
+
+    peaks, times = [], []
+    body_size = 0
+    with mock.patch('ai_assistant.services.requests.post', _fake_post):
+        request, view, _ = build_request(-1)
+        view(request)  # warm-up: imports, first queries
+        baseline_rss = _peak_rss_mb()
+        for i in range(args.requests):
+            request, view, body_size = build_request(i)
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = view(request)
+            times.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            assert response.status_code == 200, response.data
+
+    results[mode] = {
+        'body_mb': body_size / (1024 * 1024),
+        'ms': statistics.median(times) * 1000,
+        'py_peak_mb': max(peaks) / (1024 * 1024),
+        'rss_growth_mb': _peak_rss_mb() - baseline_rss,
+    }
+
+
+def _named(data):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    return SimpleUploadedFile('foto.jpg', data, content_type='image/jpeg')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10)
+    parser.add_argument('--image-px', type=int, default=4000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        results = manager.dict()
+        for mode in ('json', 'multipart', 'raw'):
+            process = context.Process(target=_run, args=(mode, args, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    labels = {
+        'json': 'antes (JSON + base64)',
+        'multipart': 'depois (multipart)',
+        'raw': 'depois (corpo binário)',
+    }
+    print(f"{args.requests} requisições, fotos de {args.image_px}px")
+    for mode, label in labels.items():
+        row = results[mode]
+        print(
+            f"  {label:<23} corpo {row['body_mb']:5.1f} MB | mediana {row['ms']:7.1f} ms | "
+            f"pico Python/req {row['py_peak_mb']:6.2f} MB | RSS +{row['rss_growth_mb']:.1f} MB após aquecimento"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark: table size, insert cost and read latency of the checklist JSON columns.
+
+Fills a scratch SQLite database with synthetic checklists (40 answered
+questions with observations and photo URLs, blob references for photos and
+signatures) once per storage format, each in a fresh process:
+
+- plain JSON, the schema before ``0012_checklist_compressed_json`` (the
+  historical model of migration 0011);
+- ``CompressedJSONField`` with zlib;
+- ``CompressedJSONField`` with zstd, when ``zstandard`` is installed.
+
+Reports the bytes the table takes (``dbstat``), bulk insert time, the
+median time to load one checklist by primary key and a full scan of the
+``questions`` column. On PostgreSQL, rows over ~2 KB are already
+compressed by TOAST (pglz), so the gain there is smaller than SQLite shows;
+run it against a copy of production data for real numbers.
+
+Uso:
+    SECRET_KEY=... python benchmarks/checklist_json_compression_benchmark.py --rows 50000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from common import setup_django
+
+ITEMS = [
+    'Freios', 'Pneus dianteiros', 'Pneus traseiros', 'Faróis', 'Lanternas', 'Retrovisores', 'Extintor',
+    'Óleo do motor', 'Tacógrafo', 'Cintos de segurança', 'Para-brisa', 'Limpadores', 'Buzina', 'Engate',
+]
+OBSERVATIONS = [
+    'Desgaste acima do normal, programar troca.', 'Vazamento de óleo no motor, verificar retentor.',
+    'Farol queimado do lado esquerdo.', 'Retrovisor trincado.', 'Extintor vencido.',
+]
+STATUSES = ['approved'] * 8 + ['rejected', 'pending']
+
+
+def _checklist_data(rng, index):
+    def ref():
+        return f'blob:{rng.getrandbits(256):064x}'
+
+    questions = []
+    for n in range(40):
+        status = rng.choice(STATUSES)
+        questions.append({
+            'id': f'q{n}',
+            'text': f'{ITEMS[n % len(ITEMS)]} - item {n + 1}',
+            'status': status,
+            'observations': rng.choice(OBSERVATIONS) if status != 'approved' else '',
+            'photo': f'https://storage.rodocheck.com.br/checklists/{index}/q{n}.jpg' if status == 'rejected' else None,
+        })
+    return {
+        'questions': questions,
+        'vehicle_images': {key: ref() for key in ('cavaloFrontal', 'cavaloTraseira', 'cavaloLateral', 'carreta')},
+        'signatures': {'assinaturaMotorista': ref(), 'assinaturaResponsavel': ref()},
+    }
+
+
+def _table_bytes(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table])
+        return cursor.fetchone()[0]
+
+
+def _run(mode, args, results):
+    workdir = tempfile.mkdtemp(prefix='rodocheck-json-compression-')
+    if mode != 'json':
+        os.environ['COMPRESSED_JSON_CODEC'] = mode
+    setup_django(database=os.path.join(workdir, 'db.sqlite3'))
+
+    from django.core.management import call_command
+    from django.db import connection, transaction
+    from django.db.migrations.executor import MigrationExecutor
+    from authentication.models import User
+    from checklists.ids import uuid7
+    from vehicles.models import Vehicle
+
+    call_command('migrate', verbosity=0)
+    if mode == 'json':
+        target = ('checklists', '0011_checklist_daily_rollups')
+        call_command('migrate', *target, verbosity=0)
+        CompletedChecklist = MigrationExecutor(connection).loader.project_state(target).apps.get_model(
+            'checklists', 'CompletedChecklist'
+        )
+    else:
+        from checklists.models import CompletedChecklist
+
+    user = User.objects.create_user(username='bench', password='bench-password')
+    vehicle = Vehicle.objects.create(
+        plate='ABC1D23', model='FH 540', brand='Volvo', year=2022, vehicle_type='truck', created_by=user,
+    )
+
+    rng = random.Random(42)
+    rows = [
+        CompletedChecklist(
+            id=uuid7(), external_id=f'chk-{i:08d}', vehicle_id=vehicle.pk, created_by_id=user.pk,
+            final_status='approved', **_checklist_data(rng, i),
+        )
+        for i in range(args.rows)
+    ]
+    started = time.perf_counter()
+    with transaction.atomic():
+        CompletedChecklist.objects.bulk_create(rows, batch_size=1000)
+    insert_s = time.perf_counter() - started
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+
+    ids = [row.id for row in rng.sample(rows, min(args.reads, len(rows)))]
+    samples = []
+    for pk in ids:
+        begin = time.perf_counter()
+        CompletedChecklist.objects.get(pk=pk)
+        samples.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    for _questions in CompletedChecklist.objects.values_list('questions', flat=True).iterator(chunk_size=2000):
+        pass
+    scan_s = time.perf_counter() - begin
+
+    table_bytes = _table_bytes(connection, CompletedChecklist._meta.db_table)
+    results[mode] = {
+        'table_mb': table_bytes / (1024 * 1024),
+        'row_bytes': table_bytes / args.rows,
+        'insert_us': insert_s / args.rows * 1e6,
+        'get_ms': statistics.median(samples) * 1000,
+        'scan_s': scan_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+
+    modes = ['json', 'zlib']
+    try:
+        import zstandard  # noqa: F401
+        modes.append('zstd')
+    except ImportError:
+        print('zstandard não instalado: zstd fica de fora')
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        results = manager.dict()
+        for mode in modes:
+            process = context.Process(target=_run, args=(mode, args, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    labels = {
+        'json': 'antes (JSON puro)',
+        'zlib': 'depois (zlib)',
+        'zstd': 'depois (zstd)',
+    }
+    print(f'{args.rows} checklists, {args.reads} leituras por chave')
+    for mode in modes:
+        row = results[mode]
+        print(
+            f"  {labels[mode]:<18} tabela {row['table_mb']:7.1f} MB ({row['row_bytes']:6.0f} B/linha) | "
+            f"inserção {row['insert_us']:6.1f} µs/linha | get {row['get_ms']:6.3f} ms | "
+            f"varredura de questions {row['scan_s']:6.2f} s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: listing a driver's checklist history at increasing depths.
+
+Fills a scratch SQLite database with a synthetic table (by default 1M
+checklists spread over 50 drivers, one of them with a long history) and
+times, per depth, the previous listing (OFFSET pagination plus COUNT(*))
+against the keyset query the cursor pagination runs, with and without the
+``(created_by, -created_at, -id)`` index.
+
+Uso:
+    SECRET_KEY=... python benchmarks/checklist_pagination_benchmark.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from common import setup_django
+
+PAGE_SIZE = 20
+
+
+def _fill(rows, drivers, heavy_share):
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from authentication.models import User
+    from checklists.models import CompletedChecklist
+    from vehicles.models import Vehicle
+
+    users = User.objects.bulk_create([
+        User(username=f'motorista{i}', first_name='Motorista', last_name=str(i))
+        for i in range(drivers)
+    ])
+    vehicle = Vehicle.objects.create(
+        plate='ABC1D23', model='FH 540', brand='Volvo', year=2022,
+        vehicle_type='truck', created_by=users[0],
+    )
+
+    rng = random.Random(42)
+    start = timezone.now() - timedelta(days=5 * 365)
+    step = (5 * 365 * 24 * 3600) / rows
+    batch = []
+    with transaction.atomic():
+        for i in range(rows):
+            driver = users[0] if rng.random() < heavy_share else users[rng.randrange(1, drivers)]
+            batch.append(CompletedChecklist(
+                external_id=f'chk-{i:08d}', vehicle=vehicle, created_by=driver,
+                questions=[{'id': 'q1', 'text': 'Freios', 'status': 'approved'}],
+                pdf_status='completed',
+            ))
+            if len(batch) == 10000:
+                CompletedChecklist.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            CompletedChecklist.objects.bulk_create(batch)
+
+        # auto_now_add ignores explicit values; spread the timestamps in SQL
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE checklists_completedchecklist "
+                "SET created_at = datetime(%s, '+' || (CAST(substr(external_id, 5) AS INTEGER) * %s) || ' seconds')",
+                [start.strftime('%Y-%m-%d %H:%M:%S'), step],
+            )
+    return users[0]
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - begin)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--drivers', type=int, default=50)
+    parser.add_argument('--heavy-share', type=float, default=0.2,
+                        help='Fraction of rows that belong to the driver being listed.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database', default=os.path.join('/tmp', 'rodocheck_pagination_bench.sqlite3'))
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    setup_django(database=args.database)
+
+    from django.core.management import call_command
+    from django.db import connection
+    from checklists.models import CompletedChecklist
+
+    call_command('migrate', verbosity=0)
+    print(f'Gerando {args.rows} checklists...')
+    begin = time.perf_counter()
+    driver = _fill(args.rows, args.drivers, args.heavy_share)
+    print(f'  pronto em {time.perf_counter() - begin:.1f}s')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    history = CompletedChecklist.objects.filter(created_by=driver).order_by('-created_at', '-id')
+    total = history.count()
+    depths = [d for d in (0, 100, 1000, 10000, 100000) if d < total]
+    print(f'Histórico do motorista: {total} checklists, páginas de {PAGE_SIZE}')
+
+    def run(label):
+        print(label)
+        count_ms = _time(lambda: history.count(), args.repeat)
+        print(f'  COUNT(*) por página (paginação antiga): {count_ms:8.2f} ms')
+        for depth in depths:
+            offset_ms = _time(lambda: list(history[depth:depth + PAGE_SIZE]), args.repeat)
+            # The cursor encodes the last row of the previous page
+            anchor = history.values('created_at', 'id')[max(depth - 1, 0)]
+            keyset = history.filter(created_at__lte=anchor['created_at']).exclude(
+                created_at=anchor['created_at'], id__gte=anchor['id']
+            ) if depth else history
+            keyset_ms = _time(lambda: list(keyset[:PAGE_SIZE]), args.repeat)
+            print(f'  linha {depth:>7}: OFFSET {offset_ms:8.2f} ms | cursor {keyset_ms:8.2f} ms')
+
+    run('Com índice (created_by, -created_at, -id):')
+    with connection.cursor() as cursor:
+        cursor.execute('DROP INDEX checklist_user_created_idx')
+    run('Sem o índice:')
+
+
+if __name__ == '__main__':
+    main()
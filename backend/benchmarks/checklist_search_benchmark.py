@@ -0,0 +1,132 @@
+"""
+Benchmark: full-text search over a driver's checklists.
+
+Fills a scratch SQLite database with synthetic checklists (by default 1M,
+spread over 50 drivers) and their search documents, then times, per search
+term, the previous option (a LIKE scan over the observations; the
+questions JSON is stored compressed and can't be scanned by the database)
+against the FTS5 index the search endpoint uses: the COUNT and the first
+ranked page.
+
+PostgreSQL (tsvector + GIN) runs the same queries through
+``ChecklistSearchResults``; point ``--database`` at a scratch SQLite file only.
+
+Uso:
+    SECRET_KEY=... python benchmarks/checklist_search_benchmark.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from common import setup_django
+
+PAGE_SIZE = 20
+TERMS = ['vazamento', 'pneu careca', 'farol queimado', 'retrovisor', 'corrosão']
+# Most checklists come back clean; the rest mention one problem
+CLEAN = 'Sem ressalvas.'
+OBSERVATIONS = [
+    'Vazamento de óleo no motor, verificar retentor.',
+    'Pneu careca no eixo traseiro.',
+    'Farol queimado do lado esquerdo.',
+    'Retrovisor trincado.',
+    'Corrosão na longarina.',
+    'Limpeza da cabine pendente.',
+    'Extintor vencido.',
+]
+ITEMS = ['Freios', 'Pneus', 'Faróis', 'Retrovisores', 'Extintor', 'Óleo do motor', 'Tacógrafo', 'Cintos']
+
+
+def _fill(rows, drivers):
+    from django.db import transaction
+    from authentication.models import User
+    from checklists.models import CompletedChecklist
+    from checklists.search import index_checklists
+    from vehicles.models import Vehicle
+
+    users = User.objects.bulk_create([
+        User(username=f'motorista{i}', first_name='Motorista', last_name=str(i))
+        for i in range(drivers)
+    ])
+    vehicle = Vehicle.objects.create(
+        plate='ABC1D23', model='FH 540', brand='Volvo', year=2022,
+        vehicle_type='truck', created_by=users[0],
+    )
+
+    rng = random.Random(42)
+    batch = []
+    with transaction.atomic():
+        for i in range(rows):
+            batch.append(CompletedChecklist(
+                external_id=f'chk-{i:08d}', vehicle=vehicle, created_by=users[i % drivers],
+                general_observations=rng.choice(OBSERVATIONS) if rng.random() < 0.2 else CLEAN,
+                questions=[
+                    {
+                        'id': f'q{n}', 'text': text,
+                        'status': 'rejected' if rng.random() < 0.1 else 'approved',
+                        'observations': rng.choice(OBSERVATIONS) if rng.random() < 0.01 else '',
+                    }
+                    for n, text in enumerate(ITEMS)
+                ],
+                pdf_status='completed',
+            ))
+            if len(batch) == 5000:
+                CompletedChecklist.objects.bulk_create(batch)
+                index_checklists(batch)
+                batch = []
+        if batch:
+            CompletedChecklist.objects.bulk_create(batch)
+            index_checklists(batch)
+    return users[0]
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - begin)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--drivers', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database', default=os.path.join('/tmp', 'rodocheck_search_bench.sqlite3'))
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    setup_django(database=args.database)
+
+    from django.core.management import call_command
+    from django.db import connection
+    from checklists.models import CompletedChecklist
+    from checklists.search import ChecklistSearchResults
+
+    call_command('migrate', verbosity=0)
+    print(f'Gerando {args.rows} checklists...')
+    begin = time.perf_counter()
+    driver = _fill(args.rows, args.drivers)
+    print(f'  pronto em {time.perf_counter() - begin:.1f}s')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    mine = CompletedChecklist.objects.filter(created_by=driver)
+    print(f'Checklists do motorista: {mine.count()}, páginas de {PAGE_SIZE}')
+    for term in TERMS:
+        scan = mine.filter(general_observations__icontains=term)
+        scan_ms = _time(lambda: (scan.count(), list(scan.order_by('-created_at')[:PAGE_SIZE])), args.repeat)
+
+        results = ChecklistSearchResults(mine, driver, term)
+        total = results.count()
+        fts_ms = _time(lambda: (results.count(), results[:PAGE_SIZE]), args.repeat)
+        print(f'  {term!r:18} {total:>7} resultados | LIKE {scan_ms:9.2f} ms | FTS5 {fts_ms:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
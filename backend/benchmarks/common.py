@@ -0,0 +1,93 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(settings_module='rodocheck_backend.settings', database=None):
+    """
+    Make the backend importable and configure Django.
+
+    ``database`` points the default connection at a scratch SQLite file so
+    benchmarks that fill tables never touch the development database.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    if database:
+        from django.conf import settings
+        settings.DATABASES['default'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': database,
+        }
+
+    import django
+    django.setup()
+
+
+def signature_data_url(seed=0, size=(600, 200)):
+    """A PNG signature-like scribble as a ``data:`` URL."""
+    import base64
+    import io
+    import random
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new('RGBA', size, (255, 255, 255, 0))
+    points = [(x, rng.randrange(40, size[1] - 40)) for x in range(20, size[0] - 20, 25)]
+    ImageDraw.Draw(image).line(points, fill=(0, 0, 80, 255), width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def sample_checklist(questions=30, external_id='BENCH-0001'):
+    """Build an unsaved checklist with related objects (no database needed)."""
+    from django.utils import timezone
+    from authentication.models import User
+    from checklists.models import ChecklistTemplate, CompletedChecklist
+    from vehicles.models import Vehicle
+
+    user = User(username='bench', first_name='Ana', last_name='Souza')
+    vehicle = Vehicle(
+        plate='ABC1D23', model='FH 540', brand='Volvo', year=2022,
+        vehicle_type='truck', color='Branco',
+    )
+    template = ChecklistTemplate(name='Saída de viagem')
+    statuses = ['approved', 'approved', 'approved', 'rejected', 'pending']
+
+    return CompletedChecklist(
+        external_id=external_id,
+        vehicle=vehicle,
+        template=template,
+        created_by=user,
+        created_at=timezone.now(),
+        final_status='approved',
+        general_observations='Veículo liberado com ressalvas no pneu traseiro.',
+        questions=[
+            {
+                'id': f'q{i}',
+                'text': f'Item de verificação número {i}',
+                'status': statuses[i % len(statuses)],
+                'observations': 'Desgaste acima do normal' if i % 5 == 3 else '',
+            }
+            for i in range(1, questions + 1)
+        ],
+        vehicle_images={},
+        signatures={'assinaturaMotorista': signature_data_url(1), 'assinaturaResponsavel': signature_data_url(2)},
+    )
+
+
+@contextmanager
+def timed(label, results):
+    """Store the elapsed wall time of the block in ``results[label]``."""
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
@@ -0,0 +1,121 @@
+"""
+Memory benchmark: peak memory per checklist PDF render, photos included.
+
+Compares the previous path (render into BytesIO, copy out with getvalue(),
+wrap in ContentFile and save) with rendering straight into a temporary file
+on the storage volume that is renamed into place. Each variant runs in a
+fresh process so the reported peak RSS is not inherited from the other.
+
+Uso:
+    SECRET_KEY=... python benchmarks/pdf_memory_benchmark.py --renders 10 --photos 6
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+from common import setup_django, sample_checklist
+
+
+def _photo_data_url(index, size):
+    import base64
+    from PIL import Image
+
+    # Noise compresses badly, like real photos do
+    image = Image.effect_noise(size, 64 + index).convert('RGB')
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=90)
+    return 'data:image/jpeg;base64,' + base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run(mode, args, results):
+    workdir = tempfile.mkdtemp(prefix='rodocheck-pdf-mem-')
+    os.environ['PDF_IMAGE_CACHE_DIR'] = os.path.join(workdir, 'images')
+    setup_django()
+
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import FileSystemStorage
+    from checklists.pdf_generator import get_pdf_generator
+    from checklists.pdf_storage import write_pdf_atomically
+
+    storage = FileSystemStorage(location=os.path.join(workdir, 'media'))
+    generator = get_pdf_generator()
+    checklist = sample_checklist(questions=args.questions)
+    checklist.vehicle_images = {
+        f'foto_{i}': _photo_data_url(i, (args.photo_px, args.photo_px * 3 // 4))
+        for i in range(args.photos)
+    }
+    checklist.signatures = {}
+
+    def legacy(name):
+        return storage.save(name, ContentFile(generator.generate_pdf(checklist)))
+
+    def streamed(name):
+        return write_pdf_atomically(storage, name, lambda output: generator.write_pdf(checklist, output))
+
+    render = legacy if mode == 'legacy' else streamed
+    render('aquecimento.pdf')  # fills the image cache and imports everything
+    baseline_rss = _peak_rss_mb()
+
+    peaks = []
+    size = 0
+    for i in range(args.renders):
+        tracemalloc.start()
+        name = render(f'checklist_{i}.pdf')
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        size = storage.size(name)
+
+    results[mode] = {
+        'pdf_kb': size / 1024,
+        'py_peak_mb': max(peaks) / (1024 * 1024),
+        'py_avg_mb': sum(peaks) / len(peaks) / (1024 * 1024),
+        'rss_growth_mb': _peak_rss_mb() - baseline_rss,
+        'rss_peak_mb': _peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--renders', type=int, default=10)
+    parser.add_argument('--questions', type=int, default=30)
+    parser.add_argument('--photos', type=int, default=6)
+    parser.add_argument('--photo-px', type=int, default=3000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        results = manager.dict()
+        for mode in ('legacy', 'streamed'):
+            process = context.Process(target=_run, args=(mode, args, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    labels = {
+        'legacy': 'antes (BytesIO + ContentFile)',
+        'streamed': 'depois (arquivo temporário)',
+    }
+    print(f"{args.renders} renders, {args.questions} itens, {args.photos} fotos por checklist")
+    for mode, label in labels.items():
+        row = results[mode]
+        print(
+            f"  {label:<31} PDF {row['pdf_kb']:7.0f} KB | pico Python/render {row['py_peak_mb']:6.2f} MB "
+            f"(média {row['py_avg_mb']:.2f}) | RSS pico {row['rss_peak_mb']:6.1f} MB "
+            f"(+{row['rss_growth_mb']:.1f} após aquecimento)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: checklist PDF renders per second.
+
+Compares the previous behaviour (a new generator per render, with the
+sample stylesheet, custom styles and table styles rebuilt every time)
+against the shared generator and process-wide style registry.
+
+Uso:
+    SECRET_KEY=... python benchmarks/pdf_render_benchmark.py --renders 300
+"""
+
+import argparse
+
+from common import setup_django, sample_checklist, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--renders', type=int, default=200)
+    parser.add_argument('--questions', type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from reportlab.platypus import TableStyle
+    from checklists.pdf_generator import ChecklistPDFGenerator, get_pdf_generator
+    from checklists.pdf_styles import (
+        INFO_TABLE_STYLE, QUESTIONS_TABLE_STYLE, build_stylesheet, warm_pdf_resources,
+    )
+
+    checklist = sample_checklist(questions=args.questions)
+
+    def legacy_render():
+        generator = ChecklistPDFGenerator(styles=build_stylesheet())
+        # The old code also built three TableStyle objects per render
+        TableStyle(INFO_TABLE_STYLE.getCommands())
+        TableStyle(INFO_TABLE_STYLE.getCommands())
+        TableStyle(QUESTIONS_TABLE_STYLE.getCommands())
+        return generator.generate_pdf(checklist)
+
+    def cached_render():
+        return get_pdf_generator().generate_pdf(checklist)
+
+    warm_pdf_resources()
+    legacy_render()
+    cached_render()
+
+    results = {}
+    with timed('antes (estilos por render)', results):
+        for _ in range(args.renders):
+            legacy_render()
+    with timed('depois (estilos compartilhados)', results):
+        for _ in range(args.renders):
+            cached_render()
+
+    print(f"{args.renders} renders, {args.questions} itens por checklist")
+    for label, elapsed in results.items():
+        print(f"  {label:<34} {args.renders / elapsed:8.1f} renders/s  ({elapsed * 1000 / args.renders:.2f} ms/render)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Blob
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'content_type', 'size', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'content_type', 'size', 'created_at']
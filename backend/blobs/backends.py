@@ -0,0 +1,146 @@
+"""
+Storage backends for the blob store.
+
+A backend only maps a SHA-256 hex digest to bytes: it knows nothing about
+content types, references or the database. Keys are spread over two levels
+of directories (``ab/cd/abcd...``) so no directory grows past a few
+thousand entries. Writes must be atomic: a reader sees either the whole
+blob or no blob, because the same digest may be written by two requests at
+once and a half-written file would be served forever.
+"""
+
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.base import File
+from django.utils.module_loading import import_string
+
+
+def blob_path(sha256):
+    return posixpath.join(sha256[:2], sha256[2:4], sha256)
+
+
+class FileSystemBlobBackend:
+    """Blobs as files under a local directory."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, sha256):
+        return os.path.join(self.root, *blob_path(sha256).split('/'))
+
+    def exists(self, sha256):
+        return os.path.exists(self._path(sha256))
+
+    def save(self, sha256, content):
+        """Store the binary file object ``content`` (read from its current position)."""
+        path = self._path(sha256)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(content, f, 256 * 1024)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, sha256):
+        return open(self._path(sha256), 'rb')
+
+    def delete(self, sha256):
+        try:
+            os.unlink(self._path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def url(self, sha256):
+        # Served by the signed blob view
+        return None
+
+
+class StorageBlobBackend:
+    """
+    Blobs in any Django storage, e.g. ``storages.backends.s3boto3.S3Boto3Storage``.
+
+    Object stores replace whole objects on upload, so writes are atomic by
+    construction. When the storage can produce its own (presigned) URLs the
+    blob view redirects there instead of streaming the bytes.
+    """
+
+    def __init__(self, storage, prefix='blobs', redirect=True):
+        self.storage = storage
+        self.prefix = prefix
+        self.redirect = redirect
+
+    def _name(self, sha256):
+        return posixpath.join(self.prefix, blob_path(sha256))
+
+    def exists(self, sha256):
+        return self.storage.exists(self._name(sha256))
+
+    def save(self, sha256, content):
+        name = self._name(sha256)
+        if self.storage.exists(name):
+            return
+        saved = self.storage.save(name, File(content))
+        if saved != name:
+            # A concurrent upload of the same digest won; keep a single copy
+            self.storage.delete(saved)
+
+    def open(self, sha256):
+        return self.storage.open(self._name(sha256), 'rb')
+
+    def delete(self, sha256):
+        self.storage.delete(self._name(sha256))
+
+    def url(self, sha256):
+        if not self.redirect:
+            return None
+        try:
+            return self.storage.url(self._name(sha256))
+        except NotImplementedError:
+            return None
+
+
+def create_blob_backend():
+    """Build the backend selected by ``BLOB_BACKEND``."""
+    if settings.BLOB_BACKEND == 'filesystem':
+        return FileSystemBlobBackend(settings.BLOB_ROOT)
+    if settings.BLOB_BACKEND == 'storage':
+        storage_class = import_string(settings.BLOB_STORAGE)
+        return StorageBlobBackend(
+            storage_class(**settings.BLOB_STORAGE_OPTIONS),
+            prefix=settings.BLOB_STORAGE_PREFIX,
+            redirect=settings.BLOB_STORAGE_REDIRECT,
+        )
+    raise ValueError(f'BLOB_BACKEND desconhecido: {settings.BLOB_BACKEND!r}')
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_blob_backend():
+    """Return the process-wide blob backend."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_blob_backend()
+        return _backend
+
+
+def reset_blob_backend():
+    """Forget the backend, so the next call re-reads the settings (tests)."""
+    global _backend
+    with _backend_lock:
+        _backend = None
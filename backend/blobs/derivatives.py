@@ -0,0 +1,174 @@
+"""
+Resized copies (derivatives) of image blobs: thumbnails, screen and print sizes.
+
+Checklist photos come off phone cameras at several MB each; a grid of
+thumbnails shouldn't make the client download the originals. Every image
+blob has the fixed set of derivatives in ``DERIVATIVES``, produced with
+Pillow (``images.downscale_image``, as the PDF images are) on a bounded,
+process-wide pool and kept in a size-bounded disk cache under
+``BLOB_DERIVATIVE_CACHE_DIR``. A digest always names the same bytes, so a
+derivative never goes stale and is served with the same immutable caching
+as the blob itself.
+
+Derivatives are made off the request path once a new image blob is
+committed (``BLOB_DERIVATIVES_ON_UPLOAD='background'``), and by the
+derivative view on a cache miss (a host with a cold cache, an evicted
+entry, or ``'lazy'``). Concurrent requests for the same derivative wait on
+a single job instead of each decoding the original.
+"""
+
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .images import DiskImageCache, ImageFetchError, ImageVariant, downscale_image
+from .models import Blob
+from .store import BlobError, read_blob, referenced_sha256, signed_blob_url
+
+logger = logging.getLogger('rodocheck')
+
+DERIVATIVES = {
+    variant.name: variant for variant in (
+        # Grids and lists
+        ImageVariant('thumb', max_px=320, format='WEBP', quality=70),
+        # Full-screen viewing on phones and tablets
+        ImageVariant('preview', max_px=1280, format='WEBP', quality=80),
+        # Printing and downloads, where WebP isn't always accepted
+        ImageVariant('print', max_px=2000, format='JPEG', quality=85),
+    )
+}
+
+CONTENT_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+
+def derivative_key(sha256, variant):
+    # The parameters are part of the key: retuning a variant makes new files
+    return f'{sha256}-{variant.name}-{variant.max_px}-{variant.quality}'
+
+
+_cache = None
+_executor = None
+_singletons_lock = threading.Lock()
+
+
+def get_derivative_cache():
+    global _cache
+    with _singletons_lock:
+        if _cache is None:
+            _cache = DiskImageCache(settings.BLOB_DERIVATIVE_CACHE_DIR, settings.BLOB_DERIVATIVE_CACHE_MAX_BYTES)
+        return _cache
+
+
+def reset_derivative_cache():
+    """Forget the cache, so the next call re-reads the settings (tests)."""
+    global _cache
+    with _singletons_lock:
+        _cache = None
+
+
+def _get_executor():
+    global _executor
+    with _singletons_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BLOB_DERIVATIVE_WORKERS,
+                thread_name_prefix='blob-derivative',
+            )
+        return _executor
+
+
+def generate_derivative(sha256, variant):
+    """Build ``variant`` of blob ``sha256`` (unless cached) and return its path."""
+    cache = get_derivative_cache()
+    key = derivative_key(sha256, variant)
+    path = cache.get(key, variant.extension)
+    if path is not None:
+        return path
+    try:
+        data = read_blob(sha256)
+    except BlobError as e:
+        raise ImageFetchError(str(e))
+    data, _width, _height = downscale_image(data, variant)
+    return cache.put(key, variant.extension, data)
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _job_done(key, future):
+    with _pending_lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Could not build blob derivative {key}: {future.exception()}")
+
+
+def derivative_future(sha256, variant):
+    """Future of ``generate_derivative``, shared by concurrent callers."""
+    key = derivative_key(sha256, variant)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        future = _get_executor().submit(generate_derivative, sha256, variant)
+        _pending[key] = future
+    # Outside the lock: runs right away if the job already finished
+    future.add_done_callback(functools.partial(_job_done, key))
+    return future
+
+
+def open_derivative(sha256, variant, timeout=None):
+    """
+    Open ``variant`` of blob ``sha256`` for reading, building it if needed.
+
+    Raises ``ImageFetchError`` if the blob is missing or not an image, and
+    ``concurrent.futures.TimeoutError`` if it isn't ready within ``timeout``.
+    """
+    cache = get_derivative_cache()
+    for _attempt in range(2):
+        path = cache.get(derivative_key(sha256, variant), variant.extension)
+        if path is None:
+            path = derivative_future(sha256, variant).result(timeout=timeout)
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            continue  # evicted in between: build it again
+    raise ImageFetchError(f'Derivada indisponível: {sha256} ({variant.name})')
+
+
+def schedule_derivatives(sha256):
+    """Queue every derivative of an image blob; returns the futures."""
+    return [derivative_future(sha256, variant) for variant in DERIVATIVES.values()]
+
+
+@receiver(post_save, sender=Blob)
+def build_derivatives_of_new_images(sender, instance, created, **kwargs):
+    if not created or not instance.content_type.startswith('image/'):
+        return
+    if settings.BLOB_DERIVATIVES_ON_UPLOAD == 'background':
+        transaction.on_commit(functools.partial(schedule_derivatives, instance.sha256))
+
+
+def derivative_urls(value, request=None):
+    """
+    Derivative URLs of the images referenced in the JSON ``value``, in the
+    same shape: each blob reference (or signed blob URL) becomes
+    ``{variant name: signed URL}``. Other values are left out of dicts and
+    become None in lists, so positions still line up.
+    """
+    if isinstance(value, dict):
+        urls = {key: derivative_urls(item, request) for key, item in value.items()}
+        return {key: item for key, item in urls.items() if item}
+    if isinstance(value, list):
+        return [derivative_urls(item, request) or None for item in value]
+    sha256 = referenced_sha256(value)
+    if sha256 is None:
+        return None
+    return {name: signed_blob_url(sha256, request, variant=name) for name in DERIVATIVES}
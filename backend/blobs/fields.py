@@ -0,0 +1,43 @@
+"""
+Serializer field for JSON columns holding images and signatures.
+"""
+
+from rest_framework import serializers
+
+from .derivatives import derivative_urls
+from .store import BlobError, externalize_blobs, resolve_blob_refs
+
+
+class BlobJSONField(serializers.JSONField):
+    """
+    JSON field whose ``data:`` URLs are kept in the blob store.
+
+    Inline images are stored on the way in and the row gets references;
+    on the way out references become signed blob URLs.
+    """
+
+    def to_internal_value(self, data):
+        data = super().to_internal_value(data)
+        try:
+            return externalize_blobs(data)
+        except BlobError as e:
+            raise serializers.ValidationError(str(e))
+
+    def to_representation(self, value):
+        return super().to_representation(resolve_blob_refs(value, self.context.get('request')))
+
+
+class BlobDerivativesField(serializers.Field):
+    """
+    Read-only derivative URLs (thumbnail, preview, print) of the images in
+    a JSON column or URL field, in the column's shape.
+
+    Lets list and grid views show thumbnails without pulling the originals.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return derivative_urls(value, self.context.get('request'))
@@ -0,0 +1,130 @@
+"""
+Image primitives shared by blob derivatives and the checklist PDF pipeline.
+
+``ImageVariant`` names a target size and encoding, ``downscale_image``
+produces it with Pillow, and ``DiskImageCache`` keeps the results in a
+size-bounded directory with least-recently-used eviction.
+"""
+
+import io
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+
+from PIL import Image as PILImage, ImageOps
+
+
+class ImageFetchError(Exception):
+    """Raised when an image can't be fetched or decoded."""
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    """Target size and encoding of a processed image."""
+    name: str
+    max_px: int
+    format: str
+    quality: int = 80
+
+    @property
+    def extension(self):
+        return {'PNG': 'png', 'WEBP': 'webp'}.get(self.format, 'jpg')
+
+
+class DiskImageCache:
+    """Size-bounded on-disk cache with least-recently-used eviction."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key[:2], f'{key}.{extension}')
+
+    def get(self, key, extension):
+        path = self._path(key, extension)
+        try:
+            # Bump the mtime: it is the recency used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, extension, data):
+        path = self._path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def _entries(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _scan_size(self):
+        return sum(size for _path, size, _mtime in self._entries())
+
+    def evict(self):
+        """Drop the oldest entries until the cache is at 90% of its budget."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _path, size, _mtime in entries)
+            target = int(self.max_bytes * 0.9)
+            for path, size, _mtime in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            self._size = total
+
+
+def downscale_image(data, variant):
+    """Decode, orient, flatten and shrink an image; returns ``(bytes, width, height)``."""
+    try:
+        with PILImage.open(io.BytesIO(data)) as image:
+            image.draft('RGB', (variant.max_px, variant.max_px))  # cheap JPEG pre-scaling
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = PILImage.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.thumbnail((variant.max_px, variant.max_px), PILImage.LANCZOS)
+
+            output = io.BytesIO()
+            if variant.format == 'JPEG':
+                image.save(output, 'JPEG', quality=variant.quality, optimize=True, progressive=True)
+            elif variant.format == 'WEBP':
+                image.save(output, 'WEBP', quality=variant.quality, method=4)
+            else:
+                image.save(output, variant.format, optimize=True)
+            return output.getvalue(), image.width, image.height
+    except (OSError, PILImage.DecompressionBombError, ValueError) as e:
+        raise ImageFetchError(f'Imagem inválida: {e}')
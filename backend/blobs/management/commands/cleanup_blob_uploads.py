@@ -0,0 +1,19 @@
+"""
+Remove chunked uploads that were never finalized.
+
+Run periodically (cron): uploads whose ``expires_at`` has passed are
+deleted with their chunk files, together with chunk directories that lost
+their upload row.
+"""
+
+from django.core.management.base import BaseCommand
+
+from blobs.uploads import cleanup_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete expired, unfinished chunked uploads and their chunks.'
+
+    def handle(self, *args, **options):
+        removed = cleanup_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Envios expirados removidos: {removed}'))
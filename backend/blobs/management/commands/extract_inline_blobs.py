@@ -0,0 +1,97 @@
+"""
+Move base64 images still stored inside rows to the blob store.
+
+Covers the ``vehicle_images``/``signatures`` of checklists (``data:`` URLs
+become ``blob:<sha256>`` references) and the ``image_base64`` column of AI
+damage assessments and tire analyses (moved to ``image_blob``).
+
+Rows are read in primary-key order, in chunks; each chunk is locked,
+rewritten and committed in its own transaction, so the command can be
+stopped and started again at any time. Converted AI rows no longer match
+the filter and are not read again; the checklist columns are compressed
+(no ``__icontains`` in the database), so every checklist is read and only
+those still holding ``data:`` URLs are rewritten. Blob content is written before the rows
+that reference it, so an interrupted run leaves at most unreferenced
+blobs behind, never dangling references.
+
+Checklist PDFs are fingerprinted from these fields: converted checklists
+re-render their PDF on the next download.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ai_assistant.models import TireAnalysis, VehicleDamageAssessment
+from blobs.store import BlobError, decode_base64_image, externalize_blobs, has_inline_blobs, put_image
+from checklists.models import CompletedChecklist
+
+CHECKLIST_FIELDS = ['vehicle_images', 'signatures']
+
+
+class Command(BaseCommand):
+    help = 'Move inline base64 images and signatures from database rows to the blob store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Rows read and rewritten per transaction.')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        started = time.monotonic()
+
+        checklists = CompletedChecklist.objects.all()
+        converted = self.process(checklists, CHECKLIST_FIELDS, self.convert_checklist, chunk_size)
+        self.stdout.write(f'CompletedChecklist: {converted} linhas convertidas')
+
+        for model in (VehicleDamageAssessment, TireAnalysis):
+            rows = model.objects.exclude(image_base64='')
+            converted = self.process(rows, ['image_base64', 'image_blob'], self.convert_ai_image, chunk_size)
+            self.stdout.write(f'{model.__name__}: {converted} linhas convertidas')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Extração concluída em {elapsed:.1f}s'))
+
+    def process(self, queryset, fields, convert, chunk_size):
+        converted = 0
+        last_pk = None
+        while True:
+            ids = queryset.order_by('pk')
+            if last_pk is not None:
+                ids = ids.filter(pk__gt=last_pk)
+            ids = list(ids.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return converted
+
+            with transaction.atomic():
+                # Re-read under lock: a concurrent edit is never overwritten
+                rows = list(queryset.select_for_update().filter(pk__in=ids).only('pk', *fields))
+                changed = [row for row in rows if convert(row)]
+                if changed:
+                    queryset.model.objects.bulk_update(changed, fields)
+            converted += len(changed)
+            last_pk = ids[-1]
+
+    def convert_checklist(self, checklist):
+        changed = False
+        for field in CHECKLIST_FIELDS:
+            value = getattr(checklist, field)
+            if not has_inline_blobs(value):
+                continue
+            try:
+                setattr(checklist, field, externalize_blobs(value))
+            except BlobError as e:
+                self.stderr.write(f'Checklist {checklist.pk} ({field}): {e}')
+                continue
+            changed = True
+        return changed
+
+    def convert_ai_image(self, row):
+        try:
+            row.image_blob = put_image(decode_base64_image(row.image_base64))
+        except BlobError as e:
+            self.stderr.write(f'{type(row).__name__} {row.pk}: {e}')
+            return False
+        row.image_base64 = ''
+        return True
@@ -0,0 +1,231 @@
+"""
+Content-addressed blob store for images and signatures.
+
+Blobs are keyed by the SHA-256 of their bytes, so the same photo uploaded
+twice (a retried sync, a signature reused across checklists) is stored
+once. Rows don't embed the bytes: they hold a reference string,
+``blob:<sha256>``, in place of the ``data:`` URL the client sent.
+
+API responses turn references into signed URLs of the blob view. The
+signature covers only the digest and doesn't expire: a blob never changes,
+so its URL can be cached forever (including inside ETag-validated checklist
+responses) and still prove that the server handed it out. Rotating
+``SECRET_KEY`` revokes every link.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import re
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from PIL import Image as PILImage
+
+from .backends import get_blob_backend
+from .models import Blob
+
+REF_PREFIX = 'blob:'
+SIGNATURE_SALT = 'blobs.signed_blob_url'
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+DATA_URL_RE = re.compile(r'^data:(?P<content_type>[\w.+-]+/[\w.+-]+)?(?:;[\w=.+-]+)*;base64,', re.IGNORECASE)
+BLOB_PATH_RE = re.compile(r'/(?P<sha256>[0-9a-f]{64})/$')
+HASH_CHUNK_SIZE = 256 * 1024
+# The only types client content is stored and served as: raster formats that
+# browsers never execute. Detected from the bytes, never taken from the client
+IMAGE_CONTENT_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+
+class BlobError(Exception):
+    """Raised for malformed inline payloads or missing blobs."""
+
+
+def blob_ref(sha256):
+    return f'{REF_PREFIX}{sha256}'
+
+
+def parse_blob_ref(value):
+    """Digest of a ``blob:<sha256>`` reference, or None for anything else."""
+    if isinstance(value, str) and value.startswith(REF_PREFIX):
+        sha256 = value[len(REF_PREFIX):]
+        if SHA256_RE.match(sha256):
+            return sha256
+    return None
+
+
+def put_blob(data, content_type='application/octet-stream'):
+    """Store ``data`` (deduplicated) and return its ``Blob``."""
+    return put_blob_file(io.BytesIO(data), content_type)
+
+
+def put_blob_file(content, content_type='application/octet-stream'):
+    """
+    Store the binary file object ``content`` (deduplicated) and return its
+    ``Blob``. The file is read twice, in chunks (hash, then copy), so
+    uploads spooled to disk are never loaded into memory.
+    """
+    content.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    sha256 = digest.hexdigest()
+
+    blob = Blob.objects.filter(pk=sha256).first()
+    if blob is not None:
+        return blob
+    # Bytes first: a row never points at content that isn't there
+    content.seek(0)
+    get_blob_backend().save(sha256, content)
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(sha256=sha256, size=size, content_type=content_type)
+    except IntegrityError:
+        # Another writer registered the same content first
+        return Blob.objects.get(pk=sha256)
+
+
+def detect_image_type(content):
+    """
+    Content type of the image in the binary file object ``content``, read
+    by Pillow; raises ``BlobError`` unless it is a JPEG, PNG or WebP.
+    """
+    content.seek(0)
+    try:
+        with PILImage.open(content, formats=list(IMAGE_CONTENT_TYPES)) as image:
+            image_format = image.format
+    except (OSError, PILImage.DecompressionBombError, ValueError) as e:
+        raise BlobError('Apenas imagens JPEG, PNG ou WebP são aceitas') from e
+    finally:
+        content.seek(0)
+    return IMAGE_CONTENT_TYPES[image_format]
+
+
+def put_image(data):
+    """Store the image ``data`` under the type detected from its bytes."""
+    return put_image_file(io.BytesIO(data))
+
+
+def put_image_file(content):
+    """``put_blob_file`` for client images: only JPEG, PNG and WebP, typed by their bytes."""
+    return put_blob_file(content, detect_image_type(content))
+
+
+def open_blob(sha256):
+    """Open a stored blob for reading (binary file object)."""
+    try:
+        return get_blob_backend().open(sha256)
+    except (FileNotFoundError, OSError) as e:
+        raise BlobError(f'Blob não encontrado: {sha256}') from e
+
+
+def read_blob(sha256):
+    with open_blob(sha256) as f:
+        return f.read()
+
+
+def decode_data_url(value):
+    """``(bytes, content_type)`` of a base64 ``data:`` URL, or None if ``value`` isn't one."""
+    if not isinstance(value, str):
+        return None
+    match = DATA_URL_RE.match(value)
+    if match is None:
+        return None
+    try:
+        data = base64.b64decode(value[match.end():])
+    except (binascii.Error, ValueError) as e:
+        raise BlobError(f'Base64 inválido: {e}') from e
+    return data, (match.group('content_type') or 'application/octet-stream').lower()
+
+
+def decode_base64_image(value):
+    """Bytes of a data URL or of bare base64; the declared type is not trusted."""
+    decoded = decode_data_url(value)
+    if decoded is not None:
+        return decoded[0]
+    try:
+        return base64.b64decode(value)
+    except (binascii.Error, ValueError) as e:
+        raise BlobError(f'Base64 inválido: {e}') from e
+
+
+def _signature(sha256):
+    return salted_hmac(SIGNATURE_SALT, sha256, algorithm='sha256').hexdigest()
+
+
+def signed_blob_url(sha256, request=None, variant=None):
+    """
+    Signed URL of the blob view, absolute when ``request`` is given. With
+    ``variant`` (a name from ``derivatives.DERIVATIVES``), the URL of that
+    derivative; the blob's signature covers its derivatives too.
+    """
+    if variant is None:
+        path = reverse('blob-file', kwargs={'sha256': sha256})
+    else:
+        path = reverse('blob-derivative', kwargs={'sha256': sha256, 'variant': variant})
+    url = f'{path}?{urlencode({"signature": _signature(sha256)})}'
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def verify_blob_signature(sha256, signature):
+    return bool(signature) and constant_time_compare(signature, _signature(sha256))
+
+
+def _signed_url_ref(value):
+    """Reference for one of our own signed blob URLs sent back by a client."""
+    if not isinstance(value, str) or '/' not in value:
+        return None
+    parsed = urlparse(value)
+    match = BLOB_PATH_RE.search(parsed.path)
+    if match is None or not parsed.path.startswith(reverse('blob-file', kwargs={'sha256': match['sha256']})):
+        return None
+    signature = parse_qs(parsed.query).get('signature', [''])[0]
+    if not verify_blob_signature(match['sha256'], signature):
+        return None
+    return blob_ref(match['sha256'])
+
+
+def referenced_sha256(value):
+    """Digest named by a blob reference or one of our signed blob URLs, else None."""
+    return parse_blob_ref(value) or parse_blob_ref(_signed_url_ref(value))
+
+
+def externalize_blobs(value):
+    """
+    Copy of the JSON ``value`` with inline ``data:`` URLs moved to the blob
+    store and replaced by references. Signed blob URLs (a client echoing a
+    payload it received) go back to being references.
+    """
+    if isinstance(value, dict):
+        return {key: externalize_blobs(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [externalize_blobs(item) for item in value]
+    decoded = decode_data_url(value)
+    if decoded is not None:
+        # Whatever the data URL declares, only images are stored
+        return blob_ref(put_image(decoded[0]).sha256)
+    ref = _signed_url_ref(value)
+    return ref if ref is not None else value
+
+
+def resolve_blob_refs(value, request=None):
+    """Copy of the JSON ``value`` with references replaced by signed URLs."""
+    if isinstance(value, dict):
+        return {key: resolve_blob_refs(item, request) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_blob_refs(item, request) for item in value]
+    sha256 = parse_blob_ref(value)
+    return signed_blob_url(sha256, request) if sha256 is not None else value
+
+
+def has_inline_blobs(value):
+    if isinstance(value, dict):
+        return any(has_inline_blobs(item) for item in value.values())
+    if isinstance(value, list):
+        return any(has_inline_blobs(item) for item in value)
+    return isinstance(value, str) and DATA_URL_RE.match(value) is not None
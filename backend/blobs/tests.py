@@ -0,0 +1,394 @@
+import base64
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import wait
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from ai_assistant.models import VehicleDamageAssessment
+from checklists.models import CompletedChecklist
+from checklists.pdf_generator import get_pdf_generator
+from vehicles.models import Vehicle
+from .backends import StorageBlobBackend, reset_blob_backend
+from .derivatives import DERIVATIVES, derivative_key, get_derivative_cache, reset_derivative_cache, schedule_derivatives
+from .models import Blob, BlobUpload
+from .store import blob_ref, parse_blob_ref, put_blob, read_blob, signed_blob_url
+
+User = get_user_model()
+
+
+def make_png(color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (40, 30), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def make_photo(size=(2400, 1800)):
+    buffer = io.BytesIO()
+    PILImage.linear_gradient('L').resize(size).convert('RGB').save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def make_upload(size):
+    """JPEG bytes padded to exactly ``size``; Pillow only reads the header."""
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (16, 16), (10, 20, 30)).save(buffer, 'JPEG')
+    return buffer.getvalue() + os.urandom(size - buffer.tell())
+
+
+def data_url(data, mime='image/png'):
+    return f'data:{mime};base64,{base64.b64encode(data).decode()}'
+
+
+class BlobTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='inspetor', password='senha-teste')
+        cls.vehicle = Vehicle.objects.create(
+            plate='ABC1234', model='FH 540', brand='Volvo', year=2022,
+            vehicle_type='truck', created_by=cls.user,
+        )
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='rodocheck-test-blobs-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(
+            BLOB_BACKEND='filesystem', BLOB_ROOT=self.root, BLOB_UPLOAD_DIR=os.path.join(self.root, 'uploads'),
+            BLOB_DERIVATIVE_CACHE_DIR=os.path.join(self.root, 'derivatives'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for reset in (reset_blob_backend, reset_derivative_cache):
+            reset()
+            self.addCleanup(reset)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class BlobStoreTests(BlobTestCase):
+
+    def test_identical_content_is_stored_once(self):
+        data = make_png()
+
+        first = put_blob(data, 'image/png')
+        second = put_blob(data, 'image/png')
+
+        self.assertEqual(first.pk, hashlib.sha256(data).hexdigest())
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(Blob.objects.count(), 1)
+        path = os.path.join(self.root, first.pk[:2], first.pk[2:4], first.pk)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(read_blob(first.pk), data)
+
+    def test_storage_backend(self):
+        backend = StorageBlobBackend(FileSystemStorage(location=self.root), prefix='blobs', redirect=False)
+        sha256 = hashlib.sha256(b'abc').hexdigest()
+
+        backend.save(sha256, io.BytesIO(b'abc'))
+        backend.save(sha256, io.BytesIO(b'abc'))
+
+        with backend.open(sha256) as f:
+            self.assertEqual(f.read(), b'abc')
+        self.assertEqual(os.listdir(os.path.join(self.root, 'blobs', sha256[:2], sha256[2:4])), [sha256])
+        self.assertIsNone(backend.url(sha256))
+
+    def test_checklist_rows_hold_references(self):
+        image = make_png()
+        payload = {
+            'id': 'chk-1', 'vehicle': self.vehicle.id, 'final_status': 'approved', 'questions': [],
+            'vehicle_images': {'frontal': data_url(image), 'traseira': {'url': data_url(image)}},
+            'signatures': {'motorista': data_url(make_png((0, 0, 0)))},
+        }
+
+        response = self.client.post('/api/checklists/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        checklist = CompletedChecklist.objects.get(external_id='chk-1')
+        sha256 = hashlib.sha256(image).hexdigest()
+        self.assertEqual(checklist.vehicle_images, {'frontal': blob_ref(sha256), 'traseira': {'url': blob_ref(sha256)}})
+        self.assertTrue(parse_blob_ref(checklist.signatures['motorista']))
+        self.assertEqual(Blob.objects.count(), 2)
+
+        url = response.json()['vehicle_images']['frontal']
+        self.assertTrue(url.startswith('http://testserver/api/blobs/'))
+        blob = APIClient().get(url)  # no session: the signature is the credential
+        self.assertEqual(blob.status_code, 200)
+        self.assertEqual(b''.join(blob.streaming_content), image)
+        self.assertEqual(blob['Content-Type'], 'image/png')
+        self.assertIn('immutable', blob['Cache-Control'])
+
+    def test_signed_urls_sent_back_become_references_again(self):
+        checklist = CompletedChecklist.objects.create(
+            external_id='chk-1', vehicle=self.vehicle, created_by=self.user,
+            vehicle_images={'frontal': data_url(make_png())},
+        )
+        detail = self.client.get(f'/api/checklists/{checklist.pk}/').json()
+
+        response = self.client.patch(
+            f'/api/checklists/{checklist.pk}/', {'vehicle_images': detail['vehicle_images']}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        checklist.refresh_from_db()
+        self.assertTrue(parse_blob_ref(checklist.vehicle_images['frontal']))
+
+    def test_invalid_signature_is_rejected(self):
+        blob = put_blob(b'abc', 'text/plain')
+        path = signed_blob_url(blob.pk)
+
+        self.assertEqual(self.client.get(path[:-1] + ('0' if path[-1] != '0' else '1')).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/blobs/{blob.pk}/').status_code, 403)
+
+    def test_only_raster_images_are_stored_whatever_the_declared_type(self):
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg" onload="alert(1)"></svg>'
+        payload = {
+            'id': 'chk-1', 'vehicle': self.vehicle.id, 'questions': [],
+            'vehicle_images': {'frontal': data_url(svg, 'image/svg+xml')},
+        }
+
+        response = self.client.post('/api/checklists/', payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Blob.objects.exists())
+
+        payload['vehicle_images'] = {'frontal': data_url(make_png(), 'text/html')}
+        self.assertEqual(self.client.post('/api/checklists/', payload, format='json').status_code, 201)
+        self.assertEqual(Blob.objects.get().content_type, 'image/png')
+
+    def test_other_content_is_never_rendered_inline(self):
+        blob = put_blob(b'<script>alert(1)</script>', 'text/html')
+
+        response = APIClient().get(signed_blob_url(blob.pk))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertIn('sandbox', response['Content-Security-Policy'])
+
+    def test_pdf_reads_referenced_images(self):
+        blob = put_blob(make_png(), 'image/png')
+        checklist = CompletedChecklist.objects.create(
+            external_id='chk-1', vehicle=self.vehicle, created_by=self.user,
+            vehicle_images={'frontal': blob_ref(blob.pk)},
+        )
+
+        pdf = get_pdf_generator().generate_pdf(checklist)
+
+        self.assertEqual(pdf.count(b'/Subtype /Image'), 1)
+
+
+class ExtractInlineBlobsCommandTests(BlobTestCase):
+
+    def test_moves_inline_payloads_in_chunks(self):
+        image = make_png()
+        checklists = [
+            CompletedChecklist.objects.create(
+                external_id=f'chk-{i}', vehicle=self.vehicle, created_by=self.user,
+                vehicle_images={'frontal': data_url(image), 'obs': 'sem avarias'},
+                signatures={'motorista': data_url(make_png((0, 0, i)))},
+            )
+            for i in range(3)
+        ]
+        assessment = VehicleDamageAssessment.objects.create(
+            checklist=checklists[0], vehicle=self.vehicle, image_url='https://example.com/foto.jpg',
+            image_base64=base64.b64encode(image).decode(),
+        )
+
+        call_command('extract_inline_blobs', chunk_size=2, stdout=io.StringIO())
+
+        sha256 = hashlib.sha256(image).hexdigest()
+        for checklist in checklists:
+            checklist.refresh_from_db()
+            self.assertEqual(checklist.vehicle_images, {'frontal': blob_ref(sha256), 'obs': 'sem avarias'})
+            self.assertTrue(parse_blob_ref(checklist.signatures['motorista']))
+        assessment.refresh_from_db()
+        self.assertEqual(assessment.image_base64, '')
+        self.assertEqual(assessment.image_blob_id, sha256)
+        self.assertEqual(Blob.objects.count(), 4)
+
+        out = io.StringIO()
+        call_command('extract_inline_blobs', stdout=out)
+        self.assertIn('CompletedChecklist: 0 linhas convertidas', out.getvalue())
+
+
+class ChunkedUploadTests(BlobTestCase):
+    CHUNK = 64 * 1024
+
+    def start(self, data, **kwargs):
+        payload = {
+            'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(),
+            'content_type': 'image/jpeg', 'chunk_size': self.CHUNK, **kwargs,
+        }
+        return self.client.post('/api/blobs/uploads/', payload, format='json')
+
+    def put_chunk(self, upload_id, index, data, **headers):
+        return self.client.put(
+            f'/api/blobs/uploads/{upload_id}/chunks/{index}/', data,
+            content_type='application/octet-stream', **headers,
+        )
+
+    def chunk(self, data, index):
+        return data[index * self.CHUNK:(index + 1) * self.CHUNK]
+
+    def test_chunks_in_any_order_with_retries(self):
+        data = make_upload(self.CHUNK * 2 + 1000)
+        upload = self.start(data).json()
+        self.assertEqual((upload['chunk_size'], upload['chunks']), (self.CHUNK, 3))
+
+        for index in (2, 0, 0, 1):  # chunk 0 retried
+            response = self.put_chunk(upload['id'], index, self.chunk(data, index))
+            self.assertEqual(response.status_code, 200, response.content)
+        status = self.client.get(f'/api/blobs/uploads/{upload["id"]}/').json()
+        self.assertEqual(status['received'], [0, 1, 2])
+
+        response = self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        sha256 = hashlib.sha256(data).hexdigest()
+        self.assertEqual(response.json()['ref'], blob_ref(sha256))
+        self.assertEqual(read_blob(sha256), data)
+        self.assertFalse(BlobUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.root, 'uploads')), [])
+
+        checklist = self.client.post('/api/checklists/', {
+            'id': 'chk-1', 'vehicle': self.vehicle.id, 'questions': [],
+            'vehicle_images': {'frontal': response.json()['url']},
+        }, format='json')
+        self.assertEqual(checklist.status_code, 201)
+        self.assertEqual(CompletedChecklist.objects.get().vehicle_images, {'frontal': blob_ref(sha256)})
+
+    def test_resume_sends_only_missing_chunks(self):
+        data = make_upload(self.CHUNK * 3)
+        upload = self.start(data).json()
+        self.put_chunk(upload['id'], 1, self.chunk(data, 1))
+
+        response = self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('0, 2', response.json()['error'])
+
+        for index in set(range(upload['chunks'])) - set(
+            self.client.get(f'/api/blobs/uploads/{upload["id"]}/').json()['received']
+        ):
+            self.put_chunk(upload['id'], index, self.chunk(data, index))
+        self.assertEqual(self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/').status_code, 201)
+
+    def test_rejects_bad_chunks_and_checksums(self):
+        data = make_upload(self.CHUNK + 10)
+        upload = self.start(data).json()
+
+        self.assertEqual(self.put_chunk(upload['id'], 0, data[:100]).status_code, 400)  # wrong size
+        self.assertEqual(self.put_chunk(upload['id'], 5, data[:10]).status_code, 400)  # no such chunk
+        self.assertEqual(
+            self.put_chunk(upload['id'], 1, data[-10:], HTTP_X_CHUNK_SHA256='0' * 64).status_code, 400
+        )
+        self.put_chunk(upload['id'], 0, self.chunk(data, 0))
+        self.put_chunk(upload['id'], 1, b'x' * 10)  # corrupted in transit
+
+        response = self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Blob.objects.exists())
+        self.assertEqual(self.client.get(f'/api/blobs/uploads/{upload["id"]}/').status_code, 404)
+        self.assertEqual(self.start(data, content_type='application/pdf').status_code, 400)
+
+    def test_only_raster_images_can_be_finalized(self):
+        self.assertEqual(self.start(b'<svg/>', content_type='image/svg+xml').status_code, 400)
+
+        data = b'<svg xmlns="http://www.w3.org/2000/svg" onload="alert(1)"></svg>'
+        upload = self.start(data).json()  # declared as image/jpeg
+        self.put_chunk(upload['id'], 0, data)
+
+        response = self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(BlobUpload.objects.exists())
+
+        png = make_png()
+        upload = self.start(png).json()
+        self.put_chunk(upload['id'], 0, png)
+        response = self.client.post(f'/api/blobs/uploads/{upload["id"]}/finalize/')
+        self.assertEqual(response.json()['content_type'], 'image/png')
+
+    def test_uploads_are_private_and_expire(self):
+        data = os.urandom(1000)
+        upload_id = self.start(data).json()['id']
+        other = User.objects.create_user(username='outro', password='senha-teste')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(f'/api/blobs/uploads/{upload_id}/').status_code, 404)
+
+        BlobUpload.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.put_chunk(upload_id, 0, data).status_code, 410)
+
+        call_command('cleanup_blob_uploads', stdout=io.StringIO())
+
+        self.assertFalse(BlobUpload.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'uploads', upload_id)))
+
+
+class DerivativeTests(BlobTestCase):
+
+    def test_checklists_expose_downscaled_derivatives(self):
+        photo = put_blob(make_photo(), 'image/jpeg')
+        checklist = CompletedChecklist.objects.create(
+            external_id='chk-1', vehicle=self.vehicle, created_by=self.user,
+            vehicle_images={'frontal': blob_ref(photo.pk), 'obs': 'sem avarias'},
+        )
+
+        item = self.client.get('/api/checklists/', {'fields': 'id,vehicle_image_variants'}).json()['results'][0]
+
+        self.assertEqual(set(item['vehicle_image_variants']), {'frontal'})
+        urls = item['vehicle_image_variants']['frontal']
+        self.assertEqual(set(urls), set(DERIVATIVES))
+        client = APIClient()  # signed URLs, no session
+        for name, expected_format in (('thumb', 'WEBP'), ('print', 'JPEG')):
+            response = client.get(urls[name])
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            with PILImage.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+                self.assertEqual(image.format, expected_format)
+                self.assertEqual(max(image.size), DERIVATIVES[name].max_px)
+
+        # Built once, then served from the disk cache
+        with mock.patch('blobs.derivatives.downscale_image') as downscale:
+            self.assertEqual(client.get(urls['thumb']).status_code, 200)
+        downscale.assert_not_called()
+        detail = self.client.get(f'/api/checklists/{checklist.pk}/').json()
+        self.assertEqual(detail['vehicle_image_variants']['frontal']['thumb'], urls['thumb'])
+
+    def test_rejects_bad_signatures_unknown_variants_and_other_content(self):
+        photo = put_blob(make_photo((40, 30)), 'image/jpeg')
+        text = put_blob(b'abc', 'text/plain')
+        thumb = signed_blob_url(photo.pk, variant='thumb')
+
+        self.assertEqual(self.client.get(thumb.replace('signature=', 'signature=0')).status_code, 403)
+        self.assertEqual(self.client.get(thumb.replace('/thumb/', '/huge/')).status_code, 404)
+        self.assertEqual(self.client.get(signed_blob_url(text.pk, variant='thumb')).status_code, 404)
+
+    def test_new_images_are_derived_once_committed(self):
+        with mock.patch('blobs.derivatives.schedule_derivatives') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                photo = put_blob(make_photo((40, 30)), 'image/jpeg')
+                put_blob(b'abc', 'text/plain')
+                schedule.assert_not_called()
+        schedule.assert_called_once_with(photo.pk)
+
+        done, not_done = wait(schedule_derivatives(photo.pk), timeout=30)
+
+        self.assertFalse(not_done)
+        for variant in DERIVATIVES.values():
+            self.assertIsNotNone(get_derivative_cache().get(derivative_key(photo.pk, variant), variant.extension))
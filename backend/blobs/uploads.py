@@ -0,0 +1,190 @@
+"""
+Resumable chunked uploads into the blob store.
+
+Photos taken in the yard go up over slow, flaky mobile links; sent in one
+request, a dropped connection loses the whole upload. Here the client
+declares the upload first (size, SHA-256, content type) and gets an id and
+a chunk size back. Chunks are then sent one per request, by number, in any
+order and as many times as needed: each one is written to its own file
+under ``BLOB_UPLOAD_DIR``, replaced atomically, so a retried chunk simply
+overwrites itself. The status call lists the chunks received, so a client
+resuming after a crash only sends what is missing.
+
+Finalizing joins the chunks, checks the SHA-256 declared at the start,
+checks with Pillow that the result is a JPEG, PNG or WebP image, and
+stores it as a blob under the detected type. Its ``blob:<sha256>``
+reference (or signed URL) goes into ``vehicle_images``. Every chunk
+pushes the expiry forward; uploads left unfinished past
+``BLOB_UPLOAD_TTL`` are refused and removed by ``cleanup_blob_uploads``.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BlobUpload
+from .store import IMAGE_CONTENT_TYPES, SHA256_RE, BlobError, put_image_file
+
+READ_CHUNK_SIZE = 64 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """A request the upload protocol refuses; ``str(e)`` is shown to the client."""
+
+
+def upload_dir(upload_id):
+    return os.path.join(settings.BLOB_UPLOAD_DIR, str(upload_id))
+
+
+def start_upload(user, size, sha256, content_type, chunk_size=None):
+    """Register a new upload and return it."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = 0
+    if size <= 0:
+        raise UploadError('Informe o tamanho do arquivo em bytes.')
+    if size > settings.BLOB_UPLOAD_MAX_BYTES:
+        raise UploadError('Arquivo excede o tamanho máximo permitido.')
+    sha256 = (sha256 or '').lower()
+    if not SHA256_RE.match(sha256):
+        raise UploadError('Informe o SHA-256 do arquivo (64 caracteres hexadecimais).')
+    if content_type not in IMAGE_CONTENT_TYPES.values():
+        raise UploadError('Apenas imagens JPEG, PNG ou WebP podem ser enviadas.')
+    try:
+        chunk_size = int(chunk_size or settings.BLOB_UPLOAD_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        raise UploadError('Tamanho de parte inválido.')
+    chunk_size = min(max(chunk_size, MIN_CHUNK_SIZE), settings.BLOB_UPLOAD_MAX_CHUNK_SIZE)
+
+    upload = BlobUpload.objects.create(
+        created_by=user, size=size, sha256=sha256, content_type=content_type,
+        chunk_size=chunk_size, expires_at=timezone.now() + timedelta(seconds=settings.BLOB_UPLOAD_TTL),
+    )
+    os.makedirs(upload_dir(upload.id), exist_ok=True)
+    return upload
+
+
+def received_chunks(upload):
+    """Sorted numbers of the chunks stored so far."""
+    try:
+        names = os.listdir(upload_dir(upload.id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name) for name in names if name.isdigit())
+
+
+def write_chunk(upload, index, stream, sha256=None):
+    """
+    Store chunk ``index`` read from the binary ``stream`` (the request body).
+
+    The chunk must have exactly the expected size; ``sha256``, when the
+    client sends one, is checked too. Rewriting a chunk replaces it.
+    """
+    if not 0 <= index < upload.chunk_count:
+        raise UploadError(f'Parte inválida: {index} (o envio tem {upload.chunk_count} partes).')
+    expected = upload.expected_chunk_size(index)
+    directory = upload_dir(upload.id)
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    written = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                data = stream.read(READ_CHUNK_SIZE)
+                if not data:
+                    break
+                written += len(data)
+                if written > expected:
+                    raise UploadError(f'A parte {index} deve ter {expected} bytes.')
+                digest.update(data)
+                f.write(data)
+        if written != expected:
+            raise UploadError(f'A parte {index} deve ter {expected} bytes; recebidos {written}.')
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise UploadError(f'SHA-256 da parte {index} não confere.')
+        os.replace(tmp_path, os.path.join(directory, str(index)))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # An upload that is still making progress doesn't expire
+    BlobUpload.objects.filter(pk=upload.pk).update(
+        expires_at=timezone.now() + timedelta(seconds=settings.BLOB_UPLOAD_TTL)
+    )
+
+
+def finalize_upload(upload):
+    """Join the chunks, verify the checksum and return the stored ``Blob``."""
+    with transaction.atomic():
+        # One finalize at a time per upload
+        upload = BlobUpload.objects.select_for_update().get(pk=upload.pk)
+        missing = sorted(set(range(upload.chunk_count)) - set(received_chunks(upload)))
+        if missing:
+            raise UploadError(f'Partes faltando: {", ".join(map(str, missing[:20]))}.')
+
+        directory = upload_dir(upload.id)
+        digest = hashlib.sha256()
+        blob = error = None
+        with tempfile.TemporaryFile(dir=directory) as joined:
+            for index in range(upload.chunk_count):
+                with open(os.path.join(directory, str(index)), 'rb') as chunk:
+                    for data in iter(lambda: chunk.read(READ_CHUNK_SIZE), b''):
+                        digest.update(data)
+                        joined.write(data)
+            if digest.hexdigest() != upload.sha256:
+                error = 'SHA-256 do arquivo não confere; o envio foi descartado.'
+            else:
+                try:
+                    # Stored under the type read from the bytes, not the declared one
+                    blob = put_image_file(joined)
+                except BlobError as e:
+                    error = f'{e}; o envio foi descartado.'
+        # Either way the chunks are done with: a corrupt upload starts over
+        abort_upload(upload)
+
+    if error is not None:
+        raise UploadError(error)
+    return blob
+
+
+def abort_upload(upload):
+    """Forget an upload and its chunks."""
+    BlobUpload.objects.filter(pk=upload.pk).delete()
+    shutil.rmtree(upload_dir(upload.id), ignore_errors=True)
+
+
+def cleanup_expired_uploads(now=None):
+    """
+    Remove expired uploads and chunk directories left without an upload
+    (a crash between the two deletes). Returns the number of uploads removed.
+    """
+    now = now or timezone.now()
+    removed = 0
+    for upload in BlobUpload.objects.filter(expires_at__lt=now).iterator():
+        abort_upload(upload)
+        removed += 1
+
+    try:
+        names = os.listdir(settings.BLOB_UPLOAD_DIR)
+    except FileNotFoundError:
+        return removed
+    known = {str(pk) for pk in BlobUpload.objects.values_list('pk', flat=True)}
+    stale_before = (now - timedelta(seconds=settings.BLOB_UPLOAD_TTL)).timestamp()
+    for name in names:
+        path = os.path.join(settings.BLOB_UPLOAD_DIR, name)
+        if name not in known and os.path.getmtime(path) < stale_before:
+            shutil.rmtree(path, ignore_errors=True)
+    return removed
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('uploads/', views.start_blob_upload, name='blob-upload-start'),
+    path('uploads/<uuid:upload_id>/', views.blob_upload_detail, name='blob-upload-detail'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', views.put_blob_upload_chunk, name='blob-upload-chunk'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finalize_blob_upload, name='blob-upload-finalize'),
+    path('<str:sha256>/', views.blob_file, name='blob-file'),
+    path('<str:sha256>/<str:variant>/', views.blob_derivative, name='blob-derivative'),
+]
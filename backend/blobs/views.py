@@ -0,0 +1,184 @@
+import io
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .backends import get_blob_backend
+from .derivatives import CONTENT_TYPES, DERIVATIVES, derivative_key, open_derivative
+from .images import ImageFetchError
+from .models import Blob, BlobUpload
+from .store import IMAGE_CONTENT_TYPES, BlobError, blob_ref, open_blob, signed_blob_url, verify_blob_signature
+from .uploads import UploadError, abort_upload, finalize_upload, received_chunks, start_upload, write_chunk
+
+# A digest always names the same bytes
+BLOB_MAX_AGE = 365 * 24 * 3600
+
+
+@require_GET
+def blob_file(request, sha256):
+    """Serve a blob to holders of a signed URL (no session needed)."""
+    if not verify_blob_signature(sha256, request.GET.get('signature', '')):
+        return HttpResponseForbidden('Assinatura inválida')
+
+    blob = Blob.objects.filter(pk=sha256).only('content_type').first()
+    if blob is None:
+        raise Http404('Blob não encontrado')
+
+    url = get_blob_backend().url(sha256)
+    if url:
+        response = HttpResponseRedirect(url)
+        patch_cache_control(response, private=True, no_store=True)
+        return response
+
+    try:
+        response = FileResponse(
+            open_blob(sha256), content_type=blob.content_type,
+            # Rows stored before types were checked may hold anything: only
+            # raster images are shown inline
+            as_attachment=blob.content_type not in IMAGE_CONTENT_TYPES.values(), filename=sha256,
+        )
+    except BlobError:
+        raise Http404('Blob não encontrado')
+    response['ETag'] = f'"{sha256}"'
+    _harden(response)
+    patch_cache_control(response, private=True, max_age=BLOB_MAX_AGE, immutable=True)
+    return response
+
+
+def _harden(response):
+    """The API origin never renders blob content as a document."""
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Content-Security-Policy'] = "default-src 'none'; sandbox"
+
+
+@require_GET
+def blob_derivative(request, sha256, variant):
+    """
+    Serve a derivative (``thumb``, ``preview``, ``print``) of an image blob,
+    building it on a cache miss. Takes the blob's own signature.
+    """
+    if not verify_blob_signature(sha256, request.GET.get('signature', '')):
+        return HttpResponseForbidden('Assinatura inválida')
+    image_variant = DERIVATIVES.get(variant)
+    if image_variant is None:
+        raise Http404('Variante desconhecida')
+    blob = Blob.objects.filter(pk=sha256).only('content_type').first()
+    if blob is None or not blob.content_type.startswith('image/'):
+        raise Http404('Imagem não encontrada')
+
+    try:
+        f = open_derivative(sha256, image_variant, timeout=settings.BLOB_DERIVATIVE_TIMEOUT)
+    except FutureTimeoutError:
+        # Still being built; the job keeps running for the retry
+        response = HttpResponse('Imagem em processamento', status=503)
+        response['Retry-After'] = '2'
+        return response
+    except ImageFetchError:
+        raise Http404('Imagem indisponível')
+    response = FileResponse(f, content_type=CONTENT_TYPES[image_variant.format])
+    response['ETag'] = f'"{derivative_key(sha256, image_variant)}"'
+    _harden(response)
+    patch_cache_control(response, private=True, max_age=BLOB_MAX_AGE, immutable=True)
+    return response
+
+
+def _get_upload(request, upload_id):
+    upload = get_object_or_404(BlobUpload, pk=upload_id, created_by=request.user)
+    if upload.expires_at < timezone.now():
+        return None
+    return upload
+
+
+def _upload_payload(upload, received=()):
+    return {
+        'id': str(upload.id),
+        'size': upload.size,
+        'chunk_size': upload.chunk_size,
+        'chunks': upload.chunk_count,
+        'received': list(received),
+        'expires_at': upload.expires_at,
+    }
+
+
+EXPIRED_RESPONSE = {'error': 'Envio expirado; comece novamente.'}
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_blob_upload(request):
+    """
+    Start a resumable upload.
+
+    Body: ``size`` (bytes), ``sha256`` (hex digest of the whole file),
+    ``content_type`` and optionally ``chunk_size``. The response carries the
+    upload id and the chunk size to use (the server may adjust it).
+    """
+    data = request.data if isinstance(request.data, dict) else {}
+    try:
+        upload = start_upload(
+            request.user, data.get('size'), data.get('sha256'), data.get('content_type'), data.get('chunk_size')
+        )
+    except UploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(_upload_payload(upload), status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def blob_upload_detail(request, upload_id):
+    """Chunks received so far (GET), or abort the upload (DELETE)."""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return Response(EXPIRED_RESPONSE, status=status.HTTP_410_GONE)
+    if request.method == 'DELETE':
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(_upload_payload(upload, received_chunks(upload)))
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def put_blob_upload_chunk(request, upload_id, index):
+    """
+    Store chunk ``index`` (numbered from 0) from the raw request body.
+
+    Idempotent: sending a chunk again replaces it. An optional
+    ``X-Chunk-SHA256`` header is checked against the chunk's bytes.
+    """
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return Response(EXPIRED_RESPONSE, status=status.HTTP_410_GONE)
+    try:
+        write_chunk(upload, index, request.stream or io.BytesIO(), request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'index': index}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_blob_upload(request, upload_id):
+    """Join the chunks, verify the SHA-256 and register the blob."""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return Response(EXPIRED_RESPONSE, status=status.HTTP_410_GONE)
+    try:
+        blob = finalize_upload(upload)
+    except UploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'sha256': blob.sha256,
+        'ref': blob_ref(blob.sha256),
+        'url': signed_blob_url(blob.sha256, request),
+        'size': blob.size,
+        'content_type': blob.content_type,
+    }, status=status.HTTP_201_CREATED)
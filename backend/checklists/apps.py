@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ChecklistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'checklists'
+
+    def ready(self):
+        # Build the shared PDF styles once per worker, not on the first request
+        from .pdf_styles import warm_pdf_resources
+        warm_pdf_resources()
+        # Signal receivers that retire cached template responses
+        from . import template_cache  # noqa: F401
@@ -0,0 +1,178 @@
+"""
+Download accounting for checklist PDFs.
+
+Increments never load or save the checklist row: the total is bumped with a
+single ``UPDATE ... SET download_count = download_count + n`` (which also
+leaves ``updated_at`` alone) and the per-day counter is upserted the same
+way. With ``DOWNLOAD_COUNTER_MODE = 'buffered'`` increments are first
+aggregated in memory and written in batches, trading a few seconds of lag
+for one UPDATE per checklist per flush instead of one per download.
+
+The buffer is flushed when it fills up, every ``flush_interval`` seconds by
+a background thread (so an idle worker doesn't sit on its counts) and at
+interpreter exit. A worker killed outright (SIGKILL, the OOM killer) still
+loses what it had pending: at most ``DOWNLOAD_COUNTER_FLUSH_SIZE``
+downloads or ``DOWNLOAD_COUNTER_FLUSH_INTERVAL`` seconds' worth. Use the
+atomic mode where every download must be counted.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChecklistDownloadStat, CompletedChecklist
+
+logger = logging.getLogger('rodocheck')
+
+
+def apply_download_increments(increments):
+    """
+    Persist a mapping of ``(checklist_id, date) -> count``.
+
+    Each increment is an atomic relative update, so concurrent writers never
+    overwrite each other.
+    """
+    totals = Counter()
+    for (checklist_id, date), count in increments.items():
+        totals[checklist_id] += count
+
+    with transaction.atomic():
+        existing = set()
+        for checklist_id, count in totals.items():
+            if CompletedChecklist.objects.filter(pk=checklist_id).update(
+                download_count=F('download_count') + count
+            ):
+                existing.add(checklist_id)
+
+        for (checklist_id, date), count in increments.items():
+            if checklist_id not in existing:
+                # Checklist deleted since the download was served
+                continue
+            updated = ChecklistDownloadStat.objects.filter(
+                checklist_id=checklist_id, date=date
+            ).update(count=F('count') + count)
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    ChecklistDownloadStat.objects.create(
+                        checklist_id=checklist_id, date=date, count=count
+                    )
+            except IntegrityError:
+                # Another writer created today's row first
+                ChecklistDownloadStat.objects.filter(
+                    checklist_id=checklist_id, date=date
+                ).update(count=F('count') + count)
+
+
+class DownloadCounterBuffer:
+    """In-process buffer of download increments flushed in batches."""
+
+    def __init__(self, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Flush every ``flush_interval`` seconds from a daemon thread."""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._run, name='download-counter-flush', daemon=True)
+            self._timer.start()
+
+    def stop(self):
+        """Stop the flush thread and write what is still pending."""
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            finally:
+                # Long-lived thread: don't keep a connection open between flushes
+                connection.close()
+
+    def add(self, checklist_id, date):
+        with self._lock:
+            self._pending[(checklist_id, date)] += 1
+            self._pending_total += 1
+            due = (
+                self._pending_total >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            apply_download_increments(pending)
+        except Exception as e:
+            logger.error(f"Error flushing download counters: {e}")
+            with self._lock:
+                self._pending.update(pending)
+                self._pending_total += sum(pending.values())
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_download_buffer():
+    """Return the process-wide counter buffer."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = DownloadCounterBuffer(
+                flush_size=settings.DOWNLOAD_COUNTER_FLUSH_SIZE,
+                flush_interval=settings.DOWNLOAD_COUNTER_FLUSH_INTERVAL,
+            )
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
+
+
+def record_download(checklist_id):
+    """Count one download of a checklist PDF."""
+    # Views pass a UUID or its string form; both must land on one counter
+    checklist_id = str(checklist_id)
+    today = timezone.localdate()
+    if settings.DOWNLOAD_COUNTER_MODE == 'buffered':
+        get_download_buffer().add(checklist_id, today)
+    else:
+        apply_download_increments({(checklist_id, today): 1})
+
+
+def is_countable_download(request, response):
+    """
+    Only GETs count: full transfers and the first chunk of ranged ones.
+    HEAD gets the same 200 without a byte of the file.
+    """
+    if request.method != 'GET':
+        return False
+    if response.status_code == 200:
+        return True
+    if response.status_code == 206:
+        return response.get('Content-Range', '').startswith('bytes 0-')
+    return False
@@ -0,0 +1,168 @@
+"""
+Streaming file downloads for checklist PDFs.
+
+Files are never read into memory as a whole: responses iterate the stored
+file in chunks, honour single ``Range`` requests and the usual conditional
+headers, and can hand the transfer over to the web server
+(``X-Accel-Redirect`` for nginx, ``X-Sendfile`` for Apache/lighttpd) once
+Django has checked permissions.
+"""
+
+import hashlib
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _file_metadata(field_file, fallback_modified=None):
+    """Return ``(size, last_modified_timestamp)`` for a stored file."""
+    storage = field_file.storage
+    size = storage.size(field_file.name)
+    try:
+        modified = storage.get_modified_time(field_file.name)
+    except (NotImplementedError, OSError):
+        modified = fallback_modified
+    return size, int(modified.timestamp()) if modified else None
+
+
+def _make_etag(name, size, last_modified):
+    name_hash = hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]
+    return quote_etag(f'{name_hash}-{size:x}-{last_modified or 0:x}')
+
+
+def _parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header.
+
+    Returns ``(start, end)`` (inclusive), ``None`` when the header should be
+    ignored (absent, malformed or multi-range) and ``False`` when it cannot
+    be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_passes(request, etag, last_modified):
+    """A failed ``If-Range`` means the client must get the full file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def iter_file_range(file_obj, start, length, chunk_size):
+    """Yield ``length`` bytes of ``file_obj`` starting at ``start``."""
+    try:
+        file_obj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+def _content_disposition(filename):
+    ascii_name = filename.encode('ascii', 'ignore').decode().replace('"', '')
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def _sendfile_response(field_file, content_type):
+    """Let the web server stream the bytes; returns None when disabled."""
+    mode = settings.PDF_DOWNLOAD_SENDFILE
+    if mode == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        prefix = settings.PDF_DOWNLOAD_ACCEL_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = f'{prefix}/{quote(field_file.name)}'
+        return response
+    if mode == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = field_file.path
+        return response
+    return None
+
+
+def serve_file(request, field_file, filename, content_type='application/pdf', fallback_modified=None):
+    """
+    Build a download response for a stored ``FieldFile``.
+
+    Handles ``If-None-Match``/``If-Modified-Since`` (304), ``Range``/``If-Range``
+    (206/416) and the optional web server hand-off.
+    """
+    size, last_modified = _file_metadata(field_file, fallback_modified)
+    etag = _make_etag(field_file.name, size, last_modified)
+
+    def _finalize(response):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return _finalize(conditional)
+
+    response = _sendfile_response(field_file, content_type)
+    if response is not None:
+        response['Content-Disposition'] = _content_disposition(filename)
+        return _finalize(response)
+
+    chunk_size = settings.PDF_DOWNLOAD_CHUNK_SIZE
+    byte_range = None
+    if request.method == 'GET' and _if_range_passes(request, etag, last_modified):
+        byte_range = _parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _finalize(response)
+
+    file_obj = field_file.storage.open(field_file.name, 'rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            iter_file_range(file_obj, start, length, chunk_size),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(file_obj, content_type=content_type)
+        response.block_size = chunk_size
+        response['Content-Length'] = str(size)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = _content_disposition(filename)
+    return _finalize(response)
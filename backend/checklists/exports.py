@@ -0,0 +1,173 @@
+"""
+Bulk ZIP export of checklist PDFs.
+
+The archive is produced as a stream: entries are written through
+``zipfile`` into a small buffer that is drained after every chunk, so
+memory use does not grow with the number of checklists. Stored PDFs are
+reused; missing or stale ones are rendered by a small worker pool a few
+checklists ahead of the one being streamed.
+"""
+
+import csv
+import logging
+import posixpath
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import CompletedChecklist
+from .pdf_storage import is_pdf_current
+from .tasks import render_checklist_pdf
+
+logger = logging.getLogger('rodocheck')
+
+
+class _ZipStreamBuffer:
+    """Write-only, non-seekable sink that hands out what was written so far."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def export_queryset(user, vehicle_id=None, date_from=None, date_to=None):
+    """Checklists visible to ``user`` matching the export filters, oldest first."""
+    queryset = CompletedChecklist.objects.select_related(
+        'vehicle', 'template', 'created_by'
+    ).filter(created_by=user)
+    if vehicle_id:
+        queryset = queryset.filter(vehicle_id=vehicle_id)
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+    return queryset.order_by('created_at', 'id')
+
+
+def archive_name(checklist):
+    """Path of a checklist's PDF inside the archive: ``<plate>/<date>_<id>.pdf``."""
+    created = timezone.localtime(checklist.created_at).strftime('%Y-%m-%d')
+    plate = get_valid_filename(checklist.vehicle.plate) or 'sem-placa'
+    return posixpath.join(plate, get_valid_filename(f'{created}_{checklist.reference}.pdf'))
+
+
+def _ensure_pdf(checklist_id):
+    """Render a checklist PDF; returns the stored name or None on failure."""
+    try:
+        render_checklist_pdf(checklist_id, force=True)
+        checklist = CompletedChecklist.objects.only('pdf_file', 'is_pdf_generated').get(id=checklist_id)
+        return checklist.pdf_file.name if checklist.is_pdf_generated else None
+    except Exception as e:
+        logger.error(f"Export could not render PDF for checklist {checklist_id}: {e}")
+        return None
+
+
+def _ensure_pdf_in_pool(checklist_id):
+    try:
+        return _ensure_pdf(checklist_id)
+    finally:
+        connection.close()
+
+
+class _InlineExecutor:
+    """Executor stand-in that runs jobs immediately (``PDF_RENDER_BACKEND = 'sync'``)."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(_ensure_pdf(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _export_executor(workers):
+    if settings.PDF_RENDER_BACKEND == 'sync':
+        return _InlineExecutor()
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pdf-export')
+
+
+def _with_pdf_names(checklists, executor, lookahead):
+    """
+    Yield ``(checklist, pdf_name)`` in order, rendering missing PDFs ahead.
+
+    At most ``lookahead`` checklists are held in memory at any time.
+    """
+    pending = deque()
+    for checklist in checklists:
+        if is_pdf_current(checklist):
+            pending.append((checklist, checklist.pdf_file.name))
+        else:
+            pending.append((checklist, executor.submit(_ensure_pdf_in_pool, checklist.id)))
+        while len(pending) > lookahead:
+            yield _resolve(pending.popleft())
+    while pending:
+        yield _resolve(pending.popleft())
+
+
+def _resolve(item):
+    checklist, name = item
+    if not isinstance(name, str):
+        name = name.result()
+    return checklist, name
+
+
+def stream_checklist_zip(checklists):
+    """Yield the bytes of a ZIP archive containing the PDFs of ``checklists``."""
+    chunk_size = settings.PDF_DOWNLOAD_CHUNK_SIZE
+    workers = settings.PDF_EXPORT_RENDER_WORKERS
+    buffer = _ZipStreamBuffer()
+
+    manifest = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+', newline='', encoding='utf-8')
+    writer = csv.writer(manifest)
+    writer.writerow(['arquivo', 'checklist', 'placa', 'data', 'status', 'situacao'])
+
+    executor = _export_executor(workers)
+    try:
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for checklist, pdf_name in _with_pdf_names(checklists, executor, lookahead=workers * 2):
+                name = archive_name(checklist)
+                row = [name, checklist.reference, checklist.vehicle.plate,
+                       timezone.localtime(checklist.created_at).isoformat(), checklist.final_status]
+                if not pdf_name:
+                    writer.writerow(row + ['erro ao gerar PDF'])
+                    continue
+
+                storage = checklist.pdf_file.storage
+                info = zipfile.ZipInfo(name, date_time=timezone.localtime(checklist.created_at).timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with storage.open(pdf_name, 'rb') as source, archive.open(info, 'w') as entry:
+                    while True:
+                        chunk = source.read(chunk_size)
+                        if not chunk:
+                            break
+                        entry.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                writer.writerow(row + ['ok'])
+                yield buffer.drain()
+
+            manifest.seek(0)
+            archive.writestr('indice.csv', manifest.read().encode('utf-8'))
+        yield buffer.drain()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        manifest.close()
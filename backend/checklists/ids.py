@@ -0,0 +1,58 @@
+"""
+Server-generated, time-ordered checklist ids.
+
+Checklist primary keys are UUIDv7 values (RFC 9562): a 48-bit Unix
+timestamp in milliseconds followed by random bits. They are 16 bytes wide
+and, being ordered by creation time, new rows are appended at the right
+edge of the primary key index (and of every index on a foreign key to it)
+instead of landing at random positions. The id a client generated offline
+is kept as ``CompletedChecklist.external_id``.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+from django.db.models import Q
+
+
+_lock = threading.Lock()
+_last = 0
+
+
+def _uuid7_int(timestamp_ms):
+    value = (int(timestamp_ms) & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), 'big') & ((1 << 80) - 1)
+    # Version 7 in bits 48-51, RFC 4122 variant in bits 64-65
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return value
+
+
+def uuid7(timestamp_ms=None):
+    """
+    New UUIDv7, for the current time or for ``timestamp_ms``.
+
+    Ids generated for the current time by this process are strictly
+    increasing, even within one millisecond (the random bits of the
+    previous id are incremented, RFC 9562 section 6.2 method 2).
+    """
+    global _last
+    if timestamp_ms is not None:
+        return uuid.UUID(int=_uuid7_int(timestamp_ms))
+
+    value = _uuid7_int(time.time_ns() // 1_000_000)
+    with _lock:
+        if value <= _last:
+            value = _last + 1
+        _last = value
+    return uuid.UUID(int=value)
+
+
+def checklist_lookup(value):
+    """Q matching a checklist by its id or by the id its client generated."""
+    try:
+        return Q(pk=uuid.UUID(str(value))) | Q(external_id=value)
+    except ValueError:
+        return Q(external_id=value)
@@ -0,0 +1,49 @@
+"""
+Relational ``ChecklistItem`` rows derived from a checklist's ``questions``.
+
+The JSON stays the source of truth for the app and the PDF; the rows are a
+copy written alongside it so item-level reports are indexed queries instead
+of a scan over every checklist's JSON.
+"""
+
+from django.db import transaction
+
+from .models import ChecklistItem
+
+ITEM_STATUSES = {choice for choice, _label in ChecklistItem._meta.get_field('status').choices}
+KEY_MAX_LENGTH = ChecklistItem._meta.get_field('key').max_length
+TEXT_MAX_LENGTH = ChecklistItem._meta.get_field('text').max_length
+PHOTO_MAX_LENGTH = ChecklistItem._meta.get_field('photo').max_length
+
+
+def _photo_url(value):
+    # Inline data URLs stay in the JSON; the column only holds short links
+    if isinstance(value, str) and value.startswith(('http://', 'https://')) and len(value) <= PHOTO_MAX_LENGTH:
+        return value
+    return None
+
+
+def build_checklist_items(checklist):
+    """Unsaved ``ChecklistItem`` rows mirroring ``checklist.questions``."""
+    items = []
+    for order, question in enumerate(checklist.questions or []):
+        if not isinstance(question, dict):
+            continue
+        status = question.get('status')
+        items.append(ChecklistItem(
+            checklist=checklist,
+            key=str(question.get('id') or '')[:KEY_MAX_LENGTH],
+            text=str(question.get('text') or '')[:TEXT_MAX_LENGTH],
+            status=status if status in ITEM_STATUSES else 'pending',
+            observations=question.get('observations') or '',
+            photo=_photo_url(question.get('photo')),
+            order=order,
+        ))
+    return items
+
+
+def replace_checklist_items(checklist):
+    """Rewrite the ``ChecklistItem`` rows of ``checklist`` from its questions."""
+    with transaction.atomic():
+        ChecklistItem.objects.filter(checklist=checklist).delete()
+        ChecklistItem.objects.bulk_create(build_checklist_items(checklist))
@@ -0,0 +1,62 @@
+"""
+Copy the answers stored in ``CompletedChecklist.questions`` into
+``ChecklistItem`` rows for checklists created before the dual-write.
+
+Checklists are read in primary-key order, in chunks, and each chunk is
+written in its own transaction, so the command can be stopped and started
+again at any time: checklists that already have items are skipped unless
+``--rebuild`` is given.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from checklists.items import build_checklist_items
+from checklists.models import ChecklistItem, CompletedChecklist
+
+
+class Command(BaseCommand):
+    help = 'Backfill ChecklistItem rows from the questions JSON of existing checklists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Checklists read and written per transaction.')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rewrite the items of checklists that already have them.')
+
+    def handle(self, *args, **options):
+        queryset = CompletedChecklist.objects.all()
+        if not options['rebuild']:
+            queryset = queryset.filter(~Exists(ChecklistItem.objects.filter(checklist=OuterRef('pk'))))
+
+        total = queryset.count()
+        self.stdout.write(f'Checklists a processar: {total}')
+
+        chunk_size = max(1, options['chunk_size'])
+        processed = items = 0
+        last_id = None
+        started = time.monotonic()
+        while True:
+            chunk = queryset.order_by('id')
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+            chunk = list(chunk.only('id', 'questions')[:chunk_size])
+            if not chunk:
+                break
+
+            rows = [item for checklist in chunk for item in build_checklist_items(checklist)]
+            with transaction.atomic():
+                if options['rebuild']:
+                    ChecklistItem.objects.filter(checklist__in=chunk).delete()
+                ChecklistItem.objects.bulk_create(rows, batch_size=1000)
+
+            processed += len(chunk)
+            items += len(rows)
+            last_id = chunk[-1].id
+            rate = processed / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{processed}/{total} checklists | {items} itens | {rate:.0f} checklists/s')
+
+        self.stdout.write(self.style.SUCCESS(f'Itens gravados: {items} em {processed} checklists'))
@@ -0,0 +1,53 @@
+"""
+Delete stored checklist PDFs that no checklist references anymore.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from checklists.models import CompletedChecklist
+from checklists.pdf_storage import iter_stored_pdfs, pdf_storage
+
+
+class Command(BaseCommand):
+    help = 'Remove orphaned and superseded checklist PDF files from storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help='Keep files newer than this (renders may still be saving them).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the files that would be deleted.')
+
+    def handle(self, *args, **options):
+        referenced = set(
+            CompletedChecklist.objects.exclude(pdf_file='')
+            .exclude(pdf_file__isnull=True)
+            .values_list('pdf_file', flat=True)
+            .iterator(chunk_size=2000)
+        )
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+
+        removed = kept = 0
+        for name in iter_stored_pdfs(pdf_storage):
+            if name in referenced:
+                kept += 1
+                continue
+            try:
+                if pdf_storage.get_modified_time(name) > cutoff:
+                    kept += 1
+                    continue
+            except (NotImplementedError, OSError):
+                pass
+
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                pdf_storage.delete(name)
+            removed += 1
+
+        action = 'seriam removidos' if options['dry_run'] else 'removidos'
+        self.stdout.write(self.style.SUCCESS(
+            f'PDFs {action}: {removed} | mantidos: {kept}'
+        ))
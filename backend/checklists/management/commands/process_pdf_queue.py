@@ -0,0 +1,26 @@
+"""
+Drain the checklist PDF render queue.
+"""
+
+from django.core.management.base import BaseCommand
+
+from checklists.tasks import process_pending_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Render pending, failed or stale checklist PDFs in this process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Maximum number of checklists to process.')
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help='Skip checklists that already failed this many times.')
+
+    def handle(self, *args, **options):
+        rendered, failed = process_pending_pdfs(
+            limit=options['limit'],
+            max_attempts=options['max_attempts'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'PDFs gerados: {rendered} | falhas/ignorados: {failed}'
+        ))
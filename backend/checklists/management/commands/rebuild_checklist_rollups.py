@@ -0,0 +1,114 @@
+"""
+Recompute the daily checklist rollups from scratch.
+
+Creates, edits and deletes through the API keep the rollups current; this
+command fills them the first time and repairs them after deletes that bypass
+the API (a vehicle or template deleted with its checklists). Each table is
+aggregated in the database with one GROUP BY and the old rows are replaced
+in the same transaction, so readers never see a half-built rollup.
+
+Rejected item counts are read from the ``ChecklistItem`` rows: on databases
+that predate them, run ``backfill_checklist_items`` first.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from checklists.models import (
+    ChecklistDailyInspectorStat,
+    ChecklistDailyItemStat,
+    ChecklistDailyTemplateStat,
+    ChecklistDailyVehicleStat,
+    ChecklistItem,
+    CompletedChecklist,
+)
+
+# Rollup table -> extra checklist columns it is grouped by
+CHECKLIST_ROLLUPS = [
+    (ChecklistDailyInspectorStat, []),
+    (ChecklistDailyVehicleStat, ['vehicle']),
+    (ChecklistDailyTemplateStat, ['template']),
+]
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily checklist rollups (dashboard and reports).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rollup rows inserted per statement.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        started = time.monotonic()
+        written = 0
+
+        with transaction.atomic():
+            for model, columns in CHECKLIST_ROLLUPS:
+                rows = self.checklist_rows(columns)
+                model.objects.all().delete()
+                model.objects.bulk_create([model(**row) for row in rows], batch_size=batch_size)
+                written += len(rows)
+                self.stdout.write(f'{model.__name__}: {len(rows)} linhas')
+
+            rows = [
+                {'date': row['day'], 'inspector_id': row['checklist__created_by'],
+                 'key': row['key'], 'text': row['text'], 'rejected': row['rejected']}
+                for row in ChecklistItem.objects.filter(status='rejected')
+                .annotate(day=TruncDate('checklist__created_at'))
+                .values('day', 'checklist__created_by', 'key', 'text')
+                .annotate(rejected=Count('id'))
+                .order_by()
+            ]
+            ChecklistDailyItemStat.objects.all().delete()
+            ChecklistDailyItemStat.objects.bulk_create(
+                [ChecklistDailyItemStat(**row) for row in rows], batch_size=batch_size
+            )
+            written += len(rows)
+            self.stdout.write(f'ChecklistDailyItemStat: {len(rows)} linhas')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Linhas de resumo gravadas: {written} em {elapsed:.1f}s'))
+
+    def checklist_rows(self, columns):
+        rejected_items = (
+            ChecklistItem.objects.filter(status='rejected')
+            .annotate(day=TruncDate('checklist__created_at'))
+            .values('day', 'checklist__created_by', *[f'checklist__{column}' for column in columns])
+            .annotate(rejected=Count('id'))
+            .order_by()
+        )
+        rejected_items = {
+            (row['day'], row['checklist__created_by'], *[row[f'checklist__{column}'] for column in columns]):
+                row['rejected']
+            for row in rejected_items
+        }
+
+        rows = []
+        for row in (
+            CompletedChecklist.objects.annotate(day=TruncDate('created_at'))
+            .values('day', 'created_by', *columns)
+            .annotate(
+                checklists=Count('id'),
+                approved=Count('id', filter=Q(final_status='approved')),
+                rejected=Count('id', filter=Q(final_status='rejected')),
+                pending=Count('id', filter=~Q(final_status__in=['approved', 'rejected'])),
+            )
+            .order_by()
+        ):
+            key = (row['day'], row['created_by'], *[row[column] for column in columns])
+            rows.append({
+                'date': row['day'],
+                'inspector_id': row['created_by'],
+                **{f'{column}_id': row[column] for column in columns},
+                'checklists': row['checklists'],
+                'approved': row['approved'],
+                'rejected': row['rejected'],
+                'pending': row['pending'],
+                'rejected_items': rejected_items.get(key, 0),
+            })
+        return rows
@@ -0,0 +1,57 @@
+"""
+Rebuild the full-text search documents of existing checklists.
+
+New and edited checklists are indexed as they are saved; this command fills
+the index for checklists created before it existed (or after a change to what
+gets indexed). Checklists are read in primary-key order, in chunks, and each
+chunk is written with a single upsert, so the command can be interrupted and
+run again at any time.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from checklists.models import ChecklistSearchDocument, CompletedChecklist
+from checklists.search import index_checklists
+
+
+class Command(BaseCommand):
+    help = 'Build the full-text search documents of existing checklists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Checklists read and indexed per batch.')
+        parser.add_argument('--all', action='store_true',
+                            help='Also rewrite checklists that are already indexed.')
+
+    def handle(self, *args, **options):
+        queryset = CompletedChecklist.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(
+                ~Exists(ChecklistSearchDocument.objects.filter(checklist=OuterRef('pk')))
+            )
+
+        total = queryset.count()
+        self.stdout.write(f'Checklists a indexar: {total}')
+
+        chunk_size = max(1, options['chunk_size'])
+        processed = 0
+        last_id = None
+        started = time.monotonic()
+        while True:
+            chunk = queryset.order_by('id')
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+            chunk = list(chunk.only('id', 'created_by', 'general_observations', 'questions')[:chunk_size])
+            if not chunk:
+                break
+
+            index_checklists(chunk)
+            processed += len(chunk)
+            last_id = chunk[-1].id
+            rate = processed / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{processed}/{total} checklists | {rate:.0f} checklists/s')
+
+        self.stdout.write(self.style.SUCCESS(f'Checklists indexados: {processed}'))
@@ -0,0 +1,78 @@
+"""
+Rewrite the compressed JSON columns of existing checklists with the current
+``COMPRESSED_JSON_CODEC`` / ``COMPRESSED_JSON_LEVEL``.
+
+Every stored value records its codec, so rows written before a switch
+(zlib to zstd, another level) stay readable; this command brings them in
+line. Checklists are read in primary-key order, in chunks, as raw bytes;
+only rows whose encoding would change are written, each chunk re-read under
+lock and committed in its own transaction, so the command can be stopped
+and started again at any time. The JSON values themselves don't change, so
+neither do ``updated_at``, ETags or PDF fingerprints.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import BinaryField
+from django.db.models.functions import Cast
+
+from checklists.models import CompletedChecklist
+from rodocheck_backend.compressed_json import compress_json, decompress_json
+
+FIELDS = ['questions', 'vehicle_images', 'signatures']
+
+
+class Command(BaseCommand):
+    help = 'Recompress the JSON columns of existing checklists with the configured codec.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Checklists read and written per transaction.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the sizes before and after, without writing.')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        raw_columns = {f'{name}_raw': Cast(name, BinaryField()) for name in FIELDS}
+        queryset = CompletedChecklist.objects.order_by('pk').annotate(**raw_columns)
+
+        processed = rewritten = bytes_before = bytes_after = 0
+        last_pk = None
+        started = time.monotonic()
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk.values_list('pk', *raw_columns)[:chunk_size])
+            if not chunk:
+                break
+
+            stale = []
+            for pk, *values in chunk:
+                changed = False
+                for data in values:
+                    data = bytes(data)
+                    encoded = compress_json(decompress_json(data))
+                    bytes_before += len(data)
+                    bytes_after += len(encoded)
+                    changed = changed or encoded != data
+                if changed:
+                    stale.append(pk)
+
+            if stale and not options['dry_run']:
+                with transaction.atomic():
+                    # Re-read under lock: a concurrent edit is never overwritten
+                    rows = list(CompletedChecklist.objects.select_for_update().filter(pk__in=stale).only('pk', *FIELDS))
+                    CompletedChecklist.objects.bulk_update(rows, FIELDS)
+
+            processed += len(chunk)
+            rewritten += len(stale)
+            last_pk = chunk[-1][0]
+            rate = processed / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{processed} checklists | {rewritten} a regravar | {rate:.0f} checklists/s')
+
+        verb = 'seriam regravados' if options['dry_run'] else 'regravados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{rewritten} de {processed} checklists {verb}; colunas JSON: '
+            f'{bytes_before / 1024:.1f} KB -> {bytes_after / 1024:.1f} KB'
+        ))
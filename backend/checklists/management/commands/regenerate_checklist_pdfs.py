@@ -0,0 +1,159 @@
+"""
+Re-render checklist PDFs in bulk, e.g. after a layout change.
+
+Checklists are read from the database in primary-key order, in chunks, and
+rendered by a pool of worker processes. After every chunk the last processed
+id is written to a checkpoint file, so an interrupted run picks up where it
+stopped when started again with the same filters. Every PDF is rendered
+again, even when a file for the same inputs is already stored.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django import db
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from checklists.models import CompletedChecklist
+
+
+def _init_worker():
+    # Spawned workers start from scratch; forked ones must not reuse the
+    # parent's database sockets.
+    import django
+    django.setup()
+    db.connections.close_all()
+
+
+def _regenerate(checklist_id):
+    from checklists.tasks import render_checklist_pdf
+    try:
+        return checklist_id, render_checklist_pdf(checklist_id, force=True, reuse=False)
+    except Exception:
+        return checklist_id, False
+
+
+class Command(BaseCommand):
+    help = 'Regenerate checklist PDFs in parallel, resuming from a checkpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicle', help='Only checklists of this vehicle id.')
+        parser.add_argument('--created-from', help='Only checklists created on or after YYYY-MM-DD.')
+        parser.add_argument('--created-to', help='Only checklists created on or before YYYY-MM-DD.')
+        parser.add_argument('--status', help='Only checklists with this final status.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 renders in this process).')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Checklists read from the database per batch.')
+        parser.add_argument('--checkpoint',
+                            default=str(settings.BASE_DIR / 'cache' / 'regenerate_checklist_pdfs.json'),
+                            help='File that records progress between runs.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an existing checkpoint and start from the beginning.')
+
+    def handle(self, *args, **options):
+        filters = self._filters(options)
+        queryset = CompletedChecklist.objects.filter(**filters)
+        signature = hashlib.sha256(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+
+        checkpoint_path = options['checkpoint']
+        state = {'filters': signature, 'last_id': None, 'rendered': 0, 'failed': 0}
+        if not options['restart']:
+            saved = self._load_checkpoint(checkpoint_path)
+            if saved and saved.get('filters') == signature:
+                state = saved
+                self.stdout.write(f'Retomando após o checklist {state["last_id"]}')
+
+        total = self._after(queryset, state['last_id']).count()
+        self.stdout.write(f'Checklists a processar: {total}')
+
+        workers = max(1, options['workers'])
+        executor = None
+        if workers > 1:
+            # Forked children would otherwise share the parent's DB connections
+            db.connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+        started = time.monotonic()
+        processed = 0
+        try:
+            while True:
+                ids = list(
+                    self._after(queryset, state['last_id'])
+                    .order_by('id')
+                    .values_list('id', flat=True)[:options['chunk_size']]
+                )
+                if not ids:
+                    break
+
+                if executor is not None:
+                    results = executor.map(_regenerate, ids, chunksize=max(1, len(ids) // (workers * 4)))
+                else:
+                    results = map(_regenerate, ids)
+                for _checklist_id, ok in results:
+                    state['rendered' if ok else 'failed'] += 1
+
+                processed += len(ids)
+                state['last_id'] = str(ids[-1])
+                self._save_checkpoint(checkpoint_path, state)
+                self._report(processed, total, started)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        # Finished: the next run starts over
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'PDFs gerados: {state["rendered"]} | falhas/ignorados: {state["failed"]}'
+        ))
+
+    @staticmethod
+    def _after(queryset, last_id):
+        return queryset if last_id is None else queryset.filter(id__gt=last_id)
+
+    def _filters(self, options):
+        filters = {}
+        if options['vehicle']:
+            filters['vehicle_id'] = options['vehicle']
+        if options['status']:
+            filters['final_status'] = options['status']
+        for option, lookup in (('created_from', 'created_at__date__gte'), ('created_to', 'created_at__date__lte')):
+            if options[option]:
+                value = parse_date(options[option])
+                if value is None:
+                    raise CommandError(f'Data inválida: {options[option]} (use AAAA-MM-DD)')
+                filters[lookup] = value
+        return filters
+
+    def _report(self, processed, total, started):
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0.0
+        remaining = (total - processed) / rate if rate else 0.0
+        percent = processed * 100 / total if total else 100.0
+        self.stdout.write(
+            f'{processed}/{total} ({percent:.1f}%) | {rate:.1f} PDFs/s | restante ~{remaining:.0f}s'
+        )
+
+    @staticmethod
+    def _load_checkpoint(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_checkpoint(path, state):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+            json.dump(state, tmp)
+        os.replace(tmp_path, path)
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+def mark_generated_pdfs_completed(apps, schema_editor):
+    CompletedChecklist = apps.get_model("checklists", "CompletedChecklist")
+    CompletedChecklist.objects.filter(is_pdf_generated=True).update(
+        pdf_status="completed"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="pdf_attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="pdf_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="pdf_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pendente"),
+                    ("processing", "Processando"),
+                    ("completed", "Concluído"),
+                    ("failed", "Falhou"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="pdf_status_changed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_generated_pdfs_completed, migrations.RunPython.noop),
+    ]
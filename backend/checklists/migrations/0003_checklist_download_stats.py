@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0002_pdf_render_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChecklistDownloadStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "checklist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="download_stats",
+                        to="checklists.completedchecklist",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdownloadstat",
+            constraint=models.UniqueConstraint(
+                fields=("checklist", "date"), name="unique_checklist_download_day"
+            ),
+        ),
+    ]
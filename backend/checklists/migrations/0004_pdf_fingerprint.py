@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0003_checklist_download_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="pdf_fingerprint",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0004_pdf_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="completedchecklist",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="completedchecklist",
+            index=models.Index(
+                fields=["created_by", "-created_at", "-id"],
+                name="checklist_user_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0005_checklist_user_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="completedchecklist",
+            constraint=models.UniqueConstraint(
+                fields=("created_by", "idempotency_key"),
+                name="unique_checklist_idempotency_key",
+            ),
+        ),
+    ]
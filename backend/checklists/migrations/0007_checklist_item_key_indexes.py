@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0006_checklist_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="checklistitem",
+            name="key",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="checklistitem",
+            index=models.Index(
+                fields=["status", "checklist"], name="checklist_item_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="checklistitem",
+            index=models.Index(fields=["key", "status"], name="checklist_item_key_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="checklistitem",
+            index=models.Index(fields=["text"], name="checklist_item_text_idx"),
+        ),
+    ]
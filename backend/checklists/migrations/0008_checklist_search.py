@@ -0,0 +1,119 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The text index is vendor specific, so it is created with raw SQL:
+# PostgreSQL gets a generated tsvector column (Portuguese stemming) with a GIN
+# index; SQLite gets an external-content FTS5 table kept in sync by triggers,
+# with the owner as an indexed column so searches are filtered in the index.
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE checklists_checklistsearchdocument
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('portuguese', document)) STORED
+    """,
+    """
+    CREATE INDEX checklist_search_vector_idx
+    ON checklists_checklistsearchdocument USING GIN (search_vector)
+    """,
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS checklist_search_vector_idx",
+    "ALTER TABLE checklists_checklistsearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE checklists_search_fts USING fts5(
+        document,
+        created_by_id,
+        content='checklists_checklistsearchdocument',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER checklists_search_fts_ai AFTER INSERT ON checklists_checklistsearchdocument BEGIN
+        INSERT INTO checklists_search_fts(rowid, document, created_by_id)
+        VALUES (new.id, new.document, new.created_by_id);
+    END
+    """,
+    """
+    CREATE TRIGGER checklists_search_fts_ad AFTER DELETE ON checklists_checklistsearchdocument BEGIN
+        INSERT INTO checklists_search_fts(checklists_search_fts, rowid, document, created_by_id)
+        VALUES ('delete', old.id, old.document, old.created_by_id);
+    END
+    """,
+    """
+    CREATE TRIGGER checklists_search_fts_au AFTER UPDATE ON checklists_checklistsearchdocument BEGIN
+        INSERT INTO checklists_search_fts(checklists_search_fts, rowid, document, created_by_id)
+        VALUES ('delete', old.id, old.document, old.created_by_id);
+        INSERT INTO checklists_search_fts(rowid, document, created_by_id)
+        VALUES (new.id, new.document, new.created_by_id);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS checklists_search_fts_au",
+    "DROP TRIGGER IF EXISTS checklists_search_fts_ad",
+    "DROP TRIGGER IF EXISTS checklists_search_fts_ai",
+    "DROP TABLE IF EXISTS checklists_search_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+create_text_index = _run({"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD})
+drop_text_index = _run({"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("checklists", "0007_checklist_item_key_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChecklistSearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("document", models.TextField()),
+                (
+                    "checklist",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_document",
+                        to="checklists.completedchecklist",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,95 @@
+"""
+Switch CompletedChecklist to UUIDv7 primary keys, step 1 of 2.
+
+Every checklist gets a time-ordered UUID (derived from its ``created_at``)
+in a temporary column, and every table pointing at it gets that UUID next
+to its old foreign key, which is then dropped. ai_assistant 0002 does the
+same for damage assessments; 0010 swaps the primary key and restores the
+foreign keys. Not reversible.
+"""
+
+import uuid
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from checklists.ids import uuid7
+
+CHILD_MODELS = ["ChecklistItem", "ChecklistDownloadStat", "ChecklistSearchDocument"]
+BATCH_SIZE = 2000
+
+
+def assign_uuids(apps, schema_editor):
+    CompletedChecklist = apps.get_model("checklists", "CompletedChecklist")
+
+    batch = []
+    previous = None
+    for checklist in (
+        CompletedChecklist.objects.only("id", "created_at").order_by("created_at", "id").iterator(chunk_size=BATCH_SIZE)
+    ):
+        value = uuid7(int(checklist.created_at.timestamp() * 1000))
+        # Keep the old (created_at, id) order for rows in the same millisecond
+        if previous is not None and value.int <= previous.int:
+            value = uuid.UUID(int=previous.int + 1)
+        checklist.uuid = previous = value
+        batch.append(checklist)
+        if len(batch) == BATCH_SIZE:
+            CompletedChecklist.objects.bulk_update(batch, ["uuid"])
+            batch = []
+    if batch:
+        CompletedChecklist.objects.bulk_update(batch, ["uuid"])
+
+    new_id = CompletedChecklist.objects.filter(id=OuterRef("checklist_id")).values("uuid")[:1]
+    for name in CHILD_MODELS:
+        apps.get_model("checklists", name).objects.update(checklist_uuid=Subquery(new_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0008_checklist_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="checklistitem",
+            name="checklist_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AddField(
+            model_name="checklistdownloadstat",
+            name="checklist_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AddField(
+            model_name="checklistsearchdocument",
+            name="checklist_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.RunPython(assign_uuids),
+        migrations.RemoveIndex(
+            model_name="checklistitem",
+            name="checklist_item_status_idx",
+        ),
+        migrations.RemoveConstraint(
+            model_name="checklistdownloadstat",
+            name="unique_checklist_download_day",
+        ),
+        migrations.RemoveField(
+            model_name="checklistitem",
+            name="checklist",
+        ),
+        migrations.RemoveField(
+            model_name="checklistdownloadstat",
+            name="checklist",
+        ),
+        migrations.RemoveField(
+            model_name="checklistsearchdocument",
+            name="checklist",
+        ),
+    ]
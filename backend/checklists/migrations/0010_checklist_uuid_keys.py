@@ -0,0 +1,170 @@
+"""
+Switch CompletedChecklist to UUIDv7 primary keys, step 2 of 2.
+
+The old client-supplied primary key becomes ``external_id`` (unique, still
+indexed), the UUID from 0009 becomes ``id``, and the foreign keys of the
+child tables are restored from their temporary UUID columns. Not reversible.
+"""
+
+import importlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+
+import checklists.ids
+
+CHILD_MODELS = ["ChecklistItem", "ChecklistDownloadStat", "ChecklistSearchDocument"]
+
+# On SQLite, rebuilding checklists_checklistsearchdocument drops the FTS5
+# sync triggers created by 0008; the index rows themselves are unaffected
+# because the rebuilt table keeps its ids.
+search_migration = importlib.import_module("checklists.migrations.0008_checklist_search")
+SQLITE_TRIGGERS = [sql for sql in search_migration.SQLITE_FORWARD if "CREATE TRIGGER" in sql]
+
+
+def restore_foreign_keys(apps, schema_editor):
+    for name in CHILD_MODELS:
+        apps.get_model("checklists", name).objects.update(checklist_id=F("checklist_uuid"))
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in search_migration.SQLITE_BACKWARD:
+        if "DROP TRIGGER" in sql:
+            schema_editor.execute(sql)
+    for sql in SQLITE_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0009_checklist_uuid_prepare"),
+        ("ai_assistant", "0002_damage_assessment_checklist_uuid_prepare"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="completedchecklist",
+            name="checklist_user_created_idx",
+        ),
+        # Old primary key -> external_id. It stays NOT NULL until the primary
+        # key has moved (PostgreSQL refuses nullable primary key columns).
+        migrations.RenameField(
+            model_name="completedchecklist",
+            old_name="id",
+            new_name="external_id",
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="external_id",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="uuid",
+            field=models.UUIDField(
+                default=checklists.ids.uuid7, editable=False, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="external_id",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RenameField(
+            model_name="completedchecklist",
+            old_name="uuid",
+            new_name="id",
+        ),
+        migrations.AddIndex(
+            model_name="completedchecklist",
+            index=models.Index(
+                fields=["created_by", "-created_at", "-id"], name="checklist_user_created_idx"
+            ),
+        ),
+        # Child tables: new foreign keys filled from the temporary columns
+        migrations.AddField(
+            model_name="checklistitem",
+            name="checklist",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="checklist_items",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.AddField(
+            model_name="checklistdownloadstat",
+            name="checklist",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="download_stats",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.AddField(
+            model_name="checklistsearchdocument",
+            name="checklist",
+            field=models.OneToOneField(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="search_document",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.RunPython(restore_foreign_keys),
+        migrations.AlterField(
+            model_name="checklistitem",
+            name="checklist",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="checklist_items",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="checklistdownloadstat",
+            name="checklist",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="download_stats",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="checklistsearchdocument",
+            name="checklist",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="search_document",
+                to="checklists.completedchecklist",
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="checklistitem",
+            name="checklist_uuid",
+        ),
+        migrations.RemoveField(
+            model_name="checklistdownloadstat",
+            name="checklist_uuid",
+        ),
+        migrations.RemoveField(
+            model_name="checklistsearchdocument",
+            name="checklist_uuid",
+        ),
+        migrations.AddIndex(
+            model_name="checklistitem",
+            index=models.Index(fields=["status", "checklist"], name="checklist_item_status_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdownloadstat",
+            constraint=models.UniqueConstraint(
+                fields=("checklist", "date"), name="unique_checklist_download_day"
+            ),
+        ),
+        migrations.RunPython(restore_search_triggers),
+    ]
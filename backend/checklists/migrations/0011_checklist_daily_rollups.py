@@ -0,0 +1,178 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("vehicles", "0001_initial"),
+        ("checklists", "0010_checklist_uuid_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChecklistDailyVehicleStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("checklists", models.IntegerField(default=0)),
+                ("approved", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+                ("pending", models.IntegerField(default=0)),
+                ("rejected_items", models.IntegerField(default=0)),
+                (
+                    "inspector",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "vehicle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="vehicles.vehicle",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChecklistDailyTemplateStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("checklists", models.IntegerField(default=0)),
+                ("approved", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+                ("pending", models.IntegerField(default=0)),
+                ("rejected_items", models.IntegerField(default=0)),
+                (
+                    "inspector",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="checklists.checklisttemplate",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChecklistDailyItemStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("key", models.CharField(blank=True, max_length=100)),
+                ("text", models.CharField(max_length=500)),
+                ("rejected", models.IntegerField(default=0)),
+                (
+                    "inspector",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChecklistDailyInspectorStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("checklists", models.IntegerField(default=0)),
+                ("approved", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+                ("pending", models.IntegerField(default=0)),
+                ("rejected_items", models.IntegerField(default=0)),
+                (
+                    "inspector",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdailyvehiclestat",
+            constraint=models.UniqueConstraint(
+                fields=("inspector", "date", "vehicle"),
+                name="unique_rollup_vehicle_day",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdailytemplatestat",
+            constraint=models.UniqueConstraint(
+                fields=("inspector", "date", "template"),
+                name="unique_rollup_template_day",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdailytemplatestat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("template__isnull", True)),
+                fields=("inspector", "date"),
+                name="unique_rollup_no_template_day",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdailyitemstat",
+            constraint=models.UniqueConstraint(
+                fields=("inspector", "date", "key", "text"),
+                name="unique_rollup_item_day",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="checklistdailyinspectorstat",
+            constraint=models.UniqueConstraint(fields=("inspector", "date"), name="unique_rollup_inspector_day"),
+        ),
+    ]
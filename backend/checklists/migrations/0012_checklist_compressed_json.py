@@ -0,0 +1,108 @@
+"""
+Store the large JSON columns of CompletedChecklist compressed.
+
+``questions``, ``vehicle_images`` and ``signatures`` become
+``CompressedJSONField`` (binary columns). The values are copied into new
+columns in primary-key order, in batches, and the new columns then take
+the old names. Reversible: going back copies them out again as JSON.
+"""
+
+from django.db import migrations
+
+import rodocheck_backend.compressed_json
+
+FIELDS = ["questions", "vehicle_images", "signatures"]
+BATCH_SIZE = 2000
+
+
+def _copy(apps, source_suffix, target_suffix):
+    CompletedChecklist = apps.get_model("checklists", "CompletedChecklist")
+    sources = [f"{name}{source_suffix}" for name in FIELDS]
+    targets = [f"{name}{target_suffix}" for name in FIELDS]
+
+    batch = []
+    for checklist in CompletedChecklist.objects.only("id", *sources).order_by("id").iterator(chunk_size=BATCH_SIZE):
+        for source, target in zip(sources, targets):
+            setattr(checklist, target, getattr(checklist, source))
+        batch.append(checklist)
+        if len(batch) == BATCH_SIZE:
+            CompletedChecklist.objects.bulk_update(batch, targets)
+            batch = []
+    if batch:
+        CompletedChecklist.objects.bulk_update(batch, targets)
+
+
+def compress_columns(apps, schema_editor):
+    _copy(apps, "", "_compressed")
+
+
+def decompress_columns(apps, schema_editor):
+    _copy(apps, "_compressed", "")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0011_checklist_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="questions_compressed",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="vehicle_images_compressed",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name="completedchecklist",
+            name="signatures_compressed",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(null=True),
+        ),
+        migrations.RunPython(compress_columns, decompress_columns),
+        migrations.RemoveField(
+            model_name="completedchecklist",
+            name="questions",
+        ),
+        migrations.RemoveField(
+            model_name="completedchecklist",
+            name="vehicle_images",
+        ),
+        migrations.RemoveField(
+            model_name="completedchecklist",
+            name="signatures",
+        ),
+        migrations.RenameField(
+            model_name="completedchecklist",
+            old_name="questions_compressed",
+            new_name="questions",
+        ),
+        migrations.RenameField(
+            model_name="completedchecklist",
+            old_name="vehicle_images_compressed",
+            new_name="vehicle_images",
+        ),
+        migrations.RenameField(
+            model_name="completedchecklist",
+            old_name="signatures_compressed",
+            new_name="signatures",
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="questions",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="vehicle_images",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="signatures",
+            field=rodocheck_backend.compressed_json.CompressedJSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+"""
+Keep checklist PDFs under PDF_STORAGE_ROOT instead of MEDIA_ROOT.
+
+MEDIA_ROOT is served publicly by the web server, which let anyone with a
+PDF's path skip the signed download link. Only the field's storage changes
+(the names stay the same); moving the files already stored is a deploy
+step, see DEPLOY_PRODUCTION.md.
+"""
+
+from django.db import migrations, models
+
+import checklists.pdf_storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checklists", "0012_checklist_compressed_json"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="completedchecklist",
+            name="pdf_file",
+            field=models.FileField(
+                blank=True, null=True, storage=checklists.pdf_storage.get_pdf_storage, upload_to="checklists/pdfs/"
+            ),
+        ),
+    ]
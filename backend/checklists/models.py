@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from rodocheck_backend.compressed_json import CompressedJSONField
 from vehicles.models import Vehicle
 
+from .ids import uuid7
+from .pdf_storage import get_pdf_storage
+
 User = get_user_model()
 
 
@@ -27,7 +31,15 @@ class CompletedChecklist(models.Model):
         ('rejected', 'Rejeitado'),
     ]
 
-    id = models.CharField(max_length=100, primary_key=True)  # Custom ID
+    PDF_STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('processing', 'Processando'),
+        ('completed', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)  # Time-ordered, see checklists.ids
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)  # Id generated by the client
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='checklists')
     template = models.ForeignKey(ChecklistTemplate, on_delete=models.CASCADE, null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_checklists')
@@ -35,29 +47,54 @@ class CompletedChecklist(models.Model):
     final_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     general_observations = models.TextField(blank=True)
     
-    # Checklist data
-    questions = models.JSONField(default=list)
-    vehicle_images = models.JSONField(default=dict)
-    signatures = models.JSONField(default=dict)
+    # Checklist data, stored compressed (see rodocheck_backend.compressed_json)
+    questions = CompressedJSONField(default=list)
+    vehicle_images = CompressedJSONField(default=dict)
+    signatures = CompressedJSONField(default=dict)
     
     # File storage
-    pdf_file = models.FileField(upload_to='checklists/pdfs/', blank=True, null=True)
+    pdf_file = models.FileField(upload_to='checklists/pdfs/', storage=get_pdf_storage, blank=True, null=True)
     is_pdf_generated = models.BooleanField(default=False)
     download_count = models.PositiveIntegerField(default=0)
+
+    # Background PDF rendering
+    pdf_status = models.CharField(max_length=20, choices=PDF_STATUS_CHOICES, default='pending')
+    pdf_error = models.TextField(blank=True)
+    pdf_attempts = models.PositiveIntegerField(default=0)
+    pdf_status_changed_at = models.DateTimeField(null=True, blank=True)
+    pdf_fingerprint = models.CharField(max_length=64, blank=True)  # Hash of the render inputs
+
+    # Offline sync: client-generated key so retried uploads are not duplicated
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True)
     
     # Metadata
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination of a user's history (see CreatedAtCursorPagination)
+            models.Index(fields=['created_by', '-created_at', '-id'], name='checklist_user_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['created_by', 'idempotency_key'], name='unique_checklist_idempotency_key'
+            ),
+        ]
 
     def __str__(self):
-        return f"Checklist {self.id} - {self.vehicle}"
+        return f"Checklist {self.reference} - {self.vehicle}"
+
+    @property
+    def reference(self):
+        """Id shown to people: the client's id when there is one."""
+        return self.external_id or str(self.id)
 
 
 class ChecklistItem(models.Model):
-    """Individual checklist item."""
+    """Individual checklist item (one answer of ``CompletedChecklist.questions``)."""
     checklist = models.ForeignKey(CompletedChecklist, on_delete=models.CASCADE, related_name='checklist_items')
+    key = models.CharField(max_length=100, blank=True)  # Question id in the template/JSON
     text = models.CharField(max_length=500)
     status = models.CharField(max_length=20, choices=[
         ('approved', 'Aprovado'),
@@ -70,6 +107,126 @@ class ChecklistItem(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Item-level reports: "rejected items" joined back to their checklist
+            models.Index(fields=['status', 'checklist'], name='checklist_item_status_idx'),
+            models.Index(fields=['key', 'status'], name='checklist_item_key_idx'),
+            models.Index(fields=['text'], name='checklist_item_text_idx'),
+        ]
 
     def __str__(self):
         return f"{self.checklist.id} - {self.text[:50]}"
+
+
+
+class ChecklistSearchDocument(models.Model):
+    """
+    Searchable text of a checklist (observations and answered items).
+
+    The text index itself lives outside the ORM: a generated ``tsvector``
+    column with a GIN index on PostgreSQL, an FTS5 table kept in sync by
+    triggers on SQLite (see migration 0008 and ``checklists.search``).
+    """
+    checklist = models.OneToOneField(CompletedChecklist, on_delete=models.CASCADE, related_name='search_document')
+    # Copy of checklist.created_by, so a search is filtered inside the text index
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    document = models.TextField()
+
+    def __str__(self):
+        return f"Search document {self.checklist_id}"
+
+
+class ChecklistDownloadStat(models.Model):
+    """Per-day download counter for a checklist PDF."""
+    checklist = models.ForeignKey(CompletedChecklist, on_delete=models.CASCADE, related_name='download_stats')
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['checklist', 'date'], name='unique_checklist_download_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.checklist_id} - {self.date}: {self.count}"
+
+
+class ChecklistDailyStat(models.Model):
+    """
+    Checklist counts of one inspector on one day, kept up to date as
+    checklists are created, edited and deleted (see ``checklists.rollups``).
+
+    Counters are signed: a checklist deleted before the rollups were first
+    built takes its row below zero until ``rebuild_checklist_rollups`` runs.
+    """
+    date = models.DateField()
+    inspector = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    checklists = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    rejected_items = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ChecklistDailyInspectorStat(ChecklistDailyStat):
+    """Daily checklist counts per inspector."""
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inspector', 'date'], name='unique_rollup_inspector_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.inspector_id} - {self.date}: {self.checklists}"
+
+
+class ChecklistDailyVehicleStat(ChecklistDailyStat):
+    """Daily checklist counts per inspector and vehicle."""
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inspector', 'date', 'vehicle'], name='unique_rollup_vehicle_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id} - {self.date}: {self.checklists}"
+
+
+class ChecklistDailyTemplateStat(ChecklistDailyStat):
+    """Daily checklist counts per inspector and template (null: no template)."""
+    template = models.ForeignKey(ChecklistTemplate, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inspector', 'date', 'template'], name='unique_rollup_template_day'),
+            # NULLs never collide in a unique index
+            models.UniqueConstraint(
+                fields=['inspector', 'date'], condition=models.Q(template__isnull=True),
+                name='unique_rollup_no_template_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.template_id} - {self.date}: {self.checklists}"
+
+
+class ChecklistDailyItemStat(models.Model):
+    """Daily count of rejected answers per inspector and checklist item."""
+    date = models.DateField()
+    inspector = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=100, blank=True)
+    text = models.CharField(max_length=500)
+    rejected = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inspector', 'date', 'key', 'text'], name='unique_rollup_item_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.key or self.text} - {self.date}: {self.rejected}"
@@ -10,64 +10,47 @@ from django.http import HttpResponse
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, KeepTogether
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 import base64
+import threading
+
+from .pdf_styles import get_stylesheet, INFO_TABLE_STYLE, QUESTIONS_TABLE_STYLE
+from .pdf_images import PHOTO_VARIANT, SIGNATURE_VARIANT, image_source, prepare_images
+
+# Bump whenever the layout changes so stored PDFs are re-rendered
+PDF_LAYOUT_VERSION = 2
+
+# Printable width between the document margins (A4 minus 2 * 72pt)
+CONTENT_WIDTH = A4[0] - 2 * 72
+PHOTO_MAX_HEIGHT = 3.5 * inch
+SIGNATURE_MAX_WIDTH = 3 * inch
+SIGNATURE_MAX_HEIGHT = 1.2 * inch
 
 
 class ChecklistPDFGenerator:
-    """Generate PDF for completed checklists."""
-    
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_styles()
+    """Generate PDF for completed checklists.
+
+    Instances hold no per-render state, so a single generator (see
+    ``get_pdf_generator``) can be reused for every checklist.
+    """
     
-    def setup_styles(self):
-        """Setup custom styles for the PDF."""
-        # Title style
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        ))
-        
-        # Header style
-        self.styles.add(ParagraphStyle(
-            name='CustomHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.darkblue
-        ))
-        
-        # Subheader style
-        self.styles.add(ParagraphStyle(
-            name='CustomSubheader',
-            parent=self.styles['Heading3'],
-            fontSize=12,
-            spaceAfter=8,
-            textColor=colors.darkgreen
-        ))
-        
-        # Normal text style
-        self.styles.add(ParagraphStyle(
-            name='CustomNormal',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        ))
+    def __init__(self, styles=None):
+        self.styles = styles if styles is not None else get_stylesheet()
     
     def generate_pdf(self, checklist):
-        """Generate PDF for a checklist."""
+        """Generate PDF for a checklist and return its bytes."""
         buffer = io.BytesIO()
+        self.write_pdf(checklist, buffer)
+        return buffer.getvalue()
+    
+    def write_pdf(self, checklist, output):
+        """Render a checklist PDF into ``output`` (a path or binary file object)."""
         doc = SimpleDocTemplate(
-            buffer,
+            output,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
@@ -75,6 +58,9 @@ class ChecklistPDFGenerator:
             bottomMargin=18
         )
         
+        # Fetch photos and signatures in parallel before laying out the story
+        images = self._prepare_images(checklist)
+        
         # Build PDF content
         story = []
         
@@ -96,11 +82,11 @@ class ChecklistPDFGenerator:
         story.append(Spacer(1, 20))
         
         # Images
-        story.extend(self._add_images_section(checklist))
+        story.extend(self._add_images_section(checklist, images))
         story.append(Spacer(1, 20))
         
         # Signatures
-        story.extend(self._add_signatures_section(checklist))
+        story.extend(self._add_signatures_section(checklist, images))
         story.append(Spacer(1, 20))
         
         # General observations
@@ -109,12 +95,6 @@ class ChecklistPDFGenerator:
         
         # Build PDF
         doc.build(story)
-        
-        # Get PDF content
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_content
     
     def _add_checklist_info(self, checklist):
         """Add checklist basic information."""
@@ -126,7 +106,7 @@ class ChecklistPDFGenerator:
         
         # Info table
         info_data = [
-            ['ID do Checklist:', checklist.id],
+            ['ID do Checklist:', checklist.reference],
             ['Data de Criação:', checklist.created_at.strftime('%d/%m/%Y %H:%M')],
             ['Criado por:', f"{checklist.created_by.first_name} {checklist.created_by.last_name}"],
             ['Status:', checklist.get_final_status_display()],
@@ -136,16 +116,7 @@ class ChecklistPDFGenerator:
             info_data.append(['Template:', checklist.template.name])
         
         info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        info_table.setStyle(INFO_TABLE_STYLE)
         
         story.append(info_table)
         return story
@@ -168,16 +139,7 @@ class ChecklistPDFGenerator:
         ]
         
         vehicle_table = Table(vehicle_data, colWidths=[2*inch, 4*inch])
-        vehicle_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        vehicle_table.setStyle(INFO_TABLE_STYLE)
         
         story.append(vehicle_table)
         return story
@@ -214,24 +176,35 @@ class ChecklistPDFGenerator:
             ])
         
         questions_table = Table(questions_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-        questions_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        questions_table.setStyle(QUESTIONS_TABLE_STYLE)
         
         story.append(questions_table)
         return story
     
-    def _add_images_section(self, checklist):
+    def _prepare_images(self, checklist):
+        """Fetch, downscale and cache every photo and signature of the checklist."""
+        wanted = {}
+        for image_type, image_data in (checklist.vehicle_images or {}).items():
+            source = image_source(image_data)
+            if source:
+                wanted[('photo', image_type)] = (source, PHOTO_VARIANT)
+        for signature_type, signature_data in (checklist.signatures or {}).items():
+            source = image_source(signature_data)
+            if source:
+                wanted[('signature', signature_type)] = (source, SIGNATURE_VARIANT)
+        return prepare_images(wanted)
+    
+    def _image_flowable(self, prepared, max_width, max_height):
+        """Scale a prepared image to fit the given box, keeping its aspect ratio."""
+        scale = min(max_width / prepared.width, max_height / prepared.height)
+        image = Image(io.BytesIO(prepared.data), width=prepared.width * scale, height=prepared.height * scale)
+        image.hAlign = 'LEFT'
+        return image
+    
+    def _add_images_section(self, checklist, images=None):
         """Add images section."""
         story = []
+        images = images if images is not None else self._prepare_images(checklist)
         
         header = Paragraph("IMAGENS DO VEÍCULO", self.styles['CustomHeader'])
         story.append(header)
@@ -241,18 +214,24 @@ class ChecklistPDFGenerator:
             return story
         
         for image_type, image_data in checklist.vehicle_images.items():
-            if image_data and image_data.get('url'):
-                try:
-                    # Add image placeholder (in real implementation, you'd process the image)
-                    story.append(Paragraph(f"<b>{image_type.title()}:</b> Imagem anexada", self.styles['CustomNormal']))
-                except Exception as e:
-                    story.append(Paragraph(f"<b>{image_type.title()}:</b> Erro ao processar imagem", self.styles['CustomNormal']))
+            if not image_source(image_data):
+                continue
+            prepared = images.get(('photo', image_type))
+            if prepared is None:
+                story.append(Paragraph(f"<b>{image_type.title()}:</b> Erro ao processar imagem", self.styles['CustomNormal']))
+                continue
+            story.append(KeepTogether([
+                Paragraph(f"<b>{image_type.title()}:</b>", self.styles['CustomNormal']),
+                self._image_flowable(prepared, CONTENT_WIDTH, PHOTO_MAX_HEIGHT),
+                Spacer(1, 10),
+            ]))
         
         return story
     
-    def _add_signatures_section(self, checklist):
+    def _add_signatures_section(self, checklist, images=None):
         """Add signatures section."""
         story = []
+        images = images if images is not None else self._prepare_images(checklist)
         
         header = Paragraph("ASSINATURAS", self.styles['CustomHeader'])
         story.append(header)
@@ -262,8 +241,17 @@ class ChecklistPDFGenerator:
             return story
         
         for signature_type, signature_data in checklist.signatures.items():
-            if signature_data:
+            if not signature_data:
+                continue
+            prepared = images.get(('signature', signature_type))
+            if prepared is None:
                 story.append(Paragraph(f"<b>{signature_type.title()}:</b> Assinatura registrada", self.styles['CustomNormal']))
+                continue
+            story.append(KeepTogether([
+                Paragraph(f"<b>{signature_type.title()}:</b>", self.styles['CustomNormal']),
+                self._image_flowable(prepared, SIGNATURE_MAX_WIDTH, SIGNATURE_MAX_HEIGHT),
+                Spacer(1, 10),
+            ]))
         
         return story
     
@@ -280,13 +268,26 @@ class ChecklistPDFGenerator:
         return story
 
 
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_pdf_generator():
+    """Return the shared generator instance for this process."""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = ChecklistPDFGenerator()
+        return _generator
+
+
 def generate_checklist_pdf_response(checklist):
     """Generate PDF response for download."""
-    generator = ChecklistPDFGenerator()
+    generator = get_pdf_generator()
     pdf_content = generator.generate_pdf(checklist)
     
     response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="checklist_{checklist.id}.pdf"'
+    response['Content-Disposition'] = f'attachment; filename="checklist_{checklist.reference}.pdf"'
     
     return response
 
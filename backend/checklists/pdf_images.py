@@ -0,0 +1,308 @@
+"""
+Image pipeline for checklist PDFs.
+
+Vehicle photos and signatures are fetched in parallel on a bounded,
+process-wide pool, downscaled with Pillow to print resolution and cached on
+local disk. Cache entries are keyed by a hash of the source (blob reference,
+URL or inline ``data:`` payload) plus the requested variant, so regenerating
+a PDF reuses the processed file instead of fetching and resampling it again.
+The cache is bounded in bytes and evicts least recently used entries.
+"""
+
+import base64
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from PIL import Image as PILImage
+
+from blobs.images import DiskImageCache, ImageFetchError, ImageVariant, downscale_image
+from blobs.store import BlobError, open_blob, parse_blob_ref
+
+logger = logging.getLogger('rodocheck')
+
+# 6in wide at 150 dpi for photos; signatures are line art and stay PNG
+PHOTO_VARIANT = ImageVariant('photo', max_px=900, format='JPEG', quality=80)
+SIGNATURE_VARIANT = ImageVariant('signature', max_px=450, format='PNG')
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """
+    A processed image ready to be placed in the PDF. It carries the bytes,
+    not a cache path: eviction may remove the file while a render still
+    needs it.
+    """
+    data: bytes
+    width: int
+    height: int
+
+
+def image_source(value):
+    """Extract the image reference from a ``vehicle_images``/``signatures`` value."""
+    if isinstance(value, str):
+        return value or None
+    if isinstance(value, dict):
+        return value.get('url') or value.get('data') or None
+    return None
+
+
+def _read_limited(chunks, max_bytes):
+    buffer = io.BytesIO()
+    for chunk in chunks:
+        buffer.write(chunk)
+        if buffer.tell() > max_bytes:
+            raise ImageFetchError('Imagem excede o tamanho máximo permitido')
+    return buffer.getvalue()
+
+
+def fetch_image_bytes(source):
+    """Return the raw bytes of an image given as blob reference, data URL, media path or http(s) URL."""
+    max_bytes = settings.PDF_IMAGE_MAX_SOURCE_BYTES
+
+    sha256 = parse_blob_ref(source)
+    if sha256 is not None:
+        try:
+            with open_blob(sha256) as f:
+                return _read_limited(iter(lambda: f.read(64 * 1024), b''), max_bytes)
+        except BlobError as e:
+            raise ImageFetchError(str(e))
+
+    if source.startswith('data:'):
+        header, _, payload = source.partition(',')
+        if ';base64' not in header:
+            raise ImageFetchError('Data URL sem codificação base64')
+        if len(payload) * 3 // 4 > max_bytes:
+            raise ImageFetchError('Imagem excede o tamanho máximo permitido')
+        try:
+            return base64.b64decode(payload)
+        except ValueError as e:
+            raise ImageFetchError(f'Base64 inválido: {e}')
+
+    parsed = urlparse(source)
+    if not parsed.scheme and not parsed.netloc:
+        return _read_media_file(parsed.path)
+
+    if parsed.scheme not in ('http', 'https'):
+        raise ImageFetchError(f'Esquema de URL não suportado: {parsed.scheme}')
+    _check_remote_host(parsed)
+
+    try:
+        with _public_session() as session, session.get(
+            source,
+            stream=True,
+            timeout=(settings.PDF_IMAGE_CONNECT_TIMEOUT, settings.PDF_IMAGE_READ_TIMEOUT),
+            # A redirect could point anywhere, past the host checks
+            allow_redirects=False,
+        ) as response:
+            if response.is_redirect:
+                raise ImageFetchError(f'Redirecionamento não permitido: {response.status_code}')
+            response.raise_for_status()
+            return _read_limited(response.iter_content(64 * 1024), max_bytes)
+    except requests.RequestException as e:
+        raise ImageFetchError(f'Erro ao baixar imagem: {e}')
+
+
+def _host_allowed(host):
+    # Same syntax as ALLOWED_HOSTS: a leading dot also matches subdomains
+    for pattern in settings.PDF_IMAGE_ALLOWED_HOSTS:
+        pattern = pattern.lower()
+        if host == pattern or (pattern.startswith('.') and (host.endswith(pattern) or host == pattern[1:])):
+            return True
+    return False
+
+
+def _check_remote_host(parsed):
+    """
+    Refuse hosts outside ``PDF_IMAGE_ALLOWED_HOSTS`` and any that resolve to
+    a private, loopback, link-local or otherwise non-public address, so a
+    checklist can't make the server fetch from its own network.
+    """
+    host = (parsed.hostname or '').lower()
+    if not host or not _host_allowed(host):
+        raise ImageFetchError(f'Host de imagem não permitido: {host}')
+    try:
+        addresses = socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError) as e:
+        raise ImageFetchError(f'Host de imagem não resolvido: {e}')
+    for *_info, sockaddr in addresses:
+        if not _is_public_address(sockaddr[0]):
+            raise ImageFetchError(f'Host de imagem não permitido: {host} ({sockaddr[0]})')
+
+
+def _is_public_address(address):
+    address = ipaddress.ip_address(address.split('%')[0])
+    return address.is_global and not address.is_multicast
+
+
+class _PublicPeerMixin:
+    """
+    Check the address actually connected to, before a byte is sent: the
+    name may resolve differently than when ``_check_remote_host`` looked
+    it up (DNS rebinding).
+    """
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        peer = sock.getpeername()[0]
+        if not _is_public_address(peer):
+            sock.close()
+            raise ImageFetchError(f'Host de imagem não permitido: {self.host} ({peer})')
+        return sock
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = type('PublicHTTPConnection', (_PublicPeerMixin, HTTPConnection), {})
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = type('PublicHTTPSConnection', (_PublicPeerMixin, HTTPSConnection), {})
+
+
+class _PublicAddressAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PublicHTTPConnectionPool,
+            'https': _PublicHTTPSConnectionPool,
+        }
+
+
+def _public_session():
+    """A session that only talks to public addresses, directly (no proxies)."""
+    session = requests.Session()
+    session.trust_env = False
+    adapter = _PublicAddressAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _read_media_file(url_path):
+    """
+    Read a file referenced by a ``MEDIA_URL`` path. Only the directories in
+    ``PDF_IMAGE_MEDIA_PREFIXES`` are readable, never the rest of ``MEDIA_ROOT``.
+    """
+    media_url = settings.MEDIA_URL
+    relative = url_path[len(media_url):] if url_path.startswith(media_url) else url_path.lstrip('/')
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(os.path.join(media_root, relative))
+    allowed = [os.path.join(media_root, prefix.strip('/')) + os.sep for prefix in settings.PDF_IMAGE_MEDIA_PREFIXES]
+    if not any(path.startswith(prefix) for prefix in allowed):
+        raise ImageFetchError('Caminho de imagem inválido')
+    try:
+        if os.path.getsize(path) > settings.PDF_IMAGE_MAX_SOURCE_BYTES:
+            raise ImageFetchError('Imagem excede o tamanho máximo permitido')
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        raise ImageFetchError(f'Erro ao ler imagem: {e}')
+
+
+_HASH_SLICE = 256 * 1024
+
+
+def _cache_key(source, variant):
+    digest = hashlib.sha256()
+    digest.update(f'{variant.name}:{variant.max_px}:{variant.format}:{variant.quality}:'.encode())
+    # Inline data URLs can be several MB; hash them in slices instead of
+    # encoding a full copy per image on every render
+    for start in range(0, len(source), _HASH_SLICE):
+        digest.update(source[start:start + _HASH_SLICE].encode('utf-8'))
+    return digest.hexdigest()
+
+
+_cache = None
+_executor = None
+_singletons_lock = threading.Lock()
+
+
+def get_image_cache():
+    global _cache
+    with _singletons_lock:
+        if _cache is None:
+            _cache = DiskImageCache(settings.PDF_IMAGE_CACHE_DIR, settings.PDF_IMAGE_CACHE_MAX_BYTES)
+        return _cache
+
+
+def _get_executor():
+    global _executor
+    with _singletons_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PDF_IMAGE_FETCH_WORKERS,
+                thread_name_prefix='pdf-image',
+            )
+        return _executor
+
+
+def _read_cached(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    with PILImage.open(io.BytesIO(data)) as image:
+        return PreparedImage(data, image.width, image.height)
+
+
+def prepare_image(source, variant):
+    """Return a cached, print-sized ``PreparedImage`` for ``source``."""
+    cache = get_image_cache()
+    key = _cache_key(source, variant)
+
+    path = cache.get(key, variant.extension)
+    if path is not None:
+        try:
+            return _read_cached(path)
+        except OSError:
+            pass  # evicted in between or corrupted: rebuild it below
+
+    data, width, height = downscale_image(fetch_image_bytes(source), variant)
+    cache.put(key, variant.extension, data)
+    return PreparedImage(data, width, height)
+
+
+def prepare_images(requests_by_key):
+    """
+    Prepare several images in parallel.
+
+    ``requests_by_key`` maps an arbitrary key to ``(source, variant)``.
+    Returns a dict with the same keys and ``PreparedImage`` values, or None
+    for images that failed or didn't finish within ``PDF_IMAGE_TOTAL_TIMEOUT``.
+    """
+    if not requests_by_key:
+        return {}
+
+    executor = _get_executor()
+    futures = {
+        key: executor.submit(prepare_image, source, variant)
+        for key, (source, variant) in requests_by_key.items()
+    }
+    wait(futures.values(), timeout=settings.PDF_IMAGE_TOTAL_TIMEOUT)
+
+    results = {}
+    for key, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"Timeout preparing PDF image {key}")
+            results[key] = None
+            continue
+        try:
+            results[key] = future.result()
+        except ImageFetchError as e:
+            logger.warning(f"Could not prepare PDF image {key}: {e}")
+            results[key] = None
+        except Exception as e:
+            logger.error(f"Unexpected error preparing PDF image {key}: {e}")
+            results[key] = None
+    return results
@@ -0,0 +1,197 @@
+"""
+Content-addressed storage for checklist PDFs.
+
+A PDF is stored under a fingerprint of everything that goes into it: the
+checklist fields, the vehicle, the template, the creator's name and the
+layout version. A checklist whose fingerprint matches the stored one is
+never re-rendered; one whose inputs changed gets a new file, and older
+versions are deleted once the new one is in place.
+
+The files live under ``PDF_STORAGE_ROOT``, outside ``MEDIA_ROOT``: the web
+server must never serve them by path, only through the signed or
+authenticated download views (which may hand the transfer back to it with
+X-Accel-Redirect).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.utils.text import get_valid_filename
+
+from .pdf_generator import PDF_LAYOUT_VERSION
+
+logger = logging.getLogger('rodocheck')
+
+PDF_ROOT = 'checklists/pdfs'
+
+
+@deconstructible
+class PDFStorage(FileSystemStorage):
+    """File storage rooted at ``PDF_STORAGE_ROOT``, with no public URL."""
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PDF_STORAGE_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'PDF_STORAGE_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+    def url(self, name):
+        raise NotImplementedError('Checklist PDFs have no public URL; use a signed download link')
+
+
+pdf_storage = PDFStorage()
+
+
+def get_pdf_storage():
+    return pdf_storage
+
+
+def fingerprint_inputs(checklist):
+    """Everything that affects the rendered PDF, as JSON-serializable data."""
+    vehicle = checklist.vehicle
+    creator = checklist.created_by
+    return {
+        'layout': PDF_LAYOUT_VERSION,
+        'id': str(checklist.id),
+        'reference': checklist.reference,
+        'created_at': checklist.created_at.isoformat() if checklist.created_at else None,
+        'final_status': checklist.final_status,
+        'general_observations': checklist.general_observations,
+        'questions': checklist.questions,
+        'vehicle_images': checklist.vehicle_images,
+        'signatures': checklist.signatures,
+        'vehicle': [
+            vehicle.plate, vehicle.model, vehicle.brand, vehicle.year,
+            vehicle.vehicle_type, vehicle.color,
+        ],
+        'template': checklist.template.name if checklist.template_id else None,
+        'created_by': [creator.first_name, creator.last_name],
+    }
+
+
+def compute_pdf_fingerprint(checklist):
+    """SHA-256 of the canonical JSON encoding of the render inputs."""
+    payload = json.dumps(
+        fingerprint_inputs(checklist),
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def checklist_pdf_dir(checklist_id):
+    return posixpath.join(PDF_ROOT, get_valid_filename(str(checklist_id)))
+
+
+def pdf_storage_name(checklist_id, fingerprint):
+    return posixpath.join(checklist_pdf_dir(checklist_id), f'{fingerprint[:32]}.pdf')
+
+
+def is_pdf_current(checklist, fingerprint=None):
+    """True when the stored PDF was rendered from the checklist's current inputs."""
+    if not checklist.is_pdf_generated or not checklist.pdf_file or not checklist.pdf_fingerprint:
+        return False
+    if fingerprint is None:
+        fingerprint = compute_pdf_fingerprint(checklist)
+    return checklist.pdf_fingerprint == fingerprint
+
+
+def _local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def write_pdf_atomically(storage, name, write):
+    """
+    Store the PDF produced by ``write(fileobj)`` under ``name``.
+
+    The PDF is rendered straight into a file instead of an in-memory
+    buffer. On local storage that file is a temporary one in the target
+    directory, renamed into place once complete, so a crash leaves either
+    nothing or the whole PDF (a half-written file would otherwise be reused
+    forever, since renders skip names that already exist). Remote storages
+    get the finished temporary file streamed in a single upload.
+    Returns the stored name.
+    """
+    path = _local_path(storage, name)
+    if path is None:
+        with tempfile.TemporaryFile(suffix='.pdf') as tmp:
+            write(tmp)
+            tmp.seek(0)
+            return storage.save(name, File(tmp, name=posixpath.basename(name)))
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            write(tmp)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        mode = getattr(storage, 'file_permissions_mode', None)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return name
+
+
+def delete_stale_pdfs(checklist_id, keep_name, storage=None):
+    """Remove every stored PDF version of a checklist except ``keep_name``."""
+    storage = storage or pdf_storage
+    directory = checklist_pdf_dir(checklist_id)
+    try:
+        _dirs, files = storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return 0
+
+    removed = 0
+    for filename in files:
+        name = posixpath.join(directory, filename)
+        # .tmp files belong to renders still in flight; the GC command sweeps leftovers
+        if name == keep_name or filename.endswith('.tmp'):
+            continue
+        try:
+            storage.delete(name)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not delete stale PDF {name}: {e}")
+    return removed
+
+
+def iter_stored_pdfs(storage=None):
+    """Yield the storage name of every file under the PDF root."""
+    storage = storage or pdf_storage
+    try:
+        dirs, files = storage.listdir(PDF_ROOT)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        yield posixpath.join(PDF_ROOT, filename)
+    for directory in dirs:
+        subdir = posixpath.join(PDF_ROOT, directory)
+        _subdirs, subfiles = storage.listdir(subdir)
+        for filename in subfiles:
+            yield posixpath.join(subdir, filename)
@@ -0,0 +1,88 @@
+"""
+Daily checklist rollups for the dashboard and reports.
+
+Every checklist contributes to one row per table (inspector, vehicle and
+template, for the day it was created) and to one row per rejected item.
+Writes keep them current incrementally: a checklist's contribution is
+computed as a set of deltas, which are added on create, subtracted on delete
+and swapped (old out, new in) on update. Deltas are applied as relative
+``UPDATE ... SET n = n + delta`` statements, like the download counters, so
+concurrent writers never overwrite each other. The read side only touches
+the rollups, whose size depends on the number of days, vehicles and
+templates in the requested window, not on the number of checklists.
+
+``rebuild_checklist_rollups`` recomputes everything from the checklists, for
+the initial fill and after deletes that bypass the API (cascades from a
+deleted vehicle or template).
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .items import build_checklist_items
+from .models import (
+    ChecklistDailyInspectorStat,
+    ChecklistDailyItemStat,
+    ChecklistDailyTemplateStat,
+    ChecklistDailyVehicleStat,
+)
+
+STATUS_FIELDS = ('approved', 'rejected', 'pending')
+# Checklist fields whose change moves counts between rollup rows
+ROLLUP_FIELDS = frozenset({'final_status', 'questions', 'vehicle', 'template'})
+
+
+def checklist_rollup_deltas(checklist, sign=1):
+    """
+    Counter of ``(model, key, field) -> n`` contributed by ``checklist``;
+    ``key`` is a tuple of ``(column, value)`` pairs identifying the row.
+    """
+    base = (('inspector_id', checklist.created_by_id), ('date', timezone.localdate(checklist.created_at)))
+    status = checklist.final_status if checklist.final_status in STATUS_FIELDS else 'pending'
+    rejected = [item for item in build_checklist_items(checklist) if item.status == 'rejected']
+    counts = {'checklists': 1, status: 1, 'rejected_items': len(rejected)}
+
+    deltas = Counter()
+    for model, key in (
+        (ChecklistDailyInspectorStat, base),
+        (ChecklistDailyVehicleStat, base + (('vehicle_id', checklist.vehicle_id),)),
+        (ChecklistDailyTemplateStat, base + (('template_id', checklist.template_id),)),
+    ):
+        for field, count in counts.items():
+            if count:
+                deltas[(model, key, field)] += sign * count
+    for item in rejected:
+        deltas[(ChecklistDailyItemStat, base + (('key', item.key), ('text', item.text)), 'rejected')] += sign
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """Add ``deltas`` (see ``checklist_rollup_deltas``) to the rollup rows."""
+    rows = defaultdict(dict)
+    for (model, key, field), count in deltas.items():
+        if count:
+            rows[(model, key)][field] = count
+
+    with transaction.atomic():
+        for (model, key), counts in rows.items():
+            lookup = dict(key)
+            changes = {field: F(field) + count for field, count in counts.items()}
+            if model.objects.filter(**lookup).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    model.objects.create(**lookup, **counts)
+            except IntegrityError:
+                # Another writer created the row first
+                model.objects.filter(**lookup).update(**changes)
+
+
+def rollup_checklists(checklists):
+    """Add newly created checklists to the rollups."""
+    deltas = Counter()
+    for checklist in checklists:
+        deltas.update(checklist_rollup_deltas(checklist))
+    apply_rollup_deltas(deltas)
@@ -0,0 +1,155 @@
+"""
+Full-text search over checklist observations and answered items.
+
+Each checklist has a ``ChecklistSearchDocument`` holding its searchable text,
+rewritten whenever the checklist's questions or observations change. The
+database indexes that text (PostgreSQL ``tsvector`` with the Portuguese
+configuration, SQLite FTS5; see migration 0008) and ranks the matches, so a
+search reads only the matching rows instead of every checklist's JSON.
+"""
+
+import re
+
+from django.db import connections
+
+from .models import ChecklistSearchDocument
+
+# Quoted phrases ("pneu careca") or single words
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w+')
+
+
+def checklist_document(checklist):
+    """Searchable text of a checklist: general observations plus item text and observations."""
+    parts = [checklist.general_observations or '']
+    for question in checklist.questions or []:
+        if isinstance(question, dict):
+            parts.append(str(question.get('text') or ''))
+            parts.append(str(question.get('observations') or ''))
+    return '\n'.join(part for part in parts if part)
+
+
+def index_checklists(checklists):
+    """Create or refresh the search documents of ``checklists`` in one query."""
+    documents = [
+        ChecklistSearchDocument(
+            checklist=checklist,
+            created_by_id=checklist.created_by_id,
+            document=checklist_document(checklist),
+        )
+        for checklist in checklists
+    ]
+    ChecklistSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['checklist'],
+        update_fields=['created_by', 'document'],
+    )
+
+
+def is_searchable(text):
+    """Whether ``text`` has at least one word to search for."""
+    return bool(text and _WORD_RE.search(text))
+
+
+def _fts5_query(user_id, text):
+    # Every term is quoted so user input can't use (or break) FTS5 syntax;
+    # space-separated terms must all match. The owner is an indexed column,
+    # so FTS5 intersects it with the terms instead of the caller filtering
+    # every match of a common word afterwards.
+    terms = []
+    for phrase, word in _TERM_RE.findall(text):
+        words = _WORD_RE.findall(phrase or word)
+        if words:
+            terms.append('"' + ' '.join(words) + '"')
+    return f'created_by_id : "{int(user_id)}" AND document : ({" ".join(terms)})'
+
+
+class ChecklistSearchResults:
+    """
+    Lazy, ranked search results in the shape Django's ``Paginator`` expects.
+
+    ``count()`` and each slice run one query against the text index; the
+    checklists of a page are then loaded from ``queryset`` by primary key
+    and carry their score in ``search_rank``.
+    """
+
+    def __init__(self, queryset, user, text):
+        self.queryset = queryset
+        self.user = user
+        self.text = text
+        self.connection = connections[queryset.db]
+
+    def _match(self):
+        """
+        FROM/WHERE clause, document id and score expressions, and params for
+        the current backend.
+        """
+        vendor = self.connection.vendor
+        if vendor == 'postgresql':
+            return (
+                "FROM checklists_checklistsearchdocument d, "
+                "websearch_to_tsquery('portuguese', %s) q "
+                "WHERE d.search_vector @@ q AND d.created_by_id = %s",
+                "d.id",
+                "ts_rank_cd(d.search_vector, q)",
+                [self.text, self.user.pk],
+            )
+        if vendor == 'sqlite':
+            return (
+                "FROM checklists_search_fts WHERE checklists_search_fts MATCH %s",
+                "rowid",
+                # bm25() is lower for better matches; the owner column doesn't count
+                "-bm25(checklists_search_fts, 1.0, 0.0)",
+                [_fts5_query(self.user.pk, self.text)],
+            )
+        # Other databases: unranked substring match (no text index)
+        return (
+            "FROM checklists_checklistsearchdocument d "
+            "WHERE d.document LIKE %s AND d.created_by_id = %s",
+            "d.id",
+            "0",
+            [f'%{self.text}%', self.user.pk],
+        )
+
+    def count(self):
+        clause, _id, _score, params = self._match()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) {clause}", params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        limit = max(stop - start, 0)
+
+        # Rank and cut the page inside the index, then map only that page's
+        # documents to checklist ids. Ties go to the most recently indexed.
+        clause, doc_id, score, params = self._match()
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT d.checklist_id, m.rank FROM ("
+                f"SELECT {doc_id} AS doc_id, {score} AS rank {clause} "
+                "ORDER BY rank DESC, doc_id DESC LIMIT %s OFFSET %s"
+                ") m JOIN checklists_checklistsearchdocument d ON d.id = m.doc_id "
+                "ORDER BY m.rank DESC, m.doc_id DESC",
+                params + [limit, start],
+            )
+            ranked = cursor.fetchall()
+
+        # Raw rows hold the database representation of the UUID key
+        to_python = self.queryset.model._meta.pk.to_python
+        ranked = [(to_python(checklist_id), rank) for checklist_id, rank in ranked]
+        checklists = self.queryset.in_bulk([checklist_id for checklist_id, _rank in ranked])
+        results = []
+        for checklist_id, rank in ranked:
+            checklist = checklists.get(checklist_id)
+            if checklist is not None:
+                checklist.search_rank = float(rank)
+                results.append(checklist)
+        return results
@@ -1,15 +1,25 @@
+from django.db import transaction
 from rest_framework import serializers
+from .items import build_checklist_items, replace_checklist_items
 from .models import ChecklistTemplate, CompletedChecklist, ChecklistItem
+from .rollups import ROLLUP_FIELDS, apply_rollup_deltas, checklist_rollup_deltas, rollup_checklists
+from .search import index_checklists
+from blobs.fields import BlobDerivativesField, BlobJSONField
 from vehicles.serializers import VehicleSerializer
 from authentication.serializers import UserSerializer
+from rodocheck_backend.sparse_fields import SparseFieldsetsMixin
+
+# JSON/text columns that make up most of a row; not fetched unless requested
+CHECKLIST_HEAVY_FIELDS = ['questions', 'vehicle_images', 'signatures', 'general_observations']
 
 
 class ChecklistItemSerializer(serializers.ModelSerializer):
     """Serializer for checklist items."""
+    photo_variants = BlobDerivativesField(source='photo')
     
     class Meta:
         model = ChecklistItem
-        fields = ['text', 'status', 'observations', 'photo', 'order']
+        fields = ['key', 'text', 'status', 'observations', 'photo', 'photo_variants', 'order']
 
 
 class ChecklistTemplateSerializer(serializers.ModelSerializer):
@@ -25,34 +35,137 @@ class ChecklistTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CompletedChecklistSerializer(serializers.ModelSerializer):
+class CompletedChecklistSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for completed checklists."""
     vehicle = VehicleSerializer(read_only=True)
     created_by = UserSerializer(read_only=True)
     checklist_items = ChecklistItemSerializer(many=True, read_only=True)
+    vehicle_images = BlobJSONField(required=False)
+    vehicle_image_variants = BlobDerivativesField(source='vehicle_images')
+    signatures = BlobJSONField(required=False)
     
     class Meta:
         model = CompletedChecklist
         fields = [
-            'id', 'vehicle', 'template', 'created_by', 'created_at',
+            'id', 'external_id', 'vehicle', 'template', 'created_by', 'created_at',
             'final_status', 'general_observations', 'questions',
-            'vehicle_images', 'signatures', 'pdf_file', 'is_pdf_generated',
+            'vehicle_images', 'vehicle_image_variants', 'signatures', 'is_pdf_generated',
             'download_count', 'checklist_items', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'external_id', 'created_at', 'updated_at']
+        heavy_fields = CHECKLIST_HEAVY_FIELDS
+
+    def update(self, instance, validated_data):
+        counted = ROLLUP_FIELDS.intersection(validated_data)
+        with transaction.atomic():
+            if counted:
+                deltas = checklist_rollup_deltas(instance, sign=-1)
+            instance = super().update(instance, validated_data)
+            if counted:
+                deltas.update(checklist_rollup_deltas(instance))
+                apply_rollup_deltas(deltas)
+            if 'questions' in validated_data:
+                replace_checklist_items(instance)
+            if 'questions' in validated_data or 'general_observations' in validated_data:
+                index_checklists([instance])
+        return instance
+
+
+class CompletedChecklistSummarySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Compact serializer for checklist listings.
+
+    Related objects are returned as ids (``?expand=vehicle,created_by`` nests
+    them) and the checklist payload is left out unless asked for with
+    ``?fields=``.
+    """
+    vehicle_plate = serializers.CharField(source='vehicle.plate', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    vehicle_images = BlobJSONField(read_only=True)
+    vehicle_image_variants = BlobDerivativesField(source='vehicle_images')
+    signatures = BlobJSONField(read_only=True)
+    
+    class Meta:
+        model = CompletedChecklist
+        fields = [
+            'id', 'external_id', 'vehicle', 'vehicle_plate', 'template', 'created_by',
+            'created_by_name', 'created_at', 'final_status',
+            'general_observations', 'questions', 'vehicle_images', 'vehicle_image_variants',
+            'signatures', 'pdf_status', 'is_pdf_generated', 'download_count',
+            'updated_at'
+        ]
+        read_only_fields = fields
+        default_fields = [
+            'id', 'external_id', 'vehicle', 'vehicle_plate', 'template', 'created_by',
+            'created_by_name', 'created_at', 'final_status', 'pdf_status',
+            'is_pdf_generated', 'download_count', 'updated_at'
+        ]
+        expandable_fields = {
+            'vehicle': VehicleSerializer,
+            'created_by': UserSerializer,
+        }
+        heavy_fields = CHECKLIST_HEAVY_FIELDS
+
+
+class ChecklistSearchResultSerializer(CompletedChecklistSummarySerializer):
+    """Summary of a full-text search hit, with its relevance score."""
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+
+    class Meta(CompletedChecklistSummarySerializer.Meta):
+        fields = CompletedChecklistSummarySerializer.Meta.fields + ['rank']
+        read_only_fields = fields
+        default_fields = CompletedChecklistSummarySerializer.Meta.default_fields + ['rank']
 
 
 class ChecklistCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new checklists."""
+    vehicle_images = BlobJSONField(required=False)
+    signatures = BlobJSONField(required=False)
     
     class Meta:
         model = CompletedChecklist
         fields = [
-            'id', 'vehicle', 'template', 'final_status',
+            'id', 'external_id', 'vehicle', 'template', 'final_status',
             'general_observations', 'questions', 'vehicle_images', 'signatures'
         ]
+        read_only_fields = ['id']
+
+    def to_internal_value(self, data):
+        # Clients used to send their own id as the primary key; it is now
+        # kept as external_id and the server assigns ``id``
+        if 'external_id' not in data and data.get('id'):
+            data = {**data, 'external_id': data['id']}
+        return super().to_internal_value(data)
 
     def create(self, validated_data):
         # Set the user from the request
         validated_data['created_by'] = self.context['request'].user
-        return super().create(validated_data)
+        with transaction.atomic():
+            checklist = super().create(validated_data)
+            ChecklistItem.objects.bulk_create(build_checklist_items(checklist))
+            index_checklists([checklist])
+            rollup_checklists([checklist])
+        return checklist
+
+
+class ChecklistSyncItemSerializer(serializers.Serializer):
+    """One checklist of an offline sync batch.
+
+    Relations are plain ids here and resolved for the whole batch at once,
+    instead of one lookup per field per checklist.
+    """
+    idempotency_key = serializers.CharField(max_length=100, required=False)
+    id = serializers.CharField(max_length=100)  # The client's id, stored as external_id
+    vehicle = serializers.IntegerField()
+    template = serializers.IntegerField(required=False, allow_null=True)
+    final_status = serializers.ChoiceField(
+        choices=CompletedChecklist.STATUS_CHOICES, required=False, default='pending'
+    )
+    general_observations = serializers.CharField(required=False, allow_blank=True, default='')
+    questions = serializers.ListField(required=False, default=list)
+    vehicle_images = BlobJSONField(required=False, default=dict)
+    signatures = BlobJSONField(required=False, default=dict)
+
+    def validate(self, attrs):
+        # Without an explicit key the client id identifies retries
+        attrs.setdefault('idempotency_key', attrs['id'])
+        return attrs
@@ -0,0 +1,71 @@
+"""
+Time-limited signed URLs for stored checklist PDFs.
+
+A signed URL carries the checklist id, the file name inside the checklist's
+PDF directory, an expiry timestamp and an HMAC-SHA256 of all three keyed on
+``SECRET_KEY``. Verifying it needs neither the database nor the user's
+session, so the serving view only checks the signature and hands the file
+to the web server (or streams it).
+"""
+
+import posixpath
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .pdf_storage import checklist_pdf_dir
+
+SIGNATURE_SALT = 'checklists.signed_pdf_url'
+
+
+def _signature(checklist_id, name, expires):
+    return salted_hmac(
+        SIGNATURE_SALT, f'{checklist_id}:{name}:{expires}', algorithm='sha256'
+    ).hexdigest()
+
+
+def signed_pdf_name(checklist_id, filename):
+    """Storage name addressed by a signed URL, or None if it is malformed."""
+    if not filename.endswith('.pdf') or filename != posixpath.basename(filename) or filename.startswith('.'):
+        return None
+    return posixpath.join(checklist_pdf_dir(checklist_id), filename)
+
+
+def sign_pdf_url(checklist_id, name, ttl=None, now=None):
+    """
+    Return ``(path, expires)`` granting access to the stored PDF ``name``.
+
+    Returns ``(None, None)`` for files outside the checklist's PDF directory
+    (PDFs stored before content-addressed names), which can't be signed.
+    """
+    directory, filename = posixpath.split(name)
+    if directory != checklist_pdf_dir(checklist_id) or signed_pdf_name(checklist_id, filename) is None:
+        return None, None
+
+    ttl = settings.PDF_SIGNED_URL_TTL if ttl is None else ttl
+    expires = int(now if now is not None else time.time()) + ttl
+    query = urlencode({'expires': expires, 'signature': _signature(checklist_id, name, expires)})
+    path = reverse('checklist-signed-file', kwargs={'checklist_id': checklist_id, 'filename': filename})
+    return f'{path}?{query}', expires
+
+
+def verify_pdf_signature(checklist_id, name, expires, signature, now=None):
+    """
+    Check a signed URL.
+
+    Returns None when valid, otherwise the reason: 'invalid' or 'expired'.
+    """
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return 'invalid'
+    if not signature or not name:
+        return 'invalid'
+    if not constant_time_compare(signature, _signature(checklist_id, name, expires)):
+        return 'invalid'
+    if expires < int(now if now is not None else time.time()):
+        return 'expired'
+    return None
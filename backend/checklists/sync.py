@@ -0,0 +1,141 @@
+"""
+Batch upload of checklists queued by offline clients.
+
+A batch is validated item by item, related rows are resolved with one query
+per table, and everything that is new is inserted with ``bulk_create`` in a
+single transaction. Each checklist carries an idempotency key (its client id
+when none is given); a key the user already uploaded is reported as a
+duplicate instead of being inserted again, so clients can simply resend the
+whole queue after a dropped connection.
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+
+from .items import build_checklist_items
+from .models import ChecklistItem, ChecklistTemplate, CompletedChecklist
+from .rollups import rollup_checklists
+from .search import index_checklists
+from .serializers import ChecklistSyncItemSerializer
+from .tasks import enqueue_checklist_pdfs
+from vehicles.models import Vehicle
+
+logger = logging.getLogger('rodocheck')
+
+
+def _result(index, key, status, checklist_id=None, errors=None):
+    result = {'index': index, 'idempotency_key': key, 'status': status, 'id': checklist_id}
+    if errors:
+        result['errors'] = errors
+    return result
+
+
+def sync_checklists(user, payload):
+    """
+    Create the checklists in ``payload`` for ``user``.
+
+    Returns one result per item, in order, with ``status`` set to
+    ``created``, ``duplicate`` (already uploaded; ``id`` is the stored one)
+    or ``error`` (with ``errors``).
+    """
+    results = [None] * len(payload)
+    valid = []
+    for index, data in enumerate(payload):
+        serializer = ChecklistSyncItemSerializer(data=data)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            key = (data.get('idempotency_key') or data.get('id')) if isinstance(data, dict) else None
+            results[index] = _result(index, key, 'error', errors=serializer.errors)
+
+    keys = {item['idempotency_key'] for _index, item in valid}
+    existing_keys = dict(
+        CompletedChecklist.objects.filter(created_by=user, idempotency_key__in=keys)
+        .values_list('idempotency_key', 'id')
+    )
+    # Items carry the client's id, stored as external_id
+    taken_ids = set(
+        CompletedChecklist.objects.filter(external_id__in=[item['id'] for _index, item in valid])
+        .values_list('external_id', flat=True)
+    )
+    vehicles = Vehicle.objects.in_bulk({item['vehicle'] for _index, item in valid})
+    templates = ChecklistTemplate.objects.in_bulk(
+        {item['template'] for _index, item in valid if item.get('template')}
+    )
+
+    pending = []
+    batch_keys = {}
+    batch_ids = set()
+    for index, item in valid:
+        key = item['idempotency_key']
+        if key in existing_keys:
+            results[index] = _result(index, key, 'duplicate', existing_keys[key])
+            continue
+        if key in batch_keys:
+            results[index] = _result(index, key, 'duplicate', batch_keys[key])
+            continue
+
+        errors = {}
+        if item['id'] in taken_ids or item['id'] in batch_ids:
+            errors['id'] = ['Já existe um checklist com este id.']
+        if item['vehicle'] not in vehicles:
+            errors['vehicle'] = ['Veículo não encontrado.']
+        if item.get('template') and item['template'] not in templates:
+            errors['template'] = ['Modelo de checklist não encontrado.']
+        if errors:
+            results[index] = _result(index, key, 'error', errors=errors)
+            continue
+
+        checklist = CompletedChecklist(
+            external_id=item['id'],
+            idempotency_key=key,
+            vehicle=vehicles[item['vehicle']],
+            template=templates.get(item.get('template')),
+            created_by=user,
+            final_status=item['final_status'],
+            general_observations=item['general_observations'],
+            questions=item['questions'],
+            vehicle_images=item['vehicle_images'],
+            signatures=item['signatures'],
+        )
+        batch_keys[key] = checklist.id
+        batch_ids.add(item['id'])
+        pending.append((index, checklist))
+
+    if pending:
+        try:
+            _insert([checklist for _index, checklist in pending])
+            for index, checklist in pending:
+                results[index] = _result(index, checklist.idempotency_key, 'created', checklist.id)
+        except IntegrityError:
+            # A concurrent retry of the same batch won the race; settle each item
+            for index, checklist in pending:
+                results[index] = _insert_one(user, index, checklist)
+    return results
+
+
+def _insert(checklists):
+    with transaction.atomic():
+        CompletedChecklist.objects.bulk_create(checklists)
+        ChecklistItem.objects.bulk_create(
+            [item for checklist in checklists for item in build_checklist_items(checklist)]
+        )
+        index_checklists(checklists)
+        rollup_checklists(checklists)
+        enqueue_checklist_pdfs([checklist.id for checklist in checklists])
+
+
+def _insert_one(user, index, checklist):
+    key = checklist.idempotency_key
+    try:
+        _insert([checklist])
+        return _result(index, key, 'created', checklist.id)
+    except IntegrityError:
+        stored = CompletedChecklist.objects.filter(
+            created_by=user, idempotency_key=key
+        ).values_list('id', flat=True).first()
+        if stored:
+            return _result(index, key, 'duplicate', stored)
+        logger.warning(f"Sync could not insert checklist {checklist.external_id}")
+        return _result(index, key, 'error', errors={'id': ['Já existe um checklist com este id.']})
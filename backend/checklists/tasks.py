@@ -0,0 +1,223 @@
+"""
+Background PDF rendering for checklists.
+
+The render state lives on the ``CompletedChecklist`` row itself (``pdf_status``),
+so the queue survives restarts without Redis. Jobs are dispatched according to
+``PDF_RENDER_BACKEND``:
+
+- ``celery``: hand the job to the Celery worker;
+- ``thread``: run it in an in-process worker pool;
+- ``sync``: render inline (used by the test suite).
+
+Jobs lost by a crashed process are picked up again by the
+``process_pdf_queue`` management command.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CompletedChecklist
+from .pdf_storage import (
+    compute_pdf_fingerprint, delete_stale_pdfs, is_pdf_current, pdf_storage_name,
+    write_pdf_atomically,
+)
+
+logger = logging.getLogger('rodocheck')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the process-wide render pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                thread_name_prefix='pdf-render',
+            )
+        return _executor
+
+
+def _claimable_filter():
+    """Rows that may be picked up by a worker."""
+    stale_before = timezone.now() - timedelta(seconds=settings.PDF_RENDER_STALE_AFTER)
+    return (
+        Q(pdf_status__in=['pending', 'failed'])
+        | Q(pdf_status='processing', pdf_status_changed_at__lt=stale_before)
+    )
+
+
+def render_checklist_pdf(checklist_id, force=False, reuse=True):
+    """
+    Render and store the PDF for a checklist.
+
+    The job is claimed with a conditional UPDATE so two workers never render
+    the same checklist at once. ``force`` also re-renders completed PDFs.
+    A file already stored for the same fingerprint is reused unless
+    ``reuse`` is False: layout changes don't change the fingerprint.
+    Returns True when a PDF was stored.
+    """
+    claimable = _claimable_filter()
+    if force:
+        claimable |= Q(pdf_status='completed')
+
+    claimed = CompletedChecklist.objects.filter(
+        claimable, id=checklist_id
+    ).update(
+        pdf_status='processing',
+        pdf_attempts=F('pdf_attempts') + 1,
+        pdf_status_changed_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+
+    checklist = CompletedChecklist.objects.select_related(
+        'vehicle', 'template', 'created_by'
+    ).get(id=checklist_id)
+    storage = checklist.pdf_file.storage
+
+    try:
+        fingerprint = compute_pdf_fingerprint(checklist)
+        pdf_name = pdf_storage_name(checklist.id, fingerprint)
+
+        # Same inputs as an existing file: reuse it instead of re-rendering
+        if not (reuse and storage.exists(pdf_name)):
+            from .pdf_generator import get_pdf_generator
+            generator = get_pdf_generator()
+            pdf_name = write_pdf_atomically(
+                storage, pdf_name, lambda output: generator.write_pdf(checklist, output)
+            )
+    except Exception as e:
+        logger.error(f"Error generating PDF for checklist {checklist_id}: {e}")
+        CompletedChecklist.objects.filter(id=checklist_id).update(
+            pdf_status='failed',
+            pdf_error=str(e),
+            pdf_status_changed_at=timezone.now(),
+        )
+        return False
+
+    # Only touch the PDF columns; a full save() would rewrite the JSON payload.
+    CompletedChecklist.objects.filter(id=checklist_id).update(
+        pdf_file=pdf_name,
+        pdf_fingerprint=fingerprint,
+        is_pdf_generated=True,
+        pdf_status='completed',
+        pdf_error='',
+        pdf_status_changed_at=timezone.now(),
+    )
+    delete_stale_pdfs(checklist_id, keep_name=pdf_name, storage=storage)
+    return True
+
+
+@shared_task(name='checklists.render_checklist_pdf')
+def render_checklist_pdf_task(checklist_id):
+    """Celery entry point for ``render_checklist_pdf``."""
+    return render_checklist_pdf(checklist_id)
+
+
+def _run_in_pool(checklist_id):
+    try:
+        render_checklist_pdf(checklist_id)
+    except Exception as e:
+        logger.error(f"PDF worker crashed for checklist {checklist_id}: {e}")
+    finally:
+        # Pool threads are long-lived; don't leak one connection per thread.
+        connection.close()
+
+
+def dispatch_pdf_render(checklist_id):
+    """Send a render job to the configured backend."""
+    backend = settings.PDF_RENDER_BACKEND
+    if backend == 'celery':
+        render_checklist_pdf_task.delay(str(checklist_id))
+    elif backend == 'sync':
+        render_checklist_pdf(checklist_id)
+    else:
+        _get_executor().submit(_run_in_pool, checklist_id)
+
+
+def enqueue_checklist_pdf(checklist_id, dispatch=True):
+    """
+    Mark a checklist's PDF as pending and schedule its rendering.
+
+    Dispatch is deferred until the surrounding transaction commits so the
+    worker never sees a row that doesn't exist yet. With ``dispatch=False``
+    the PDF is only marked stale and gets rendered on the next download.
+    """
+    CompletedChecklist.objects.filter(id=checklist_id).update(
+        is_pdf_generated=False,
+        pdf_status='pending',
+        pdf_error='',
+        pdf_status_changed_at=timezone.now(),
+    )
+    if dispatch:
+        transaction.on_commit(lambda: dispatch_pdf_render(checklist_id))
+
+
+def enqueue_checklist_pdfs(checklist_ids):
+    """Bulk version of ``enqueue_checklist_pdf``: one UPDATE for the whole batch."""
+    checklist_ids = list(checklist_ids)
+    CompletedChecklist.objects.filter(id__in=checklist_ids).update(
+        is_pdf_generated=False,
+        pdf_status='pending',
+        pdf_error='',
+        pdf_status_changed_at=timezone.now(),
+    )
+
+    def dispatch():
+        for checklist_id in checklist_ids:
+            dispatch_pdf_render(checklist_id)
+
+    transaction.on_commit(dispatch)
+
+
+def refresh_checklist_pdf(checklist):
+    """
+    Invalidate the stored PDF if the checklist's render inputs changed.
+
+    Depending on ``PDF_RENDER_ON_CHANGE`` the new version is rendered in the
+    background right away ('background') or on the next download ('lazy').
+    Returns True when the PDF was invalidated.
+    """
+    if is_pdf_current(checklist):
+        return False
+    enqueue_checklist_pdf(
+        checklist.id,
+        dispatch=settings.PDF_RENDER_ON_CHANGE == 'background',
+    )
+    return True
+
+
+def process_pending_pdfs(limit=None, max_attempts=None):
+    """
+    Render every claimable checklist PDF in the current process.
+
+    Used to drain the queue after a restart and by deployments that prefer a
+    cron job over a long-running worker. Returns ``(rendered, failed)``.
+    """
+    if max_attempts is None:
+        max_attempts = settings.PDF_RENDER_MAX_ATTEMPTS
+
+    queryset = CompletedChecklist.objects.filter(
+        _claimable_filter(), pdf_attempts__lt=max_attempts
+    ).order_by('pdf_status_changed_at').values_list('id', flat=True)
+    if limit:
+        queryset = queryset[:limit]
+
+    rendered = failed = 0
+    for checklist_id in list(queryset):
+        if render_checklist_pdf(checklist_id):
+            rendered += 1
+        else:
+            failed += 1
+    return rendered, failed
@@ -0,0 +1,166 @@
+"""
+Versioned response cache for the checklist template API.
+
+Every device downloads the templates at the start of each checklist, and
+they rarely change. GET responses of the template views are kept as bytes,
+pre-serialized to JSON and pre-compressed with gzip. They sit in a small
+in-process LRU in front of the shared Django cache (Redis in production), so
+a hot read touches neither the database nor the serializer.
+
+Entries are keyed by a version token stored in the shared cache. Saving or
+deleting a template replaces the token (see the signal receivers below),
+which retires every entry in every process at once: nothing is deleted,
+stale entries just stop being looked up and age out. The token is random,
+not a counter, so losing it to eviction can never bring old entries back.
+Writes that bypass the signals (``QuerySet.update``, raw SQL) must call
+``bump_template_cache_version`` themselves.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .models import ChecklistTemplate
+
+VERSION_KEY = 'checklist-templates:version'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class CachedResponse:
+    """A serialized response body, its gzip form and its ETag."""
+
+    def __init__(self, body, version):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha1(body).hexdigest()
+        self.etag = 'W/' + quote_etag(f'{version[:8]}-{digest}')
+
+    def to_response(self, request):
+        response = get_conditional_response(request, etag=self.etag)
+        if response is None:
+            if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+                response = HttpResponse(self.gzipped, content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = self.etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class TemplateCache:
+    """In-process LRU of ``CachedResponse`` backed by the shared cache."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _shared_key(self, version, key):
+        return f'checklist-templates:{version}:{hashlib.sha1(key.encode("utf-8")).hexdigest()}'
+
+    def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None:
+                self._entries.move_to_end((version, key))
+                return entry
+        entry = cache.get(self._shared_key(version, key))
+        if entry is not None:
+            self._remember(version, key, entry)
+        return entry
+
+    def put(self, version, key, body):
+        entry = CachedResponse(body, version)
+        cache.set(self._shared_key(version, key), entry, self.timeout)
+        self._remember(version, key, entry)
+        return entry
+
+    def _remember(self, version, key, entry):
+        with self._lock:
+            self._entries[(version, key)] = entry
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_template_cache = None
+_template_cache_lock = threading.Lock()
+
+
+def get_template_cache():
+    """Return the process-wide template cache."""
+    global _template_cache
+    with _template_cache_lock:
+        if _template_cache is None:
+            _template_cache = TemplateCache(
+                max_entries=settings.TEMPLATE_CACHE_LOCAL_ENTRIES,
+                timeout=settings.TEMPLATE_CACHE_TIMEOUT,
+            )
+        return _template_cache
+
+
+def bump_template_cache_version():
+    """Retire every cached template response, in every process."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=ChecklistTemplate)
+@receiver(post_delete, sender=ChecklistTemplate)
+def invalidate_template_cache(sender, **kwargs):
+    bump_template_cache_version()
+    # A read between now and the commit may cache the old rows under the new
+    # version; bumping again once committed retires that entry too
+    transaction.on_commit(bump_template_cache_version)
+
+
+class TemplateCacheMixin:
+    """
+    Serve a view's JSON GET responses from the template cache.
+
+    Only successful JSON responses are cached, keyed by the full URL; other
+    formats (the browsable API) and errors go through the view as usual.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if getattr(request.accepted_renderer, 'format', None) != 'json':
+            return super().get(request, *args, **kwargs)
+
+        template_cache = get_template_cache()
+        # Read the version before the rows: if a write lands in between, the
+        # entry is filed under the version that write just retired
+        version = template_cache.version()
+        key = request.get_full_path()
+        entry = template_cache.get(version, key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = template_cache.put(version, key, JSONRenderer().render(response.data))
+        return entry.to_response(request)
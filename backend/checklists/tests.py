@@ -0,0 +1,1533 @@
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.exceptions import FieldError
+from django.db import connection
+from django.db.models import BinaryField
+from django.db.models.functions import Cast
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from reportlab.lib.styles import ParagraphStyle
+from rest_framework.test import APIClient
+
+from blobs.images import DiskImageCache
+from rodocheck_backend.compressed_json import compress_json, stored_codec
+from tires.models import Tire
+from rodocheck_backend.testing import QueryBudgetMixin
+from vehicles.models import Vehicle
+from .counters import DownloadCounterBuffer, is_countable_download, record_download
+from .ids import uuid7
+from .items import build_checklist_items
+from .models import ChecklistDownloadStat, ChecklistItem, ChecklistTemplate, CompletedChecklist
+from . import pdf_generator, pdf_images
+from .pdf_generator import get_pdf_generator
+from .pdf_storage import compute_pdf_fingerprint, is_pdf_current, pdf_storage, write_pdf_atomically
+from .pdf_styles import get_stylesheet
+from .serializers import ChecklistTemplateSerializer
+from .tasks import render_checklist_pdf
+from .template_cache import TemplateCache, bump_template_cache_version, get_template_cache
+
+User = get_user_model()
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='rodocheck-test-media-')
+TEST_PDF_ROOT = tempfile.mkdtemp(prefix='rodocheck-test-pdfs-')
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+    shutil.rmtree(TEST_PDF_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, PDF_STORAGE_ROOT=TEST_PDF_ROOT)
+class ChecklistTestCase(TestCase):
+    """Shared fixtures for checklist API tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='inspetor', email='inspetor@rodoan.com.br',
+            password='senha-teste', first_name='Ana', last_name='Souza',
+        )
+        cls.vehicle = Vehicle.objects.create(
+            plate='ABC1234', model='FH 540', brand='Volvo', year=2022,
+            vehicle_type='truck', created_by=cls.user,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Cached template responses must not leak between tests
+        bump_template_cache_version()
+
+    def checklist_pk(self, external_id):
+        return CompletedChecklist.objects.values_list('id', flat=True).get(external_id=external_id)
+
+    def make_checklist(self, checklist_id='chk-1', **kwargs):
+        defaults = {
+            'vehicle': self.vehicle,
+            'created_by': self.user,
+            'questions': [
+                {'id': 'q1', 'text': 'Freios', 'status': 'approved'},
+                {'id': 'q2', 'text': 'Pneus', 'status': 'rejected', 'observations': 'pneu careca'},
+            ],
+        }
+        defaults.update(kwargs)
+        return CompletedChecklist.objects.create(external_id=checklist_id, **defaults)
+
+
+class BackgroundPDFRenderTests(ChecklistTestCase):
+
+    def test_create_queues_pdf_and_renders_after_commit(self):
+        payload = {
+            'id': 'chk-api',
+            'vehicle': self.vehicle.id,
+            'final_status': 'approved',
+            'questions': [{'text': 'Freios', 'status': 'approved'}],
+        }
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/checklists/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        checklist = CompletedChecklist.objects.get(external_id='chk-api')
+        self.assertEqual(checklist.pdf_status, 'pending')
+        self.assertFalse(checklist.is_pdf_generated)
+
+        for callback in callbacks:
+            callback()
+
+        checklist.refresh_from_db()
+        self.assertEqual(checklist.pdf_status, 'completed')
+        self.assertTrue(checklist.is_pdf_generated)
+        self.assertEqual(checklist.pdf_attempts, 1)
+
+    def test_status_endpoint(self):
+        self.make_checklist()
+        response = self.client.get('/api/checklists/chk-1/status/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pdf_status'], 'pending')
+        self.assertFalse(response.data['is_pdf_generated'])
+
+    def test_retry_requeues_failed_render(self):
+        checklist = self.make_checklist(pdf_status='failed', pdf_error='boom')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/checklists/chk-1/retry/')
+
+        self.assertEqual(response.status_code, 202)
+        checklist.refresh_from_db()
+        self.assertEqual(checklist.pdf_status, 'completed')
+        self.assertEqual(checklist.pdf_error, '')
+
+    def test_render_is_not_claimed_twice(self):
+        self.make_checklist(pdf_status='completed', is_pdf_generated=True)
+
+        self.assertFalse(render_checklist_pdf(self.checklist_pk('chk-1')))
+
+
+class PDFStyleRegistryTests(ChecklistTestCase):
+
+    def test_generator_and_styles_are_shared(self):
+        self.assertIs(get_pdf_generator(), get_pdf_generator())
+        self.assertIs(get_pdf_generator().styles, get_stylesheet())
+        self.assertEqual(get_stylesheet()['CustomTitle'].fontSize, 18)
+
+    def test_shared_stylesheet_is_read_only(self):
+        with self.assertRaises(TypeError):
+            get_stylesheet().add(get_stylesheet()['Normal'])
+
+    def test_shared_styles_cannot_be_changed_through_lookups(self):
+        title = get_stylesheet()['CustomTitle']
+        title.fontSize = 40
+        title.parent.fontName = 'Courier'
+
+        self.assertEqual(get_stylesheet()['CustomTitle'].fontSize, 18)
+        self.assertEqual(get_stylesheet()['Title'].fontName, 'Helvetica-Bold')
+        small = ParagraphStyle('Small', parent=get_stylesheet()['Normal'], fontSize=7)
+        self.assertEqual((small.fontName, small.fontSize), ('Helvetica', 7))
+
+    def test_shared_generator_renders_repeatedly(self):
+        checklist = self.make_checklist()
+        generator = get_pdf_generator()
+
+        first = generator.generate_pdf(checklist)
+        second = generator.generate_pdf(checklist)
+
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertEqual(len(first), len(second))
+
+
+def make_data_url(size=(1600, 1200), color=(200, 30, 30), fmt='JPEG', mode='RGB'):
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, color).save(buffer, fmt)
+    mime = 'image/png' if fmt == 'PNG' else 'image/jpeg'
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+class PDFImageEmbeddingTests(ChecklistTestCase):
+
+    def test_photos_and_signatures_are_embedded_downscaled(self):
+        checklist = self.make_checklist(
+            vehicle_images={'cavaloFrontal': make_data_url(color=(10, 120, 200))},
+            signatures={
+                'assinaturaMotorista': make_data_url((800, 300), (0, 0, 0, 255), 'PNG', 'RGBA'),
+                'location': {'latitude': -23.5, 'longitude': -46.6},
+            },
+        )
+
+        pdf = get_pdf_generator().generate_pdf(checklist)
+
+        self.assertEqual(pdf.count(b'/Subtype /Image'), 2)
+        photo = pdf_images.prepare_image(checklist.vehicle_images['cavaloFrontal'], pdf_images.PHOTO_VARIANT)
+        self.assertLessEqual(max(photo.width, photo.height), pdf_images.PHOTO_VARIANT.max_px)
+
+    def test_regeneration_reuses_cached_images(self):
+        checklist = self.make_checklist(vehicle_images={'traseira': {'url': make_data_url(color=(1, 2, 3))}})
+        generator = get_pdf_generator()
+        generator.generate_pdf(checklist)
+
+        with mock.patch.object(pdf_images, 'fetch_image_bytes', wraps=pdf_images.fetch_image_bytes) as fetch:
+            generator.generate_pdf(checklist)
+
+        fetch.assert_not_called()
+
+    def test_images_evicted_during_a_render_still_embed(self):
+        checklist = self.make_checklist(vehicle_images={'traseira': make_data_url(color=(4, 5, 6))})
+        real_prepare = pdf_generator.prepare_images
+
+        def prepare_then_evict(requests_by_key):
+            prepared = real_prepare(requests_by_key)
+            shutil.rmtree(pdf_images.get_image_cache().directory)  # another render's eviction
+            return prepared
+
+        with mock.patch.object(pdf_generator, 'prepare_images', side_effect=prepare_then_evict):
+            pdf = get_pdf_generator().generate_pdf(checklist)
+
+        self.assertEqual(pdf.count(b'/Subtype /Image'), 1)
+
+    def test_broken_image_falls_back_to_text(self):
+        checklist = self.make_checklist(vehicle_images={'lateral': 'data:image/jpeg;base64,bm90LWFuLWltYWdl'})
+
+        pdf = get_pdf_generator().generate_pdf(checklist)
+
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertNotIn(b'/Subtype /Image', pdf)
+
+    def test_disk_cache_evicts_least_recently_used(self):
+        directory = tempfile.mkdtemp(dir=TEST_MEDIA_ROOT)
+        cache = DiskImageCache(directory, max_bytes=250)
+
+        cache.put('aa01', 'jpg', b'x' * 100)
+        cache.put('bb02', 'jpg', b'x' * 100)
+        old = time.time() - 60
+        os.utime(os.path.join(directory, 'bb', 'bb02.jpg'), (old, old))
+        cache.get('aa01', 'jpg')  # recently used
+        cache.put('cc03', 'jpg', b'x' * 100)
+
+        self.assertIsNotNone(cache.get('aa01', 'jpg'))
+        self.assertIsNone(cache.get('bb02', 'jpg'))
+        self.assertIsNotNone(cache.get('cc03', 'jpg'))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, PDF_IMAGE_ALLOWED_HOSTS=['fotos.example.com', '.cdn.example.com'])
+class PDFImageSourceTests(TestCase):
+    """What ``fetch_image_bytes`` agrees to read."""
+
+    def resolving_to(self, address):
+        return mock.patch('socket.getaddrinfo', return_value=[(None, None, None, '', (address, 443))])
+
+    def test_remote_hosts_must_be_allowed_and_public(self):
+        for url in ('https://outro.example.com/a.jpg', 'http://169.254.169.254/latest/meta-data/'):
+            with self.assertRaises(pdf_images.ImageFetchError), mock.patch('requests.Session.get') as get:
+                pdf_images.fetch_image_bytes(url)
+            get.assert_not_called()
+
+        for address in ('127.0.0.1', '10.0.0.5', '169.254.169.254', '::1', 'fd00::1'):
+            with self.resolving_to(address), mock.patch('requests.Session.get') as get:
+                with self.assertRaises(pdf_images.ImageFetchError):
+                    pdf_images.fetch_image_bytes('https://fotos.example.com/a.jpg')
+            get.assert_not_called()
+
+    def test_allowed_hosts_are_fetched_without_following_redirects(self):
+        response = mock.MagicMock(is_redirect=False)
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [b'image']
+        with self.resolving_to('93.184.216.34'), mock.patch('requests.Session.get', return_value=response) as get:
+            self.assertEqual(pdf_images.fetch_image_bytes('https://img.cdn.example.com/a.jpg'), b'image')
+        self.assertIs(get.call_args.kwargs['allow_redirects'], False)
+
+        response.is_redirect = True
+        with self.resolving_to('93.184.216.34'), mock.patch('requests.Session.get', return_value=response):
+            with self.assertRaises(pdf_images.ImageFetchError):
+                pdf_images.fetch_image_bytes('https://fotos.example.com/a.jpg')
+
+    def test_address_is_checked_again_when_connecting(self):
+        requests_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests_seen.append(self.path)
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b'interno')
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        # Public when checked, loopback by the time requests connects
+        answers = iter([
+            [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.216.34', port))],
+            [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))],
+        ])
+        with mock.patch('socket.getaddrinfo', side_effect=lambda *args, **kwargs: next(answers)):
+            with self.assertRaises(pdf_images.ImageFetchError):
+                pdf_images.fetch_image_bytes(f'http://fotos.example.com:{port}/a.jpg')
+
+        self.assertEqual(requests_seen, [])
+
+    def test_media_paths_are_limited_to_image_directories(self):
+        default_storage.save('uploads/foto.jpg', ContentFile(b'photo'))
+        default_storage.save('checklists/pdfs/outro.pdf', ContentFile(b'%PDF'))
+
+        self.assertEqual(pdf_images.fetch_image_bytes('/media/uploads/foto.jpg'), b'photo')
+        for path in ('/media/checklists/pdfs/outro.pdf', '/media/uploads/../checklists/pdfs/outro.pdf'):
+            with self.assertRaises(pdf_images.ImageFetchError):
+                pdf_images.fetch_image_bytes(path)
+
+
+class PDFFingerprintCacheTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.checklist = self.make_checklist()
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        self.checklist.refresh_from_db()
+
+    def test_rendered_pdf_is_stored_under_its_fingerprint(self):
+        fingerprint = compute_pdf_fingerprint(self.checklist)
+
+        self.assertEqual(self.checklist.pdf_fingerprint, fingerprint)
+        self.assertIn(fingerprint[:32], self.checklist.pdf_file.name)
+        self.assertTrue(is_pdf_current(self.checklist))
+
+    def test_edit_invalidates_and_rerenders(self):
+        old_name = self.checklist.pdf_file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/checklists/chk-1/', {'general_observations': 'Retrovisor trincado'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.checklist.refresh_from_db()
+        self.assertTrue(self.checklist.is_pdf_generated)
+        self.assertNotEqual(self.checklist.pdf_file.name, old_name)
+        self.assertFalse(pdf_storage.exists(old_name))
+        self.assertTrue(is_pdf_current(self.checklist))
+
+    def test_edit_without_pdf_changes_does_not_rerender(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/checklists/chk-1/', {'final_status': 'pending'}, format='json')
+
+        self.checklist.refresh_from_db()
+        self.assertEqual(self.checklist.pdf_attempts, 1)
+        self.assertEqual(self.checklist.pdf_status, 'completed')
+
+    def test_vehicle_change_rerenders_on_download(self):
+        old_name = self.checklist.pdf_file.name
+        self.vehicle.color = 'Azul'
+        self.vehicle.save()
+
+        response = self.client.get('/api/checklists/chk-1/download/')
+
+        self.assertEqual(response.status_code, 200)
+        self.checklist.refresh_from_db()
+        self.assertNotEqual(self.checklist.pdf_file.name, old_name)
+        self.assertEqual(self.checklist.pdf_attempts, 2)
+
+    def test_pdfs_are_stored_outside_media_root(self):
+        self.assertTrue(os.path.isfile(os.path.join(TEST_PDF_ROOT, self.checklist.pdf_file.name)))
+        self.assertFalse(os.path.exists(os.path.join(TEST_MEDIA_ROOT, self.checklist.pdf_file.name)))
+        with self.assertRaises(NotImplementedError):
+            self.checklist.pdf_file.url
+
+    def test_gc_removes_unreferenced_files(self):
+        orphan = pdf_storage.save('checklists/pdfs/checklist_antigo.pdf', ContentFile(b'%PDF-1.4'))
+
+        call_command('gc_checklist_pdfs', grace_minutes=-1, stdout=io.StringIO())
+
+        self.assertFalse(pdf_storage.exists(orphan))
+        self.assertTrue(pdf_storage.exists(self.checklist.pdf_file.name))
+
+
+class RegeneratePDFsCommandTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.checkpoint = os.path.join(TEST_MEDIA_ROOT, 'regenerate.json')
+        self.addCleanup(lambda: os.path.exists(self.checkpoint) and os.remove(self.checkpoint))
+
+    def regenerate(self, **options):
+        out = io.StringIO()
+        call_command('regenerate_checklist_pdfs', workers=1, checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def test_regenerates_every_matching_checklist(self):
+        for checklist_id in ('chk-1', 'chk-2', 'chk-3'):
+            self.make_checklist(checklist_id)
+
+        output = self.regenerate(chunk_size=2)
+
+        self.assertIn('PDFs gerados: 3', output)
+        self.assertIn('3/3 (100.0%)', output)
+        self.assertEqual(CompletedChecklist.objects.filter(is_pdf_generated=True).count(), 3)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_rewrites_pdfs_whose_inputs_did_not_change(self):
+        self.make_checklist('chk-1')
+        self.regenerate()
+        checklist = CompletedChecklist.objects.get(external_id='chk-1')
+        with pdf_storage.open(checklist.pdf_file.name, 'wb') as f:
+            f.write(b'%PDF-1.4 layout antigo')  # same fingerprint, older layout
+
+        self.regenerate()
+
+        checklist.refresh_from_db()
+        with pdf_storage.open(checklist.pdf_file.name, 'rb') as f:
+            self.assertNotIn(b'layout antigo', f.read())
+        self.assertEqual(checklist.pdf_fingerprint, compute_pdf_fingerprint(checklist))
+
+    def test_resumes_after_checkpoint(self):
+        for checklist_id in ('chk-1', 'chk-2'):
+            self.make_checklist(checklist_id)
+        self.regenerate()
+        CompletedChecklist.objects.filter(external_id='chk-1').update(pdf_status='failed')
+        first = self.checklist_pk('chk-1')
+
+        signature = hashlib.sha256(json.dumps({}, sort_keys=True).encode()).hexdigest()
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'filters': signature, 'last_id': str(first), 'rendered': 1, 'failed': 0}, f)
+
+        output = self.regenerate()
+
+        self.assertIn(f'Retomando após o checklist {first}', output)
+        self.assertIn('PDFs gerados: 2', output)
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').pdf_status, 'failed')
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-2').pdf_attempts, 2)
+
+    def test_failed_write_leaves_no_partial_file(self):
+        name = 'checklists/pdfs/chk-atomic/parcial.pdf'
+
+        def crash_midway(output):
+            output.write(b'%PDF-1.4 ...')
+            raise OSError('disco cheio')
+
+        with self.assertRaises(OSError):
+            write_pdf_atomically(pdf_storage, name, crash_midway)
+
+        self.assertFalse(pdf_storage.exists(name))
+        self.assertEqual(pdf_storage.listdir('checklists/pdfs/chk-atomic')[1], [])
+
+    def test_pdf_is_rendered_straight_to_storage(self):
+        self.make_checklist()
+
+        with mock.patch.object(type(get_pdf_generator()), 'generate_pdf') as generate_pdf:
+            self.assertTrue(render_checklist_pdf(self.checklist_pk('chk-1')))
+
+        generate_pdf.assert_not_called()
+        pdf = CompletedChecklist.objects.get(external_id='chk-1').pdf_file
+        self.assertTrue(pdf.read().startswith(b'%PDF'))
+
+
+class StreamingDownloadTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_checklist()
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        self.pdf_bytes = CompletedChecklist.objects.get(external_id='chk-1').pdf_file.read()
+
+    def test_full_download_is_streamed(self):
+        response = self.client.get('/api/checklists/chk-1/download/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.pdf_bytes)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(response['Content-Length']), len(self.pdf_bytes))
+        self.assertIn('ETag', response)
+
+    def test_range_request(self):
+        response = self.client.get('/api/checklists/chk-1/download/', HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.pdf_bytes[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.pdf_bytes)}')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get('/api/checklists/chk-1/download/', HTTP_RANGE='bytes=999999999-')
+
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get('/api/checklists/chk-1/download/')['ETag']
+        response = self.client.get('/api/checklists/chk-1/download/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(PDF_DOWNLOAD_SENDFILE='nginx', PDF_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_nginx_handoff(self):
+        response = self.client.get('/api/checklists/chk-1/download/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Accel-Redirect'].startswith('/protected-media/checklists/pdfs/'))
+        self.assertEqual(response.content, b'')
+
+
+
+class ZipExportTests(ChecklistTestCase):
+
+    def export(self, **params):
+        response = self.client.get('/api/checklists/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_export_reuses_stored_pdfs_and_renders_missing_ones(self):
+        self.make_checklist('chk-1')
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        stored = CompletedChecklist.objects.get(external_id='chk-1').pdf_file.read()
+        self.make_checklist('chk-2')
+
+        archive = self.export()
+
+        self.assertIsNone(archive.testzip())
+        pdfs = sorted(name for name in archive.namelist() if name.endswith('.pdf'))
+        self.assertEqual(len(pdfs), 2)
+        self.assertTrue(all(name.startswith('ABC1234/') for name in pdfs))
+        self.assertEqual(archive.read(next(n for n in pdfs if 'chk-1' in n)), stored)
+        self.assertTrue(archive.read(next(n for n in pdfs if 'chk-2' in n)).startswith(b'%PDF'))
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').pdf_attempts, 1)
+        self.assertIn('chk-2', archive.read('indice.csv').decode('utf-8'))
+
+    def test_export_filters_by_vehicle_and_date(self):
+        other = Vehicle.objects.create(
+            plate='XYZ9876', model='Actros', brand='Mercedes', year=2020,
+            vehicle_type='truck', created_by=self.user,
+        )
+        self.make_checklist('chk-1')
+        self.make_checklist('chk-2', vehicle=other)
+        CompletedChecklist.objects.filter(external_id='chk-1').update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+
+        archive = self.export(vehicle=other.id, date_from=timezone.localdate().isoformat())
+
+        self.assertEqual(
+            [name for name in archive.namelist() if name.endswith('.pdf')],
+            [f'XYZ9876/{timezone.localdate():%Y-%m-%d}_chk-2.pdf'],
+        )
+
+    def test_export_rejects_invalid_dates_and_empty_selections(self):
+        self.assertEqual(self.client.get('/api/checklists/export/', {'date_from': '31/12/2024'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/checklists/export/').status_code, 404)
+
+    @override_settings(PDF_EXPORT_MAX_CHECKLISTS=1)
+    def test_export_is_capped(self):
+        self.make_checklist('chk-1')
+        self.make_checklist('chk-2')
+
+        self.assertEqual(self.client.get('/api/checklists/export/').status_code, 400)
+
+
+class SignedPDFURLTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_checklist()
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        self.pdf_file = CompletedChecklist.objects.get(external_id='chk-1').pdf_file
+
+    def signed_url(self):
+        info = self.client.get('/api/checklists/chk-1/download-info/').json()
+        self.assertIsNotNone(info['signed_url_expires_at'])
+        return info['signed_url']
+
+    def test_signed_url_serves_pdf_without_authentication(self):
+        url = self.signed_url()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.pdf_file.read())
+        # No lookups: the only statements are the download counter's writes
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('SELECT')])
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').download_count, 1)
+
+    def test_head_requests_are_not_counted(self):
+        response = APIClient().head(self.signed_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').download_count, 0)
+        self.assertFalse(ChecklistDownloadStat.objects.exists())
+
+    @override_settings(PDF_DOWNLOAD_SENDFILE='nginx', PDF_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_signed_url_hands_off_to_nginx(self):
+        response = APIClient().get(self.signed_url())
+
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.pdf_file.name}')
+
+    def test_tampered_signature_is_rejected(self):
+        url = self.signed_url()
+        other = pdf_storage.save('checklists/pdfs/chk-1/outro.pdf', ContentFile(b'%PDF-1.4'))
+
+        self.assertEqual(APIClient().get(url.replace(url[-6:], '000000')).status_code, 403)
+        self.assertEqual(APIClient().get(url.replace(self.pdf_file.name.split('/')[-1], 'outro.pdf')).status_code, 403)
+        pdf_storage.delete(other)
+
+    def test_expired_url_is_gone(self):
+        url = self.signed_url()
+
+        with mock.patch('checklists.signed_urls.time.time', return_value=time.time() + 3600):
+            response = APIClient().get(url)
+
+        self.assertEqual(response.status_code, 410)
+
+    def test_public_media_path_is_never_returned(self):
+        info = self.client.get('/api/checklists/chk-1/download-info/')
+        detail = self.client.get('/api/checklists/chk-1/')
+        self.assertEqual(detail.status_code, 200)
+
+        self.assertNotIn('pdf_url', info.json())
+        for response in (info, detail):
+            self.assertNotIn(self.pdf_file.name, response.content.decode())
+
+    def test_no_signed_url_while_pdf_is_stale(self):
+        CompletedChecklist.objects.filter(external_id='chk-1').update(is_pdf_generated=False)
+
+        info = self.client.get('/api/checklists/chk-1/download-info/').json()
+
+        self.assertIsNone(info['signed_url'])
+
+
+class CursorPaginationTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        base = timezone.now()
+        for i in range(7):
+            self.make_checklist(f'chk-{i}')
+        # Two checklists share a timestamp: the id breaks the tie
+        for i in range(7):
+            CompletedChecklist.objects.filter(external_id=f'chk-{i}').update(
+                created_at=base - timedelta(minutes=min(i, 5))
+            )
+
+    def test_pages_follow_created_at_and_id_without_gaps(self):
+        seen = []
+        url = '/api/checklists/?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            seen.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        expected = [
+            str(pk) for pk in CompletedChecklist.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        ]
+        self.assertEqual(seen, expected)
+
+    def test_count_is_only_computed_on_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/checklists/')
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql']])
+
+        data = self.client.get('/api/checklists/', {'with_count': 'true'}).json()
+        self.assertEqual(data['count'], 7)
+
+    @skipIf(connection.vendor != 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_listing_uses_composite_index(self):
+        queryset = CompletedChecklist.objects.filter(created_by=self.user).order_by('-created_at', '-id')[:20]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+
+        self.assertIn('checklist_user_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class SparseFieldsetsTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_checklist(signatures={'motorista': 'data:image/png;base64,AAAA'})
+
+    def test_list_returns_summary_without_heavy_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            item = self.client.get('/api/checklists/').json()['results'][0]
+
+        self.assertEqual(item['vehicle'], self.vehicle.id)
+        self.assertEqual(item['vehicle_plate'], 'ABC1234')
+        self.assertEqual(item['created_by_name'], 'Ana Souza')
+        for heavy in ('questions', 'vehicle_images', 'signatures', 'checklist_items'):
+            self.assertNotIn(heavy, item)
+        listing = next(q['sql'] for q in queries if 'FROM "checklists_completedchecklist"' in q['sql'])
+        self.assertNotIn('"questions"', listing)
+        self.assertNotIn('"signatures"', listing)
+
+    def test_fields_selects_columns_including_heavy_ones(self):
+        item = self.client.get('/api/checklists/', {'fields': 'id,questions'}).json()['results'][0]
+
+        self.assertEqual(set(item), {'id', 'questions'})
+        self.assertEqual(item['questions'][1]['observations'], 'pneu careca')
+
+    def test_expand_nests_related_objects(self):
+        with self.assertNumQueries(2):  # ETag check + page with relations joined, no COUNT
+            data = self.client.get('/api/checklists/', {'fields': 'id', 'expand': 'vehicle,created_by'}).json()
+        item = data['results'][0]
+
+        self.assertEqual(item['vehicle']['plate'], 'ABC1234')
+        self.assertEqual(item['created_by']['username'], 'inspetor')
+
+    def test_detail_and_vehicle_and_tire_apis_accept_fields(self):
+        detail = self.client.get('/api/checklists/chk-1/', {'fields': 'id,final_status'}).json()
+        vehicles = self.client.get('/api/vehicles/', {'fields': 'id,plate'}).json()
+        tire = Tire.objects.create(
+            serial_number='PN-001', brand='Michelin', model='X Multi', size='295/80R22.5',
+            vehicle=self.vehicle, created_by=self.user,
+        )
+        tires = self.client.get('/api/tires/', {'fields': 'id,vehicle', 'expand': 'vehicle'}).json()
+
+        self.assertEqual(set(detail), {'id', 'final_status'})
+        self.assertEqual(vehicles['results'], [{'id': self.vehicle.id, 'plate': 'ABC1234'}])
+        self.assertEqual(set(tires['results'][0]), {'id', 'vehicle'})
+        self.assertEqual(tires['results'][0]['vehicle']['plate'], 'ABC1234')
+
+    def test_fields_do_not_restrict_writes(self):
+        response = self.client.patch(
+            '/api/checklists/chk-1/?fields=id', {'general_observations': 'Farol queimado'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['general_observations'], 'Farol queimado')
+
+
+class QueryBudgetTests(QueryBudgetMixin, ChecklistTestCase):
+    # Budgets include the ETag validation query of ConditionalGetMixin
+
+    def add_checklists(self, count):
+        start = CompletedChecklist.objects.count()
+        for i in range(start, start + count):
+            self.make_checklist(f'chk-{i:03d}', template=self.template)
+
+    def setUp(self):
+        super().setUp()
+        self.template = ChecklistTemplate.objects.create(name='Saída de viagem', created_by=self.user)
+
+    def test_checklist_list(self):
+        self.assertQueryBudget('/api/checklists/', 2, self.add_checklists)
+
+    def test_checklist_list_expanded(self):
+        self.assertQueryBudget(
+            '/api/checklists/', 2, self.add_checklists, params={'expand': 'vehicle,created_by'}
+        )
+
+    def test_checklist_detail_items(self):
+        checklist = self.make_checklist(template=self.template)
+
+        def add_items(count):
+            start = checklist.checklist_items.count()
+            ChecklistItem.objects.bulk_create([
+                ChecklistItem(checklist=checklist, text=f'Item {i}', status='approved', order=i)
+                for i in range(start, start + count)
+            ])
+
+        self.assertQueryBudget('/api/checklists/chk-1/', 3, add_items)
+
+    def test_template_list(self):
+        def add_templates(count):
+            ChecklistTemplate.objects.bulk_create([
+                ChecklistTemplate(name=f'Modelo {i}', created_by=self.user) for i in range(count)
+            ])
+            # bulk_create sends no signals; measure the cache miss path
+            bump_template_cache_version()
+
+        self.assertQueryBudget('/api/checklists/templates/', 2, add_templates)
+
+    def test_vehicle_list(self):
+        def add_vehicles(count):
+            start = Vehicle.objects.count()
+            Vehicle.objects.bulk_create([
+                Vehicle(plate=f'QBG{i:04d}', model='FH 540', brand='Volvo', year=2022,
+                        vehicle_type='truck', created_by=self.user)
+                for i in range(start, start + count)
+            ])
+
+        self.assertQueryBudget('/api/vehicles/', 3, add_vehicles)
+
+
+class ChecklistItemRowsTests(ChecklistTestCase):
+
+    def test_create_and_update_write_item_rows(self):
+        payload = {
+            'id': 'chk-api',
+            'vehicle': self.vehicle.id,
+            'questions': [
+                {'id': 'q1', 'text': 'Freios', 'status': 'rejected', 'photo': 'data:image/png;base64,AAAA'},
+                {'id': 'q2', 'text': 'Pneus', 'status': 'talvez'},
+            ],
+        }
+        self.client.post('/api/checklists/', payload, format='json')
+        checklist = CompletedChecklist.objects.get(external_id='chk-api')
+        self.assertEqual(
+            list(checklist.checklist_items.values_list('key', 'text', 'status', 'photo')),
+            [('q1', 'Freios', 'rejected', None), ('q2', 'Pneus', 'pending', None)],
+        )
+
+        self.client.patch('/api/checklists/chk-api/', {
+            'questions': [{'id': 'q1', 'text': 'Freios', 'status': 'approved'}],
+        }, format='json')
+        self.assertEqual(list(checklist.checklist_items.values_list('key', 'status')), [('q1', 'approved')])
+
+        self.client.patch('/api/checklists/chk-api/', {'final_status': 'approved'}, format='json')
+        self.assertEqual(checklist.checklist_items.count(), 1)
+
+    def test_backfill_command(self):
+        self.make_checklist('chk-old-1')
+        self.make_checklist('chk-old-2')
+        self.make_checklist('chk-old-3', questions=[])
+
+        out = io.StringIO()
+        call_command('backfill_checklist_items', chunk_size=1, stdout=out)
+        self.assertIn('Itens gravados: 4 em 3 checklists', out.getvalue())
+        self.assertEqual(
+            list(ChecklistItem.objects.filter(checklist__external_id='chk-old-1').values_list('key', 'status')),
+            [('q1', 'approved'), ('q2', 'rejected')],
+        )
+
+        # Re-running skips checklists that already have items
+        call_command('backfill_checklist_items', stdout=io.StringIO())
+        self.assertEqual(ChecklistItem.objects.count(), 4)
+        call_command('backfill_checklist_items', rebuild=True, stdout=io.StringIO())
+        self.assertEqual(ChecklistItem.objects.count(), 4)
+
+    def test_item_report(self):
+        other_vehicle = Vehicle.objects.create(
+            plate='XYZ9876', model='R 450', brand='Scania', year=2021,
+            vehicle_type='truck', created_by=self.user,
+        )
+        for checklist_id, vehicle in (('chk-1', self.vehicle), ('chk-2', self.vehicle), ('chk-3', other_vehicle)):
+            self.make_checklist(checklist_id, vehicle=vehicle, questions=[
+                {'id': 'q1', 'text': 'Freios dianteiros', 'status': 'rejected'},
+                {'id': 'q2', 'text': 'Pneus', 'status': 'rejected' if vehicle == other_vehicle else 'approved'},
+            ])
+        call_command('backfill_checklist_items', stdout=io.StringIO())
+
+        response = self.client.get('/api/checklists/items/report/', {'text': 'freio'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_items'], 3)
+        self.assertEqual(
+            [(row['plate'], row['items'], row['checklists']) for row in response.data['vehicles']],
+            [('ABC1234', 2, 2), ('XYZ9876', 1, 1)],
+        )
+
+        response = self.client.get('/api/checklists/items/report/', {'key': 'q2'})
+        self.assertEqual([row['plate'] for row in response.data['vehicles']], ['XYZ9876'])
+
+        response = self.client.get('/api/checklists/items/report/', {'date_to': '2000-01-01'})
+        self.assertEqual(response.data['vehicles'], [])
+        self.assertEqual(self.client.get('/api/checklists/items/report/', {'status': 'x'}).status_code, 400)
+
+    @skipIf(connection.vendor != 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_status_lookup_uses_index(self):
+        sql, params = ChecklistItem.objects.filter(status='rejected').values('checklist_id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+
+        self.assertIn('checklist_item_status_idx', plan)
+
+
+class ChecklistSearchTests(ChecklistTestCase):
+
+    def create(self, checklist_id, observations='', questions=()):
+        response = self.client.post('/api/checklists/', {
+            'id': checklist_id,
+            'vehicle': self.vehicle.id,
+            'general_observations': observations,
+            'questions': list(questions),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def search(self, q, **params):
+        return self.client.get('/api/checklists/search/', {'q': q, **params})
+
+    def ids(self, response):
+        return [row['external_id'] for row in response.data['results']]
+
+    def test_search_observations_and_items_ranked(self):
+        self.create('chk-1', 'Vazamento de óleo no motor', [{'text': 'Motor', 'status': 'rejected'}])
+        self.create('chk-2', 'Sem ressalvas', [
+            {'text': 'Pneus', 'status': 'rejected', 'observations': 'pneu careca no eixo traseiro'},
+        ])
+        self.create('chk-3', 'Pneu careca, trocar pneu', [
+            {'text': 'Pneus', 'status': 'rejected', 'observations': 'pneu careca'},
+        ])
+
+        self.assertEqual(self.ids(self.search('vazamento')), ['chk-1'])
+        response = self.search('pneu careca')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response), ['chk-3', 'chk-2'])
+        self.assertGreater(response.data['results'][0]['rank'], response.data['results'][1]['rank'])
+        self.assertNotIn('questions', response.data['results'][0])
+        # Accents are ignored and quoted terms match as a phrase
+        self.assertEqual(self.ids(self.search('oleo')), ['chk-1'])
+        self.assertEqual(self.ids(self.search('"careca no eixo"')), ['chk-2'])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.create('chk-1', 'Vazamento de óleo')
+        self.client.patch('/api/checklists/chk-1/', {'general_observations': 'Farol queimado'}, format='json')
+
+        self.assertEqual(self.ids(self.search('vazamento')), [])
+        self.assertEqual(self.ids(self.search('farol')), ['chk-1'])
+
+        self.client.delete('/api/checklists/chk-1/')
+        self.assertEqual(self.ids(self.search('farol')), [])
+
+    def test_search_is_scoped_and_paginated(self):
+        other = User.objects.create_user(username='outro', password='senha-teste')
+        self.make_checklist('chk-other', created_by=other, general_observations='vazamento')
+        for i in range(3):
+            self.create(f'chk-{i}', 'vazamento')
+        call_command('rebuild_checklist_search', stdout=io.StringIO())
+
+        response = self.search('vazamento', page_size=2)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(self.search('vazamento', page_size=2, page=2).data['results']), 1)
+        self.assertEqual(self.search('  ').status_code, 400)
+        self.assertEqual(self.search('*"').status_code, 400)
+
+    def test_rebuild_command_indexes_existing_checklists(self):
+        self.make_checklist('chk-old', general_observations='Retrovisor quebrado')
+        self.assertEqual(self.ids(self.search('retrovisor')), [])
+
+        out = io.StringIO()
+        call_command('rebuild_checklist_search', stdout=out)
+        self.assertIn('Checklists indexados: 1', out.getvalue())
+        self.assertEqual(self.ids(self.search('retrovisor')), ['chk-old'])
+        # The search text includes item observations (see make_checklist)
+        self.assertEqual(self.ids(self.search('careca')), ['chk-old'])
+
+
+class ChecklistRollupTests(ChecklistTestCase):
+
+    def create(self, checklist_id, final_status='approved', questions=None):
+        payload = {
+            'id': checklist_id,
+            'vehicle': self.vehicle.id,
+            'final_status': final_status,
+            'questions': questions or [
+                {'id': 'q1', 'text': 'Freios', 'status': 'rejected'},
+                {'id': 'q2', 'text': 'Pneus', 'status': 'approved'},
+            ],
+        }
+        with self.captureOnCommitCallbacks(execute=False):
+            self.assertEqual(self.client.post('/api/checklists/', payload, format='json').status_code, 201)
+
+    def stats(self):
+        response = self.client.get('/api/checklists/stats/checklists/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_rollups_follow_create_update_and_delete(self):
+        self.create('chk-a')
+        self.create('chk-b', final_status='rejected')
+
+        stats = self.stats()
+        self.assertEqual(
+            stats['totals'],
+            {'checklists': 2, 'approved': 1, 'rejected': 1, 'pending': 0, 'rejected_items': 2},
+        )
+        self.assertEqual(stats['daily'][0]['date'], timezone.localdate())
+        self.assertEqual([(row['plate'], row['checklists']) for row in stats['vehicles']], [('ABC1234', 2)])
+        self.assertEqual([(row['key'], row['text'], row['rejected']) for row in stats['rejected_items']],
+                         [('q1', 'Freios', 2)])
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.patch('/api/checklists/chk-b/', {
+                'final_status': 'approved',
+                'questions': [{'id': 'q3', 'text': 'Luzes', 'status': 'rejected'}],
+            }, format='json')
+        stats = self.stats()
+        self.assertEqual(stats['totals']['approved'], 2)
+        self.assertEqual(stats['totals']['rejected'], 0)
+        self.assertEqual({row['text']: row['rejected'] for row in stats['rejected_items']},
+                         {'Freios': 1, 'Luzes': 1})
+
+        self.client.delete('/api/checklists/chk-a/')
+        stats = self.stats()
+        self.assertEqual(
+            stats['totals'],
+            {'checklists': 1, 'approved': 1, 'rejected': 0, 'pending': 0, 'rejected_items': 1},
+        )
+        self.assertEqual({row['text']: row['rejected'] for row in stats['rejected_items']},
+                         {'Luzes': 1})
+
+    def test_sync_batch_is_counted(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.post('/api/checklists/sync/', {'checklists': [
+                {'id': 'chk-off-1', 'vehicle': self.vehicle.id, 'final_status': 'pending', 'questions': []},
+                {'id': 'chk-off-2', 'vehicle': self.vehicle.id, 'final_status': 'pending', 'questions': []},
+            ]}, format='json')
+
+        self.assertEqual(self.stats()['totals']['pending'], 2)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create('chk-a')
+        self.create('chk-b', final_status='rejected')
+        incremental = self.stats()
+
+        call_command('rebuild_checklist_rollups', stdout=io.StringIO())
+
+        self.assertEqual(self.stats(), incremental)
+
+    def test_rebuild_counts_checklists_written_outside_the_api(self):
+        self.make_checklist()
+        ChecklistItem.objects.bulk_create(build_checklist_items(CompletedChecklist.objects.get()))
+        self.assertEqual(self.stats()['totals']['checklists'], 0)
+
+        out = io.StringIO()
+        call_command('rebuild_checklist_rollups', stdout=out)
+
+        self.assertIn('Linhas de resumo gravadas: 4', out.getvalue())
+        self.assertEqual(
+            self.stats()['totals'],
+            {'checklists': 1, 'approved': 0, 'rejected': 0, 'pending': 1, 'rejected_items': 1},
+        )
+
+    def test_stats_window_and_query_count(self):
+        self.create('chk-a')
+        long_ago = (timezone.localdate() - timedelta(days=90)).isoformat()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/checklists/stats/checklists/', {'date_from': long_ago, 'date_to': long_ago}
+            )
+
+        self.assertEqual(response.data['totals']['checklists'], 0)
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(
+            self.client.get('/api/checklists/stats/checklists/', {'date_from': 'ontem'}).status_code, 400
+        )
+
+
+class ConditionalGetTests(ChecklistTestCase):
+
+    def assertNotModified(self, url, etag, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **extra)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        # Decided from one aggregate, without loading the rows
+        self.assertEqual(len(queries), 1)
+
+    def test_detail_revalidates_until_the_checklist_changes(self):
+        self.make_checklist()
+        first = self.client.get('/api/checklists/chk-1/')
+        etag = first['ETag']
+
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', first)
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertNotModified('/api/checklists/chk-1/', etag)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.patch('/api/checklists/chk-1/', {'general_observations': 'Farol queimado'}, format='json')
+        response = self.client.get('/api/checklists/chk-1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['general_observations'], 'Farol queimado')
+
+    def test_columns_changed_without_updated_at_change_the_etag(self):
+        checklist = self.make_checklist()
+        etag = self.client.get('/api/checklists/').get('ETag')
+
+        record_download(checklist.id)
+
+        self.assertEqual(self.client.get('/api/checklists/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_follows_deletes_and_query(self):
+        self.make_checklist('chk-1')
+        self.make_checklist('chk-2')
+        etag = self.client.get('/api/checklists/')['ETag']
+
+        self.assertNotModified('/api/checklists/', etag)
+        self.assertNotIn('Last-Modified', self.client.get('/api/checklists/'))
+        self.assertNotEqual(self.client.get('/api/checklists/', {'fields': 'id'})['ETag'], etag)
+
+        CompletedChecklist.objects.filter(external_id='chk-2').delete()
+        self.assertEqual(self.client.get('/api/checklists/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_vehicles(self):
+        for url in ('/api/vehicles/', f'/api/vehicles/{self.vehicle.pk}/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertNotModified(url, etag)
+
+        self.assertEqual(self.client.get('/api/vehicles/999999/').status_code, 404)
+        # Same rows, other user: the ETag is per user
+        etag = self.client.get('/api/vehicles/')['ETag']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='outro', password='senha-teste'))
+        self.assertEqual(other.get('/api/vehicles/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TemplateCacheTests(ChecklistTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.template = ChecklistTemplate.objects.create(
+            name='Saída de viagem', items=[{'id': 'q1', 'text': 'Freios'}], created_by=self.user
+        )
+
+    def test_hot_reads_skip_database_and_serializer(self):
+        first = self.client.get('/api/checklists/templates/')
+
+        with self.assertNumQueries(0), \
+                mock.patch.object(ChecklistTemplateSerializer, 'to_representation') as to_representation:
+            second = self.client.get('/api/checklists/templates/')
+
+        to_representation.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(json.loads(second.content)['results'][0]['items'], [{'id': 'q1', 'text': 'Freios'}])
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_serves_precompressed_body_and_304(self):
+        plain = self.client.get(f'/api/checklists/templates/{self.template.pk}/')
+        compressed = self.client.get(f'/api/checklists/templates/{self.template.pk}/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        not_modified = self.client.get(
+            f'/api/checklists/templates/{self.template.pk}/', HTTP_IF_NONE_MATCH=plain['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_save_and_delete_invalidate(self):
+        etag = self.client.get('/api/checklists/templates/')['ETag']
+        self.template.name = 'Chegada'
+        self.template.save()
+
+        response = self.client.get('/api/checklists/templates/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'][0]['name'], 'Chegada')
+
+        self.client.delete(f'/api/checklists/templates/{self.template.pk}/')
+        self.assertEqual(self.client.get(f'/api/checklists/templates/{self.template.pk}/').status_code, 404)
+        self.assertEqual(json.loads(self.client.get('/api/checklists/templates/').content)['results'], [])
+
+    def test_other_processes_see_the_new_version(self):
+        self.client.get('/api/checklists/templates/')
+        stale = get_template_cache()
+        version = stale.version()
+
+        ChecklistTemplate.objects.create(name='Chegada', created_by=self.user)
+
+        self.assertNotEqual(TemplateCache(max_entries=8, timeout=60).version(), version)
+        self.assertIsNone(stale.get(stale.version(), '/api/checklists/templates/'))
+
+
+class ChecklistIdTests(ChecklistTestCase):
+
+    def test_ids_are_time_ordered_uuid7(self):
+        ids = [uuid7() for _ in range(1000)]
+
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual({value.version for value in ids}, {7})
+        self.assertLess(uuid7(1_000), uuid7(2_000))
+
+    def test_create_returns_server_id_and_keeps_client_id(self):
+        payload = {
+            'id': 'chk-client-1',
+            'vehicle': self.vehicle.id,
+            'final_status': 'approved',
+            'questions': [{'id': 'q1', 'text': 'Freios', 'status': 'approved'}],
+        }
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post('/api/checklists/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        checklist = CompletedChecklist.objects.get(external_id='chk-client-1')
+        self.assertEqual(response.data['id'], str(checklist.id))
+        self.assertEqual(response.data['external_id'], 'chk-client-1')
+
+    def test_detail_is_reachable_by_either_id(self):
+        checklist = self.make_checklist()
+
+        by_uuid = self.client.get(f'/api/checklists/{checklist.id}/')
+        by_external_id = self.client.get('/api/checklists/chk-1/')
+
+        self.assertEqual(by_uuid.status_code, 200)
+        self.assertEqual(by_uuid.data, by_external_id.data)
+
+
+class ChecklistSyncTests(ChecklistTestCase):
+
+    def payload(self, checklist_id, **kwargs):
+        data = {
+            'id': checklist_id,
+            'vehicle': self.vehicle.id,
+            'final_status': 'approved',
+            'questions': [
+                {'id': 'q1', 'text': 'Freios', 'status': 'approved'},
+                {'id': 'q2', 'text': 'Pneus', 'status': 'rejected', 'observations': 'pneu careca'},
+            ],
+        }
+        data.update(kwargs)
+        return data
+
+    def sync(self, *checklists):
+        return self.client.post('/api/checklists/sync/', {'checklists': list(checklists)}, format='json')
+
+    def test_batch_is_created_with_items_and_pdfs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.sync(self.payload('chk-off-1'), self.payload('chk-off-2'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created'])
+        checklist = CompletedChecklist.objects.get(external_id='chk-off-1')
+        self.assertEqual(checklist.idempotency_key, 'chk-off-1')
+        self.assertEqual(checklist.created_by, self.user)
+        self.assertEqual(
+            list(checklist.checklist_items.values_list('text', 'status', 'order')),
+            [('Freios', 'approved', 0), ('Pneus', 'rejected', 1)],
+        )
+        self.assertEqual(checklist.pdf_status, 'pending')
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            set(CompletedChecklist.objects.values_list('pdf_status', flat=True)), {'completed'}
+        )
+
+    def test_retry_reports_duplicates(self):
+        self.sync(self.payload('chk-off-1', idempotency_key='key-1'))
+
+        response = self.sync(
+            self.payload('chk-off-1b', idempotency_key='key-1'),
+            self.payload('chk-off-2'),
+            self.payload('chk-off-2'),
+        )
+
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['duplicate', 'created', 'duplicate'])
+        self.assertEqual(results[0]['id'], self.checklist_pk('chk-off-1'))
+        self.assertEqual(CompletedChecklist.objects.count(), 2)
+        self.assertEqual(ChecklistItem.objects.count(), 4)
+
+    def test_invalid_items_do_not_reject_the_batch(self):
+        self.make_checklist('chk-taken')
+
+        response = self.sync(
+            self.payload('chk-ok'),
+            self.payload('chk-bad', final_status='talvez'),
+            self.payload('chk-novehicle', vehicle=999999),
+            self.payload('chk-taken', idempotency_key='other'),
+        )
+
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'error', 'error', 'error'])
+        self.assertIn('final_status', results[1]['errors'])
+        self.assertIn('vehicle', results[2]['errors'])
+        self.assertIn('id', results[3]['errors'])
+        self.assertTrue(CompletedChecklist.objects.filter(external_id='chk-ok').exists())
+
+    def test_keys_are_scoped_to_the_user(self):
+        other = User.objects.create_user(username='outro', password='senha-teste')
+        self.make_checklist('chk-other', created_by=other, idempotency_key='key-1')
+
+        response = self.sync(self.payload('chk-mine', idempotency_key='key-1'))
+
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        # The day's first checklist creates its rollup rows; later ones update them
+        self.sync(self.payload('chk-warm-up'))
+        counts = []
+        for size in (1, 10):
+            batch = [self.payload(f'chk-{size}-{i}') for i in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.sync(*batch)
+            self.assertEqual(response.data['created'], size)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    @override_settings(CHECKLIST_SYNC_MAX_BATCH=2)
+    def test_rejects_malformed_and_oversized_batches(self):
+        self.assertEqual(self.client.post('/api/checklists/sync/', {}, format='json').status_code, 400)
+        response = self.sync(*[self.payload(f'chk-{i}') for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CompletedChecklist.objects.exists())
+
+
+class DownloadCounterTests(ChecklistTestCase):
+
+    def test_download_increments_total_and_daily_counters(self):
+        checklist = self.make_checklist()
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        updated_at = CompletedChecklist.objects.get(external_id='chk-1').updated_at
+
+        self.client.get('/api/checklists/chk-1/download/')
+        self.client.get('/api/checklists/chk-1/download/')
+
+        checklist.refresh_from_db()
+        self.assertEqual(checklist.download_count, 2)
+        self.assertEqual(checklist.updated_at, updated_at)
+        stat = ChecklistDownloadStat.objects.get(checklist=checklist, date=timezone.localdate())
+        self.assertEqual(stat.count, 2)
+
+    def test_not_modified_and_partial_responses_are_not_counted(self):
+        checklist = self.make_checklist()
+        render_checklist_pdf(self.checklist_pk('chk-1'))
+        etag = self.client.get('/api/checklists/chk-1/download/')['ETag']
+
+        self.client.get('/api/checklists/chk-1/download/', HTTP_IF_NONE_MATCH=etag)
+        self.client.get('/api/checklists/chk-1/download/', HTTP_RANGE='bytes=100-')
+
+        checklist.refresh_from_db()
+        self.assertEqual(checklist.download_count, 1)
+
+    def test_only_get_requests_are_countable(self):
+        response = HttpResponse(b'%PDF')
+        factory = RequestFactory()
+
+        self.assertTrue(is_countable_download(factory.get('/'), response))
+        self.assertFalse(is_countable_download(factory.head('/'), response))
+
+    def test_stale_instances_do_not_lose_increments(self):
+        self.make_checklist()
+        first = CompletedChecklist.objects.get(external_id='chk-1')
+        second = CompletedChecklist.objects.get(external_id='chk-1')
+
+        record_download(first.id)
+        record_download(second.id)
+
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').download_count, 2)
+
+    def test_buffer_flushes_in_batches(self):
+        self.make_checklist()
+        buffer = DownloadCounterBuffer(flush_size=3, flush_interval=3600)
+        today = timezone.localdate()
+
+        checklist_id = str(self.checklist_pk('chk-1'))
+        buffer.add(checklist_id, today)
+        buffer.add(checklist_id, today)
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').download_count, 0)
+
+        buffer.add(checklist_id, today)
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-1').download_count, 3)
+        self.assertEqual(ChecklistDownloadStat.objects.get(checklist__external_id='chk-1').count, 3)
+
+    def test_daily_stats_endpoint(self):
+        checklist = self.make_checklist()
+        ChecklistDownloadStat.objects.create(checklist=checklist, date=timezone.localdate(), count=4)
+
+        response = self.client.get('/api/checklists/chk-1/download-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['daily'][0]['count'], 4)
+
+        response = self.client.get('/api/checklists/stats/downloads/')
+        self.assertEqual(response.data['total'], 4)
+
+
+class CompressedJSONTests(ChecklistTestCase):
+
+    def raw(self, checklist, field):
+        return bytes(
+            CompletedChecklist.objects.annotate(raw=Cast(field, BinaryField()))
+            .values_list('raw', flat=True).get(pk=checklist.pk)
+        )
+
+    def long_questions(self):
+        return [
+            {'id': f'q{i}', 'text': f'Item de verificação {i}', 'status': 'approved', 'observations': ''}
+            for i in range(40)
+        ]
+
+    def test_columns_are_stored_compressed_and_read_as_json(self):
+        questions = self.long_questions()
+        checklist = self.make_checklist(questions=questions, vehicle_images={})
+
+        raw = self.raw(checklist, 'questions')
+        self.assertEqual(stored_codec(raw), 'zlib')
+        self.assertLess(len(raw), len(json.dumps(questions)) / 4)
+        self.assertEqual(self.raw(checklist, 'vehicle_images'), b'{}')  # too small to be worth it
+        self.assertEqual(CompletedChecklist.objects.get(pk=checklist.pk).questions, questions)
+
+        response = self.client.patch(
+            f'/api/checklists/{checklist.pk}/', {'questions': questions[:2]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['questions'], questions[:2])
+        self.assertEqual(CompletedChecklist.objects.get(pk=checklist.pk).questions, questions[:2])
+
+    def test_json_lookups_are_refused(self):
+        with self.assertRaises(FieldError):
+            CompletedChecklist.objects.filter(questions__icontains='careca').count()
+        with self.assertRaises(FieldError):
+            CompletedChecklist.objects.filter(questions__0__status='approved').count()
+
+    def test_recompress_rewrites_only_rows_with_another_encoding(self):
+        with override_settings(COMPRESSED_JSON_LEVEL=1):
+            old = self.make_checklist('chk-1', questions=self.long_questions())
+        current = self.make_checklist('chk-2', questions=self.long_questions())
+        updated_at = old.updated_at
+
+        out = io.StringIO()
+        call_command('recompress_checklist_json', chunk_size=1, stdout=out)
+
+        self.assertIn('1 de 2 checklists regravados', out.getvalue())
+        self.assertEqual(self.raw(old, 'questions'), self.raw(current, 'questions'))
+        self.assertEqual(self.raw(old, 'questions'), compress_json(self.long_questions()))
+        old.refresh_from_db()
+        self.assertEqual(old.questions, self.long_questions())
+        self.assertEqual(old.updated_at, updated_at)
+
+        out = io.StringIO()
+        call_command('recompress_checklist_json', stdout=out)
+        self.assertIn('0 de 2 checklists regravados', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, PDF_STORAGE_ROOT=TEST_PDF_ROOT)
+class ConcurrentDownloadCounterTests(TransactionTestCase):
+    threads_count = 8
+    per_thread = 25
+
+    def setUp(self):
+        user = User.objects.create_user(username='concorrente', password='senha-teste')
+        vehicle = Vehicle.objects.create(
+            plate='XYZ9876', model='Actros', brand='Mercedes', year=2021,
+            vehicle_type='truck', created_by=user,
+        )
+        self.checklist = CompletedChecklist.objects.create(external_id='chk-concurrent', vehicle=vehicle, created_by=user)
+
+    def run_concurrently(self, func, repeat=None):
+        barrier = threading.Barrier(self.threads_count)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(repeat or self.per_thread):
+                    func()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_buffered_increments_from_concurrent_threads(self):
+        buffer = DownloadCounterBuffer(flush_size=10 ** 6, flush_interval=3600)
+        today = timezone.localdate()
+
+        self.run_concurrently(lambda: buffer.add(str(self.checklist.id), today))
+        buffer.flush()
+
+        checklist = CompletedChecklist.objects.get(external_id='chk-concurrent')
+        self.assertEqual(checklist.download_count, self.threads_count * self.per_thread)
+
+    def test_idle_buffer_is_flushed_by_its_timer(self):
+        buffer = DownloadCounterBuffer(flush_size=10 ** 6, flush_interval=0.05)
+        buffer.add(str(self.checklist.id), timezone.localdate())
+        buffer.start()
+        self.addCleanup(buffer.stop)
+
+        deadline = time.monotonic() + 5
+        while buffer._pending_total and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(buffer._pending_total, 0)  # taken by the timer, not by stop()
+        buffer.stop()  # waits for that flush to finish writing
+        self.assertEqual(CompletedChecklist.objects.get(external_id='chk-concurrent').download_count, 1)
+
+    def test_no_lost_increments_from_stale_readers(self):
+        # Every thread reads the row before any of them writes, as
+        # read-modify-write code would. The shared in-memory SQLite database
+        # takes one statement at a time, hence the lock around each one.
+        lock = threading.Lock()
+        everyone_read = threading.Barrier(self.threads_count)
+
+        def worker():
+            with lock:
+                stale = CompletedChecklist.objects.get(pk=self.checklist.pk)
+            everyone_read.wait()
+            for _ in range(self.per_thread):
+                with lock:
+                    record_download(stale.pk)
+            self.assertEqual(stale.download_count, 0)
+
+        self.run_concurrently(worker, repeat=1)
+
+        expected = self.threads_count * self.per_thread
+        checklist = CompletedChecklist.objects.get(external_id='chk-concurrent')
+        self.assertEqual(checklist.download_count, expected)
+        self.assertEqual(checklist.download_stats.get().count, expected)
+
+    def test_stale_instances_do_not_overwrite_each_other(self):
+        first = CompletedChecklist.objects.get(pk=self.checklist.pk)
+        second = CompletedChecklist.objects.get(pk=self.checklist.pk)
+
+        for _ in range(3):
+            record_download(first.pk)
+            record_download(second.pk)
+
+        first.refresh_from_db()
+        self.assertEqual((first.download_count, second.download_count), (6, 0))
+        self.assertEqual(first.download_stats.get().count, 6)
+
+    @skipIf(connection.vendor == 'sqlite', 'SQLite does not allow concurrent writers')
+    def test_no_lost_increments_under_concurrent_requests(self):
+        self.run_concurrently(lambda: record_download(self.checklist.id))
+
+        expected = self.threads_count * self.per_thread
+        checklist = CompletedChecklist.objects.get(external_id='chk-concurrent')
+        self.assertEqual(checklist.download_count, expected)
+        self.assertEqual(checklist.download_stats.get().count, expected)
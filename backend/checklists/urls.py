@@ -6,9 +6,33 @@ urlpatterns = [
     path('templates/', views.ChecklistTemplateListCreateView.as_view(), name='template-list'),
     path('templates/<int:pk>/', views.ChecklistTemplateDetailView.as_view(), name='template-detail'),
     
+    # Download statistics
+    path('stats/downloads/', views.download_stats, name='checklist-download-stats-all'),
+
+    # Dashboard and report counts (daily rollups)
+    path('stats/checklists/', views.checklist_stats, name='checklist-stats'),
+
+    # Signed PDF links (no session required)
+    path('files/<str:checklist_id>/<str:filename>', views.download_signed_pdf, name='checklist-signed-file'),
+
+    # Bulk export
+    path('export/', views.export_checklists_zip, name='checklist-export'),
+
+    # Full-text search
+    path('search/', views.search_checklists, name='checklist-search'),
+
+    # Item-level reporting
+    path('items/report/', views.checklist_item_report, name='checklist-item-report'),
+
+    # Offline batch upload
+    path('sync/', views.sync_checklists, name='checklist-sync'),
+
     # Completed checklists
     path('', views.CompletedChecklistListCreateView.as_view(), name='checklist-list'),
     path('<str:pk>/', views.CompletedChecklistDetailView.as_view(), name='checklist-detail'),
     path('<str:checklist_id>/download/', views.download_checklist_pdf, name='checklist-download'),
     path('<str:checklist_id>/download-info/', views.checklist_download_info, name='checklist-download-info'),
+    path('<str:checklist_id>/download-stats/', views.checklist_download_stats, name='checklist-download-stats'),
+    path('<str:checklist_id>/status/', views.checklist_status, name='checklist-status'),
+    path('<str:checklist_id>/retry/', views.retry_checklist_pdf, name='checklist-retry'),
 ]
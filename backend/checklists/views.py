@@ -2,22 +2,56 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import ChecklistTemplate, CompletedChecklist
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+from .models import (
+    ChecklistDailyInspectorStat,
+    ChecklistDailyItemStat,
+    ChecklistDailyTemplateStat,
+    ChecklistDailyVehicleStat,
+    ChecklistDownloadStat,
+    ChecklistItem,
+    ChecklistTemplate,
+    CompletedChecklist,
+)
 from .serializers import (
     ChecklistTemplateSerializer, 
     CompletedChecklistSerializer, 
-    ChecklistCreateSerializer
+    CompletedChecklistSummarySerializer,
+    ChecklistCreateSerializer,
+    ChecklistSearchResultSerializer,
 )
 from .pdf_generator import generate_checklist_pdf_response
+from .tasks import enqueue_checklist_pdf, refresh_checklist_pdf, render_checklist_pdf
+from .pdf_storage import is_pdf_current
+from .downloads import serve_file
+from .counters import record_download, is_countable_download
+from .exports import export_queryset, stream_checklist_zip
+from .ids import checklist_lookup
+from .items import ITEM_STATUSES
+from .rollups import apply_rollup_deltas, checklist_rollup_deltas
+from .search import ChecklistSearchResults, is_searchable
+from .signed_urls import sign_pdf_url, signed_pdf_name, verify_pdf_signature
+from .template_cache import TemplateCacheMixin
+from . import sync
+from rodocheck_backend.conditional import ConditionalGetMixin
+from rodocheck_backend.pagination import CreatedAtCursorPagination, RankedPagination
+from rodocheck_backend.sparse_fields import SparseFieldsetsViewMixin, sparse_queryset
 import logging
 
 logger = logging.getLogger('rodocheck')
 
 
-class ChecklistTemplateListCreateView(generics.ListCreateAPIView):
-    """List and create checklist templates."""
-    queryset = ChecklistTemplate.objects.filter(is_active=True)
+class ChecklistTemplateListCreateView(TemplateCacheMixin, generics.ListCreateAPIView):
+    """List and create checklist templates (reads served from the template cache)."""
+    queryset = ChecklistTemplate.objects.filter(is_active=True).select_related('created_by').order_by('name')
     serializer_class = ChecklistTemplateSerializer
     permission_classes = [IsAuthenticated]
 
@@ -25,90 +59,112 @@ class ChecklistTemplateListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class ChecklistTemplateDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """Retrieve, update or delete checklist template."""
-    queryset = ChecklistTemplate.objects.all()
+class ChecklistTemplateDetailView(TemplateCacheMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve, update or delete checklist template (reads served from the template cache)."""
+    queryset = ChecklistTemplate.objects.select_related('created_by')
     serializer_class = ChecklistTemplateSerializer
     permission_classes = [IsAuthenticated]
 
 
-class CompletedChecklistListCreateView(generics.ListCreateAPIView):
+# PDF columns and download counts change without touching updated_at, and
+# the payload carries the vehicle and the inspector (or their names)
+CHECKLIST_VERSION_FIELDS = [
+    'updated_at', 'pdf_status_changed_at', 'download_count', 'vehicle__updated_at', 'created_by__updated_at',
+]
+
+
+class CompletedChecklistListCreateView(ConditionalGetMixin, SparseFieldsetsViewMixin, generics.ListCreateAPIView):
     """List and create completed checklists."""
-    serializer_class = CompletedChecklistSerializer
+    serializer_class = CompletedChecklistSummarySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    conditional_page_fields = ['id', 'created_at', *CHECKLIST_VERSION_FIELDS]
 
     def get_queryset(self):
-        return CompletedChecklist.objects.filter(created_by=self.request.user)
+        return CompletedChecklist.objects.filter(
+            created_by=self.request.user
+        ).select_related('vehicle', 'created_by')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ChecklistCreateSerializer
-        return CompletedChecklistSerializer
+        return CompletedChecklistSummarySerializer
 
     def perform_create(self, serializer):
         checklist = serializer.save()
-        # Generate PDF automatically
-        try:
-            from .pdf_generator import ChecklistPDFGenerator
-            generator = ChecklistPDFGenerator()
-            pdf_content = generator.generate_pdf(checklist)
-            
-            # Save PDF to file
-            import os
-            from django.core.files.base import ContentFile
-            
-            pdf_filename = f"checklist_{checklist.id}.pdf"
-            checklist.pdf_file.save(pdf_filename, ContentFile(pdf_content))
-            checklist.is_pdf_generated = True
-            checklist.save()
-            
-        except Exception as e:
-            logger.error(f"Error generating PDF for checklist {checklist.id}: {e}")
-            # Continue without PDF generation
-
-
-class CompletedChecklistDetailView(generics.RetrieveUpdateDestroyAPIView):
+        # PDF rendering happens in the background; see checklists.tasks
+        enqueue_checklist_pdf(checklist.id)
+
+
+class CompletedChecklistDetailView(ConditionalGetMixin, SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete completed checklist."""
     serializer_class = CompletedChecklistSerializer
     permission_classes = [IsAuthenticated]
+    conditional_aggregates = {
+        **{field: Max(field) for field in CHECKLIST_VERSION_FIELDS},
+        'count': Count('pk'),
+    }
 
     def get_queryset(self):
-        return CompletedChecklist.objects.filter(created_by=self.request.user)
+        return CompletedChecklist.objects.filter(
+            created_by=self.request.user
+        ).select_related('vehicle', 'template', 'created_by').prefetch_related('checklist_items')
+
+    def get_object(self):
+        # The URL may carry the checklist id or the client's own id
+        obj = get_object_or_404(self.filter_queryset(self.get_queryset()), checklist_lookup(self.kwargs['pk']))
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset()).filter(checklist_lookup(self.kwargs['pk']))
+
+    def perform_update(self, serializer):
+        checklist = serializer.save()
+        # Re-render only if something that appears in the PDF changed
+        refresh_checklist_pdf(checklist)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deltas = checklist_rollup_deltas(instance, sign=-1)
+            instance.delete()
+            apply_rollup_deltas(deltas)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def download_checklist_pdf(request, checklist_id):
     """Download checklist PDF."""
-    checklist = get_object_or_404(CompletedChecklist, id=checklist_id, created_by=request.user)
+    checklist = get_object_or_404(
+        CompletedChecklist.objects.select_related('vehicle', 'template', 'created_by'),
+        checklist_lookup(checklist_id),
+        created_by=request.user,
+    )
     
-    # Increment download count
-    checklist.download_count += 1
-    checklist.save()
-    
-    # Generate PDF if not exists
-    if not checklist.is_pdf_generated or not checklist.pdf_file:
-        try:
-            from .pdf_generator import ChecklistPDFGenerator
-            generator = ChecklistPDFGenerator()
-            pdf_content = generator.generate_pdf(checklist)
-            
-            from django.core.files.base import ContentFile
-            pdf_filename = f"checklist_{checklist.id}.pdf"
-            checklist.pdf_file.save(pdf_filename, ContentFile(pdf_content))
-            checklist.is_pdf_generated = True
-            checklist.save()
-            
-        except Exception as e:
-            logger.error(f"Error generating PDF for checklist {checklist.id}: {e}")
+    # Generate PDF if missing or stale (vehicle, template or checklist edited)
+    if not is_pdf_current(checklist):
+        if not render_checklist_pdf(checklist.id, force=True):
+            checklist.refresh_from_db()
+            if checklist.pdf_status == 'processing':
+                return Response({
+                    'error': 'PDF em processamento. Tente novamente em instantes.',
+                    'pdf_status': checklist.pdf_status,
+                }, status=status.HTTP_202_ACCEPTED)
             return Response({
                 'error': 'Erro ao gerar PDF do checklist.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        checklist.refresh_from_db()
     
     # Return PDF file
     if checklist.pdf_file:
-        response = HttpResponse(checklist.pdf_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="checklist_{checklist.id}.pdf"'
+        response = serve_file(
+            request,
+            checklist.pdf_file,
+            filename=f"checklist_{checklist.reference}.pdf",
+            fallback_modified=checklist.updated_at,
+        )
+        if is_countable_download(request, response):
+            record_download(checklist.id)
         return response
     else:
         return Response({
@@ -116,16 +172,355 @@ def download_checklist_pdf(request, checklist_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+def _date_filters(request):
+    filters = {}
+    for param in ('date_from', 'date_to'):
+        value = request.query_params.get(param)
+        if value:
+            filters[param] = parse_date(value) if len(value) == 10 else None
+            if filters[param] is None:
+                return None, Response({
+                    'error': f'Data inválida em {param}. Use o formato AAAA-MM-DD.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+    return filters, None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_checklists_zip(request):
+    """Download the PDFs of several checklists as a single streamed ZIP."""
+    filters, error = _date_filters(request)
+    if error:
+        return error
+
+    queryset = export_queryset(
+        request.user,
+        vehicle_id=request.query_params.get('vehicle'),
+        **filters,
+    )
+
+    total = queryset.count()
+    if not total:
+        return Response({
+            'error': 'Nenhum checklist encontrado para os filtros informados.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    if total > settings.PDF_EXPORT_MAX_CHECKLISTS:
+        return Response({
+            'error': f'Exportação limitada a {settings.PDF_EXPORT_MAX_CHECKLISTS} checklists. '
+                     'Reduza o período ou filtre por veículo.',
+            'total': total,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    period = '_'.join(str(filters[key]) for key in ('date_from', 'date_to') if key in filters)
+    response = StreamingHttpResponse(
+        stream_checklist_zip(queryset.iterator(chunk_size=100)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="checklists{"_" + period if period else ""}.zip"'
+    response['X-Checklist-Count'] = str(total)
+    # The archive is produced on the fly; nginx must not buffer it to disk first
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_checklists(request):
+    """
+    Full-text search over observations and item text (``?q=pneu careca``).
+
+    Results are ranked by relevance and paginated with ``?page=``; quoted
+    terms match as a phrase.
+    """
+    text = request.query_params.get('q', '').strip()
+    if not is_searchable(text):
+        return Response({
+            'error': 'Informe o termo de busca em "q".'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    context = {'request': request}
+    queryset = sparse_queryset(
+        CompletedChecklist.objects.select_related('vehicle', 'created_by'),
+        ChecklistSearchResultSerializer(context=context),
+    )
+    paginator = RankedPagination()
+    page = paginator.paginate_queryset(ChecklistSearchResults(queryset, request.user, text), request)
+    serializer = ChecklistSearchResultSerializer(page, many=True, context=context)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def checklist_item_report(request):
+    """
+    Count checklist items by vehicle, e.g. which vehicles had brake items
+    rejected last month (``?status=rejected&text=freio&date_from=...``).
+
+    Runs on the ``ChecklistItem`` rows, not on the questions JSON.
+    """
+    item_status = request.query_params.get('status', 'rejected')
+    if item_status not in ITEM_STATUSES:
+        return Response({
+            'error': f'Status inválido. Use um de: {", ".join(sorted(ITEM_STATUSES))}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    filters, error = _date_filters(request)
+    if error:
+        return error
+
+    items = ChecklistItem.objects.filter(status=item_status, checklist__created_by=request.user)
+    if request.query_params.get('key'):
+        items = items.filter(key=request.query_params['key'])
+    if request.query_params.get('text'):
+        items = items.filter(text__icontains=request.query_params['text'])
+    if request.query_params.get('vehicle'):
+        items = items.filter(checklist__vehicle_id=request.query_params['vehicle'])
+    if 'date_from' in filters:
+        items = items.filter(checklist__created_at__date__gte=filters['date_from'])
+    if 'date_to' in filters:
+        items = items.filter(checklist__created_at__date__lte=filters['date_to'])
+
+    vehicles = list(
+        items.values(vehicle=F('checklist__vehicle_id'), plate=F('checklist__vehicle__plate'))
+        .annotate(
+            items=Count('id'),
+            checklists=Count('checklist', distinct=True),
+            last_checklist_at=Max('checklist__created_at'),
+        )
+        .order_by('-items', 'plate')
+    )
+
+    return Response({
+        'status': item_status,
+        'total_items': sum(row['items'] for row in vehicles),
+        'vehicles': vehicles,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_checklists(request):
+    """
+    Upload a batch of checklists recorded offline.
+
+    Safe to retry: checklists whose idempotency key was already uploaded are
+    reported as duplicates instead of being created again. Each item gets
+    its own result, so one invalid checklist doesn't reject the batch.
+    """
+    checklists = request.data.get('checklists') if isinstance(request.data, dict) else None
+    if not isinstance(checklists, list):
+        return Response({
+            'error': 'Envie os checklists em uma lista no campo "checklists".'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(checklists) > settings.CHECKLIST_SYNC_MAX_BATCH:
+        return Response({
+            'error': f'Envie no máximo {settings.CHECKLIST_SYNC_MAX_BATCH} checklists por vez.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = sync.sync_checklists(request.user, checklists)
+    return Response({
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'duplicates': sum(1 for result in results if result['status'] == 'duplicate'),
+        'errors': sum(1 for result in results if result['status'] == 'error'),
+        'results': results,
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def checklist_download_info(request, checklist_id):
     """Get checklist download information."""
-    checklist = get_object_or_404(CompletedChecklist, id=checklist_id, created_by=request.user)
+    checklist = get_object_or_404(
+        CompletedChecklist.objects.select_related('vehicle', 'template', 'created_by'),
+        checklist_lookup(checklist_id),
+        created_by=request.user,
+    )
+    
+    signed_url = signed_url_expires_at = None
+    if is_pdf_current(checklist):
+        path, expires = sign_pdf_url(checklist.id, checklist.pdf_file.name)
+        if path:
+            signed_url = request.build_absolute_uri(path)
+            signed_url_expires_at = datetime.fromtimestamp(expires, tz=dt_timezone.utc)
     
     return Response({
         'id': checklist.id,
+        'external_id': checklist.external_id,
         'is_pdf_generated': checklist.is_pdf_generated,
         'download_count': checklist.download_count,
-        'pdf_url': checklist.pdf_file.url if checklist.pdf_file else None,
+        'signed_url': signed_url,
+        'signed_url_expires_at': signed_url_expires_at,
         'created_at': checklist.created_at,
     })
+
+
+@require_safe
+def download_signed_pdf(request, checklist_id, filename):
+    """
+    Serve a checklist PDF from a signed, expiring URL.
+
+    The signature is the authorization: no session, token or database lookup
+    is needed, so in production this only validates the URL and hands the
+    file to nginx via X-Accel-Redirect.
+    """
+    name = signed_pdf_name(checklist_id, filename)
+    error = verify_pdf_signature(
+        checklist_id, name, request.GET.get('expires'), request.GET.get('signature')
+    )
+    if error == 'expired':
+        return JsonResponse({'error': 'Link de download expirado.'}, status=410)
+    if error:
+        return JsonResponse({'error': 'Link de download inválido.'}, status=403)
+
+    field = CompletedChecklist._meta.get_field('pdf_file')
+    pdf_file = field.attr_class(None, field, name)
+    try:
+        response = serve_file(request, pdf_file, filename=f"checklist_{checklist_id}.pdf")
+    except FileNotFoundError:
+        return JsonResponse({'error': 'PDF não encontrado.'}, status=404)
+
+    if is_countable_download(request, response):
+        record_download(checklist_id)
+    return response
+
+
+def _parse_days(request, default=30, maximum=366):
+    try:
+        days = int(request.query_params.get('days', default))
+    except (TypeError, ValueError):
+        days = default
+    return max(1, min(days, maximum))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def checklist_download_stats(request, checklist_id):
+    """Get per-day download counts for a checklist."""
+    checklist = get_object_or_404(CompletedChecklist, checklist_lookup(checklist_id), created_by=request.user)
+    since = timezone.localdate() - timedelta(days=_parse_days(request) - 1)
+
+    daily = checklist.download_stats.filter(date__gte=since).order_by('date')
+
+    return Response({
+        'id': checklist.id,
+        'download_count': checklist.download_count,
+        'daily': [{'date': stat.date, 'count': stat.count} for stat in daily],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_stats(request):
+    """Get per-day download counts across the user's checklists."""
+    since = timezone.localdate() - timedelta(days=_parse_days(request) - 1)
+
+    daily = (
+        ChecklistDownloadStat.objects
+        .filter(checklist__created_by=request.user, date__gte=since)
+        .values('date')
+        .annotate(count=Sum('count'))
+        .order_by('date')
+    )
+
+    return Response({
+        'total': sum(row['count'] for row in daily),
+        'daily': list(daily),
+    })
+
+
+ROLLUP_COUNTS = ['checklists', 'approved', 'rejected', 'pending', 'rejected_items']
+ROLLUP_TOP_ITEMS = 20
+
+
+def _rollup_totals(queryset, *group_by, **columns):
+    # Rows emptied by deletes are left in place; skip them
+    return (
+        queryset.values(*group_by, **columns)
+        .annotate(**{field: Sum(field) for field in ROLLUP_COUNTS})
+        .exclude(checklists=0)
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def checklist_stats(request):
+    """
+    Checklist counts for the dashboard and reports: totals, per day, per
+    vehicle, per template and the most rejected items.
+
+    The period is ``?date_from=&date_to=`` or the last ``?days=`` (30 by
+    default). Answers come from the daily rollups (see
+    ``checklists.rollups``), never from the checklists themselves.
+    """
+    filters, error = _date_filters(request)
+    if error:
+        return error
+    date_to = filters.get('date_to') or timezone.localdate()
+    date_from = filters.get('date_from') or date_to - timedelta(days=_parse_days(request) - 1)
+    window = {'inspector': request.user, 'date__gte': date_from, 'date__lte': date_to}
+
+    daily = list(_rollup_totals(ChecklistDailyInspectorStat.objects.filter(**window), 'date').order_by('date'))
+    vehicles = list(
+        _rollup_totals(
+            ChecklistDailyVehicleStat.objects.filter(**window), 'vehicle', plate=F('vehicle__plate')
+        ).order_by('-checklists', 'plate')
+    )
+    templates = list(
+        _rollup_totals(
+            ChecklistDailyTemplateStat.objects.filter(**window), 'template', name=F('template__name')
+        ).order_by('-checklists', 'name')
+    )
+    rejected_items = list(
+        ChecklistDailyItemStat.objects.filter(**window)
+        .values('key', 'text')
+        .annotate(rejected=Sum('rejected'))
+        .exclude(rejected=0)
+        .order_by('-rejected', 'text')[:ROLLUP_TOP_ITEMS]
+    )
+
+    return Response({
+        'date_from': date_from,
+        'date_to': date_to,
+        'totals': {field: sum(row[field] for row in daily) for field in ROLLUP_COUNTS},
+        'daily': daily,
+        'vehicles': vehicles,
+        'templates': templates,
+        'rejected_items': rejected_items,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def checklist_status(request, checklist_id):
+    """Get the background PDF rendering status of a checklist."""
+    checklist = get_object_or_404(CompletedChecklist, checklist_lookup(checklist_id), created_by=request.user)
+
+    return Response({
+        'id': checklist.id,
+        'pdf_status': checklist.pdf_status,
+        'is_pdf_generated': checklist.is_pdf_generated,
+        'pdf_attempts': checklist.pdf_attempts,
+        'pdf_error': checklist.pdf_error,
+        'pdf_status_changed_at': checklist.pdf_status_changed_at,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def retry_checklist_pdf(request, checklist_id):
+    """Re-queue PDF rendering for a checklist."""
+    checklist = get_object_or_404(CompletedChecklist, checklist_lookup(checklist_id), created_by=request.user)
+
+    if checklist.pdf_status == 'processing':
+        return Response({
+            'error': 'PDF já está em processamento.',
+            'pdf_status': checklist.pdf_status,
+        }, status=status.HTTP_409_CONFLICT)
+
+    enqueue_checklist_pdf(checklist.id)
+    checklist.refresh_from_db()
+
+    return Response({
+        'id': checklist.id,
+        'pdf_status': checklist.pdf_status,
+        'is_pdf_generated': checklist.is_pdf_generated,
+    }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,109 @@
+"""
+Campo JSON comprimido para as colunas grandes do RodoCheck.
+Este módulo define ``CompressedJSONField``, um ``JSONField`` gravado como
+bytes comprimidos (zlib, ou zstd com o pacote ``zstandard``) numa coluna
+binária. Para o ORM, os serializers e o admin ele se comporta como um
+``JSONField``; o banco só vê bytes, então não há consultas por chave ou
+conteúdo do JSON (``__contains``, ``__icontains``, ``questions__0__status``).
+"""
+
+import json
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models import expressions
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional
+    zstandard = None
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Primeiro byte de um fluxo zlib com a janela padrão (32 KB)
+ZLIB_MAGIC = 0x78
+# Abaixo disso ('[]', '{}', poucas chaves) a compressão aumentaria o valor
+MIN_COMPRESS_BYTES = 64
+# Os padrões das próprias bibliotecas
+DEFAULT_LEVELS = {'zlib': 6, 'zstd': 3}
+
+
+def stored_codec(data):
+    """Formato de um valor gravado: 'zstd', 'zlib' ou 'json' (sem compressão)."""
+    data = bytes(data)
+    if data.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    if data[:1] == bytes([ZLIB_MAGIC]):
+        return 'zlib'
+    return 'json'
+
+
+def compress_json(value, encoder=None, codec=None, level=None):
+    """
+    Serializa ``value`` em JSON compacto e comprime com ``codec``
+    (padrão: ``COMPRESSED_JSON_CODEC``). O formato se identifica pelos
+    primeiros bytes, então trocar o codec não exige converter as linhas.
+    """
+    data = json.dumps(value, cls=encoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) < MIN_COMPRESS_BYTES:
+        return data
+    codec = codec or settings.COMPRESSED_JSON_CODEC
+    if level is None:
+        level = settings.COMPRESSED_JSON_LEVEL or DEFAULT_LEVELS.get(codec)
+    if codec == 'zlib':
+        return zlib.compress(data, level)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured("COMPRESSED_JSON_CODEC='zstd' requer o pacote zstandard")
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ImproperlyConfigured(f'COMPRESSED_JSON_CODEC desconhecido: {codec!r}')
+
+
+def decompress_json(data, decoder=None):
+    """Inverso de ``compress_json``; aceita qualquer formato gravado."""
+    data = bytes(data)
+    codec = stored_codec(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured('Valor comprimido com zstd, mas o pacote zstandard não está instalado')
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == 'zlib':
+        data = zlib.decompress(data)
+    return json.loads(data, cls=decoder)
+
+
+class CompressedJSONField(models.JSONField):
+    """
+    ``JSONField`` gravado comprimido numa coluna binária (``bytea``/``BLOB``).
+
+    Só aceita as consultas ``isnull``: chaves e conteúdo do JSON não são
+    visíveis para o banco.
+    """
+    description = 'JSON comprimido'
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress_json(value, self.decoder)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if isinstance(value, expressions.Value) and isinstance(value.output_field, models.JSONField):
+            value = value.value
+        elif hasattr(value, 'as_sql'):
+            return value
+        return connection.Database.Binary(compress_json(value, self.encoder))
+
+    def get_transform(self, name):
+        # Sem KeyTransform: ``questions__0`` não existe numa coluna binária
+        return models.Field.get_transform(self, name)
+
+    def get_lookup(self, lookup_name):
+        if lookup_name != 'isnull':
+            return None
+        return super().get_lookup(lookup_name)
@@ -0,0 +1,102 @@
+"""
+GET condicional (ETag / Last-Modified) para a API do RodoCheck.
+Este módulo decide se a resposta mudou a partir de uma agregação barata
+(``Max(updated_at)``, ``Count``) sobre as linhas que a view devolveria, antes
+de carregar os objetos e serializar o payload; se o cliente já tem essa
+versão (``If-None-Match``), a resposta é um 304 sem corpo.
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Mixin de view genérica (lista ou detalhe) com ETag e 304.
+
+    - ``conditional_aggregates`` são agregações sobre o queryset da view
+      cujo resultado muda sempre que o payload muda (por padrão
+      ``Max('updated_at')`` e ``Count('pk')``, que pega exclusões); views
+      cujo payload tem colunas atualizadas sem ``updated_at`` ou dados de
+      outras tabelas acrescentam as suas;
+    - listas paginadas por cursor, que não fazem COUNT(*), definem
+      ``conditional_page_fields``: a validação lê só essas colunas (leves)
+      das linhas da página pedida, com o mesmo custo constante da página;
+    - a ETag (fraca) combina esse resultado com a URL completa (inclui
+      ``?fields=``, cursor etc.), o formato e o usuário;
+    - no detalhe também vai ``Last-Modified`` (o maior timestamp agregado).
+      Na lista não: ``If-Modified-Since`` sozinho não perceberia exclusões.
+    """
+    conditional_aggregates = {
+        'updated_at': Max('updated_at'),
+        'count': Count('pk'),
+    }
+    conditional_page_fields = None
+
+    def is_detail_request(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail_request():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_values(self):
+        queryset = self.get_conditional_queryset()
+        if self.conditional_page_fields and not self.is_detail_request() and self.paginator is not None:
+            paginator = self.paginator
+            rows = paginator.paginate_queryset(queryset.values(*self.conditional_page_fields), self.request, view=self)
+            return {
+                'page': [tuple(row.values()) for row in rows],
+                'links': (paginator.get_next_link(), paginator.get_previous_link()),
+                'total': getattr(paginator, 'total', None),
+            }
+        return queryset.aggregate(**self.conditional_aggregates)
+
+    def get_conditional_validators(self):
+        """``(etag, last_modified)`` da resposta, ou ``None`` se não houver atalho."""
+        values = self.get_conditional_values()
+        detail = self.is_detail_request()
+        if detail and not values.get('count'):
+            # Não encontrado: o fluxo normal devolve o 404
+            return None
+
+        request = self.request
+        key = '|'.join([
+            request.get_full_path(),
+            getattr(request.accepted_renderer, 'format', ''),
+            str(request.user.pk),
+            *(f'{name}={values[name]!r}' for name in sorted(values)),
+        ])
+        etag = 'W/' + quote_etag(hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+        last_modified = None
+        if detail:
+            timestamps = [value for value in values.values() if isinstance(value, datetime)]
+            if timestamps:
+                last_modified = int(max(timestamps).timestamp())
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # O navegador guarda a resposta, mas revalida a cada uso
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
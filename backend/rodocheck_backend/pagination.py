@@ -0,0 +1,93 @@
+"""
+Paginação para o RodoCheck Backend.
+Este módulo implementa paginação por chave (keyset), contagem estimada e
+paginação numerada para resultados ordenados por relevância.
+"""
+
+import json
+import logging
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+logger = logging.getLogger('rodocheck')
+
+# Below this many estimated rows an exact COUNT(*) is cheap and more useful
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """
+    Número aproximado de linhas de um queryset.
+
+    No PostgreSQL usa a estimativa do planejador (EXPLAIN), que não percorre
+    a tabela; se a estimativa for pequena, ou em outros bancos, faz COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate >= EXACT_COUNT_THRESHOLD:
+                return estimate
+        except Exception as e:
+            logger.warning(f"Count estimate failed, falling back to COUNT(*): {e}")
+    return queryset.count()
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Paginação por cursor em ``(-created_at, -id)``.
+
+    Cada página é uma busca por faixa no índice, com custo constante em
+    qualquer profundidade, e não executa COUNT(*). O total (estimado) só é
+    calculado quando o cliente envia ``?with_count=true``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'with_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.total = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total is not None:
+            payload = {'count': self.total, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'example': 123,
+            'description': f'Total estimado; presente apenas com ?{self.count_query_param}=true.',
+        }
+        return response_schema
+
+
+class RankedPagination(PageNumberPagination):
+    """
+    Paginação numerada para resultados ordenados por relevância (busca).
+
+    A ordem por relevância não tem chave estável para um cursor; como só as
+    primeiras páginas de uma busca costumam ser lidas, o OFFSET é barato.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
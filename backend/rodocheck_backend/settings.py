@@ -4,7 +4,7 @@ Django settings for rodocheck_backend project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Validar variáveis de ambiente
 from .env_validator import validate_environment
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'users',
     'tires',
     'ai_assistant',
+    'blobs',
 ]
 
 MIDDLEWARE = [
@@ -208,6 +209,91 @@ LOGIN_URL = '/admin/login/'
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
 
+# Checklist PDF rendering: 'celery', 'thread' (in-process pool) or 'sync'
+PDF_RENDER_BACKEND = config('PDF_RENDER_BACKEND', default='thread')
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+PDF_RENDER_MAX_ATTEMPTS = config('PDF_RENDER_MAX_ATTEMPTS', default=5, cast=int)
+PDF_RENDER_STALE_AFTER = config('PDF_RENDER_STALE_AFTER', default=600, cast=int)  # seconds
+PDF_RENDER_ON_CHANGE = config('PDF_RENDER_ON_CHANGE', default='background')  # or 'lazy'
+
+# Rendered checklist PDFs, kept outside MEDIA_ROOT so they are never public
+PDF_STORAGE_ROOT = config('PDF_STORAGE_ROOT', default=str(BASE_DIR / 'storage' / 'pdfs'))
+
+# Checklist PDF downloads: '' (Django streams the file), 'nginx'
+# (X-Accel-Redirect) or 'apache' (X-Sendfile)
+PDF_DOWNLOAD_SENDFILE = config('PDF_DOWNLOAD_SENDFILE', default='')
+PDF_DOWNLOAD_ACCEL_PREFIX = config('PDF_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+PDF_DOWNLOAD_CHUNK_SIZE = config('PDF_DOWNLOAD_CHUNK_SIZE', default=64 * 1024, cast=int)
+
+# Signed, expiring PDF links (served without a session or DB lookup)
+PDF_SIGNED_URL_TTL = config('PDF_SIGNED_URL_TTL', default=300, cast=int)  # seconds
+
+# Bulk ZIP export of checklist PDFs
+PDF_EXPORT_RENDER_WORKERS = config('PDF_EXPORT_RENDER_WORKERS', default=2, cast=int)
+PDF_EXPORT_MAX_CHECKLISTS = config('PDF_EXPORT_MAX_CHECKLISTS', default=5000, cast=int)
+
+# Offline sync: maximum number of checklists accepted per batch upload
+CHECKLIST_SYNC_MAX_BATCH = config('CHECKLIST_SYNC_MAX_BATCH', default=50, cast=int)
+
+# Template API responses: in-process LRU size and shared cache lifetime
+TEMPLATE_CACHE_LOCAL_ENTRIES = config('TEMPLATE_CACHE_LOCAL_ENTRIES', default=256, cast=int)
+TEMPLATE_CACHE_TIMEOUT = config('TEMPLATE_CACHE_TIMEOUT', default=3600, cast=int)  # seconds
+
+# Compression of the large checklist JSON columns: 'zlib' or 'zstd' (needs the
+# zstandard package). Stored values record their codec, so switching is safe;
+# recompress_checklist_json rewrites existing rows. Level 0 = codec default
+COMPRESSED_JSON_CODEC = config('COMPRESSED_JSON_CODEC', default='zlib')
+COMPRESSED_JSON_LEVEL = config('COMPRESSED_JSON_LEVEL', default=0, cast=int)
+
+# Content-addressed store for checklist photos, signatures and AI images:
+# 'filesystem' (files under BLOB_ROOT) or 'storage' (any Django storage class,
+# e.g. storages.backends.s3boto3.S3Boto3Storage, built with BLOB_STORAGE_OPTIONS)
+BLOB_BACKEND = config('BLOB_BACKEND', default='filesystem')
+BLOB_ROOT = config('BLOB_ROOT', default=str(BASE_DIR / 'storage' / 'blobs'))
+BLOB_STORAGE = config('BLOB_STORAGE', default='django.core.files.storage.FileSystemStorage')
+BLOB_STORAGE_OPTIONS = {}
+BLOB_STORAGE_PREFIX = config('BLOB_STORAGE_PREFIX', default='blobs')
+BLOB_STORAGE_REDIRECT = config('BLOB_STORAGE_REDIRECT', default=True, cast=bool)  # to storage.url()
+
+# Resumable chunked photo uploads: chunks are kept under BLOB_UPLOAD_DIR
+# until finalized; unfinished uploads expire (cleanup_blob_uploads)
+BLOB_UPLOAD_DIR = config('BLOB_UPLOAD_DIR', default=str(BASE_DIR / 'storage' / 'uploads'))
+BLOB_UPLOAD_TTL = config('BLOB_UPLOAD_TTL', default=24 * 3600, cast=int)  # seconds
+BLOB_UPLOAD_MAX_BYTES = config('BLOB_UPLOAD_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+BLOB_UPLOAD_CHUNK_SIZE = config('BLOB_UPLOAD_CHUNK_SIZE', default=512 * 1024, cast=int)
+BLOB_UPLOAD_MAX_CHUNK_SIZE = config('BLOB_UPLOAD_MAX_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+
+# Thumbnail, preview and print derivatives of image blobs, cached on local disk.
+# 'background' builds them as soon as an image is stored; 'lazy' on first request
+BLOB_DERIVATIVES_ON_UPLOAD = config('BLOB_DERIVATIVES_ON_UPLOAD', default='background')
+BLOB_DERIVATIVE_CACHE_DIR = config('BLOB_DERIVATIVE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'blob_derivatives'))
+BLOB_DERIVATIVE_CACHE_MAX_BYTES = config('BLOB_DERIVATIVE_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+BLOB_DERIVATIVE_WORKERS = config('BLOB_DERIVATIVE_WORKERS', default=2, cast=int)
+BLOB_DERIVATIVE_TIMEOUT = config('BLOB_DERIVATIVE_TIMEOUT', default=10, cast=float)  # seconds per request
+
+# AI endpoints: largest image accepted by the binary upload endpoints
+AI_IMAGE_UPLOAD_MAX_BYTES = config('AI_IMAGE_UPLOAD_MAX_BYTES', default=20 * 1024 * 1024, cast=int)
+
+# Photos and signatures embedded in checklist PDFs
+PDF_IMAGE_CACHE_DIR = config('PDF_IMAGE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'pdf_images'))
+PDF_IMAGE_CACHE_MAX_BYTES = config('PDF_IMAGE_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+PDF_IMAGE_FETCH_WORKERS = config('PDF_IMAGE_FETCH_WORKERS', default=4, cast=int)
+PDF_IMAGE_CONNECT_TIMEOUT = config('PDF_IMAGE_CONNECT_TIMEOUT', default=3, cast=float)  # seconds
+PDF_IMAGE_READ_TIMEOUT = config('PDF_IMAGE_READ_TIMEOUT', default=10, cast=float)  # seconds
+PDF_IMAGE_TOTAL_TIMEOUT = config('PDF_IMAGE_TOTAL_TIMEOUT', default=30, cast=float)  # seconds per PDF
+PDF_IMAGE_MAX_SOURCE_BYTES = config('PDF_IMAGE_MAX_SOURCE_BYTES', default=20 * 1024 * 1024, cast=int)
+# Hosts that http(s) image URLs may point to (ALLOWED_HOSTS syntax; empty
+# refuses every remote URL), and the MEDIA_ROOT directories media paths may read
+PDF_IMAGE_ALLOWED_HOSTS = config('PDF_IMAGE_ALLOWED_HOSTS', default='', cast=Csv())
+PDF_IMAGE_MEDIA_PREFIXES = config('PDF_IMAGE_MEDIA_PREFIXES', default='blobs,uploads', cast=Csv())
+
+# Download counters: 'atomic' (one UPDATE per download) or 'buffered'
+# (aggregated in memory and flushed in batches, at least every
+# FLUSH_INTERVAL seconds; a killed worker loses what it had pending)
+DOWNLOAD_COUNTER_MODE = config('DOWNLOAD_COUNTER_MODE', default='atomic')
+DOWNLOAD_COUNTER_FLUSH_SIZE = config('DOWNLOAD_COUNTER_FLUSH_SIZE', default=50, cast=int)
+DOWNLOAD_COUNTER_FLUSH_INTERVAL = config('DOWNLOAD_COUNTER_FLUSH_INTERVAL', default=10, cast=int)  # seconds
+
 # Logging
 LOGGING = {
     'version': 1,
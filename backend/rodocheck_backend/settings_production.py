@@ -254,6 +254,96 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
+# Geração de PDF dos checklists em segundo plano ('celery', 'thread' ou 'sync')
+PDF_RENDER_BACKEND = config('PDF_RENDER_BACKEND', default='celery')
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+PDF_RENDER_MAX_ATTEMPTS = config('PDF_RENDER_MAX_ATTEMPTS', default=5, cast=int)
+PDF_RENDER_STALE_AFTER = config('PDF_RENDER_STALE_AFTER', default=600, cast=int)  # segundos
+PDF_RENDER_ON_CHANGE = config('PDF_RENDER_ON_CHANGE', default='background')  # ou 'lazy'
+
+# PDFs gerados dos checklists, fora de MEDIA_ROOT para nunca serem públicos;
+# o nginx só os entrega pela location interna /protected-media/
+PDF_STORAGE_ROOT = config('PDF_STORAGE_ROOT', default=str(BASE_DIR / 'storage' / 'pdfs'))
+
+# Download dos PDFs: o Django valida a permissão e o nginx entrega os bytes
+# via X-Accel-Redirect ('' desativa, 'apache' usa X-Sendfile)
+PDF_DOWNLOAD_SENDFILE = config('PDF_DOWNLOAD_SENDFILE', default='nginx')
+PDF_DOWNLOAD_ACCEL_PREFIX = config('PDF_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+PDF_DOWNLOAD_CHUNK_SIZE = config('PDF_DOWNLOAD_CHUNK_SIZE', default=64 * 1024, cast=int)
+
+# Links assinados e temporários para os PDFs (sem sessão nem consulta ao banco)
+PDF_SIGNED_URL_TTL = config('PDF_SIGNED_URL_TTL', default=300, cast=int)  # segundos
+
+# Exportação em lote dos PDFs (ZIP gerado em streaming)
+PDF_EXPORT_RENDER_WORKERS = config('PDF_EXPORT_RENDER_WORKERS', default=2, cast=int)
+PDF_EXPORT_MAX_CHECKLISTS = config('PDF_EXPORT_MAX_CHECKLISTS', default=5000, cast=int)
+
+# Sincronização offline: máximo de checklists por envio em lote
+CHECKLIST_SYNC_MAX_BATCH = config('CHECKLIST_SYNC_MAX_BATCH', default=50, cast=int)
+
+# Respostas da API de modelos de checklist: LRU em memória na frente do Redis
+TEMPLATE_CACHE_LOCAL_ENTRIES = config('TEMPLATE_CACHE_LOCAL_ENTRIES', default=256, cast=int)
+TEMPLATE_CACHE_TIMEOUT = config('TEMPLATE_CACHE_TIMEOUT', default=3600, cast=int)  # segundos
+
+# Compressão das colunas JSON grandes dos checklists: 'zlib' ou 'zstd' (requer
+# o pacote zstandard). Cada valor guarda o seu codec, então trocar é seguro;
+# recompress_checklist_json regrava as linhas antigas. Nível 0 = padrão do codec
+COMPRESSED_JSON_CODEC = config('COMPRESSED_JSON_CODEC', default='zlib')
+COMPRESSED_JSON_LEVEL = config('COMPRESSED_JSON_LEVEL', default=0, cast=int)
+
+# Fotos, assinaturas e imagens da IA fora das linhas do banco, endereçadas
+# pelo SHA-256: 'filesystem' (arquivos em BLOB_ROOT) ou 'storage' (qualquer
+# storage do Django, p.ex. storages.backends.s3boto3.S3Boto3Storage)
+BLOB_BACKEND = config('BLOB_BACKEND', default='filesystem')
+BLOB_ROOT = config('BLOB_ROOT', default=str(BASE_DIR / 'storage' / 'blobs'))
+BLOB_STORAGE = config('BLOB_STORAGE', default='storages.backends.s3boto3.S3Boto3Storage')
+BLOB_STORAGE_OPTIONS = {
+    'bucket_name': config('BLOB_STORAGE_BUCKET', default=''),
+    'querystring_auth': True,  # URLs pré-assinadas e temporárias
+}
+BLOB_STORAGE_PREFIX = config('BLOB_STORAGE_PREFIX', default='blobs')
+BLOB_STORAGE_REDIRECT = config('BLOB_STORAGE_REDIRECT', default=True, cast=bool)  # para storage.url()
+
+# Envio de fotos em partes, retomável: as partes ficam em BLOB_UPLOAD_DIR até
+# a finalização; envios abandonados expiram (cleanup_blob_uploads no cron)
+BLOB_UPLOAD_DIR = config('BLOB_UPLOAD_DIR', default=str(BASE_DIR / 'storage' / 'uploads'))
+BLOB_UPLOAD_TTL = config('BLOB_UPLOAD_TTL', default=24 * 3600, cast=int)  # segundos
+BLOB_UPLOAD_MAX_BYTES = config('BLOB_UPLOAD_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+BLOB_UPLOAD_CHUNK_SIZE = config('BLOB_UPLOAD_CHUNK_SIZE', default=512 * 1024, cast=int)
+BLOB_UPLOAD_MAX_CHUNK_SIZE = config('BLOB_UPLOAD_MAX_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+
+# Miniatura, prévia e versão de impressão das imagens do blob store, em cache
+# no disco local. 'background' gera ao gravar a imagem; 'lazy' no 1º acesso
+BLOB_DERIVATIVES_ON_UPLOAD = config('BLOB_DERIVATIVES_ON_UPLOAD', default='background')
+BLOB_DERIVATIVE_CACHE_DIR = config('BLOB_DERIVATIVE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'blob_derivatives'))
+BLOB_DERIVATIVE_CACHE_MAX_BYTES = config('BLOB_DERIVATIVE_CACHE_MAX_BYTES', default=2 * 1024 * 1024 * 1024, cast=int)
+BLOB_DERIVATIVE_WORKERS = config('BLOB_DERIVATIVE_WORKERS', default=2, cast=int)
+BLOB_DERIVATIVE_TIMEOUT = config('BLOB_DERIVATIVE_TIMEOUT', default=10, cast=float)  # segundos por requisição
+
+# IA: maior imagem aceita pelos endpoints de upload binário
+AI_IMAGE_UPLOAD_MAX_BYTES = config('AI_IMAGE_UPLOAD_MAX_BYTES', default=20 * 1024 * 1024, cast=int)
+
+# Fotos e assinaturas incorporadas aos PDFs (cache local em disco, LRU)
+PDF_IMAGE_CACHE_DIR = config('PDF_IMAGE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'pdf_images'))
+PDF_IMAGE_CACHE_MAX_BYTES = config('PDF_IMAGE_CACHE_MAX_BYTES', default=2 * 1024 * 1024 * 1024, cast=int)
+PDF_IMAGE_FETCH_WORKERS = config('PDF_IMAGE_FETCH_WORKERS', default=4, cast=int)
+PDF_IMAGE_CONNECT_TIMEOUT = config('PDF_IMAGE_CONNECT_TIMEOUT', default=3, cast=float)  # segundos
+PDF_IMAGE_READ_TIMEOUT = config('PDF_IMAGE_READ_TIMEOUT', default=10, cast=float)  # segundos
+PDF_IMAGE_TOTAL_TIMEOUT = config('PDF_IMAGE_TOTAL_TIMEOUT', default=30, cast=float)  # segundos por PDF
+PDF_IMAGE_MAX_SOURCE_BYTES = config('PDF_IMAGE_MAX_SOURCE_BYTES', default=20 * 1024 * 1024, cast=int)
+# Hosts de onde URLs http(s) de imagens podem vir (mesma sintaxe de
+# ALLOWED_HOSTS; vazio recusa toda URL remota) e os diretórios de MEDIA_ROOT
+# que caminhos de mídia podem ler
+PDF_IMAGE_ALLOWED_HOSTS = config('PDF_IMAGE_ALLOWED_HOSTS', default='', cast=Csv())
+PDF_IMAGE_MEDIA_PREFIXES = config('PDF_IMAGE_MEDIA_PREFIXES', default='blobs,uploads', cast=Csv())
+
+# Contadores de download: 'atomic' (um UPDATE por download) ou 'buffered'
+# (agregados em memória e gravados em lote, no máximo a cada FLUSH_INTERVAL
+# segundos; um worker morto à força perde o que ainda não gravou)
+DOWNLOAD_COUNTER_MODE = config('DOWNLOAD_COUNTER_MODE', default='atomic')
+DOWNLOAD_COUNTER_FLUSH_SIZE = config('DOWNLOAD_COUNTER_FLUSH_SIZE', default=50, cast=int)
+DOWNLOAD_COUNTER_FLUSH_INTERVAL = config('DOWNLOAD_COUNTER_FLUSH_INTERVAL', default=10, cast=int)  # segundos
+
 # =============================================================================
 # CONFIGURAÇÕES DE GOOGLE OAUTH
 # =============================================================================
@@ -300,6 +390,7 @@ INSTALLED_APPS = [
     'users',
     'tires',
     'ai_assistant',
+    'blobs',
 ]
 
 MIDDLEWARE = [
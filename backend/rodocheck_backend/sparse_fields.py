@@ -0,0 +1,102 @@
+"""
+Campos esparsos e expansão de relações para a API do RodoCheck.
+Este módulo permite ao cliente escolher os campos da resposta (?fields=)
+e quais relações vêm aninhadas (?expand=), sem buscar no banco as colunas
+pesadas que não serão devolvidas.
+"""
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param_set(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Mixin de serializer para campos esparsos.
+
+    - ``?fields=id,plate`` limita a resposta aos campos listados, entre os
+      declarados em ``Meta.fields``;
+    - ``Meta.default_fields`` são os campos devolvidos sem ``?fields=``
+      (por padrão, todos);
+    - ``?expand=vehicle`` troca o id de uma relação de
+      ``Meta.expandable_fields`` pela representação aninhada;
+    - ``Meta.heavy_fields`` são colunas adiadas (``defer``) no queryset
+      quando não fazem parte da resposta (ver ``sparse_queryset``).
+
+    Vale só para leituras e para o serializer raiz; escritas e serializers
+    aninhados usam todos os campos.
+    """
+
+    def _sparse_request(self):
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return request if parent is None else None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self._sparse_request()
+        if request is None:
+            return fields
+
+        expand = _param_set(request, EXPAND_PARAM) or set()
+        for name, serializer_class in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand and name in fields:
+                fields[name] = serializer_class(read_only=True)
+
+        wanted = _param_set(request, FIELDS_PARAM)
+        if wanted is None:
+            wanted = set(getattr(self.Meta, 'default_fields', fields))
+        wanted |= expand
+        return {name: field for name, field in fields.items() if name in wanted}
+
+
+def sparse_queryset(queryset, serializer):
+    """
+    Ajusta o queryset aos campos que o serializer vai devolver.
+
+    Adia as colunas de ``Meta.heavy_fields`` fora da resposta e faz o join
+    (ou prefetch) das relações expandidas.
+    """
+    fields = serializer.fields
+    meta = serializer.Meta
+    sources = {field.source.split('.')[0] for field in fields.values() if field.source != '*'}
+
+    deferred = [name for name in getattr(meta, 'heavy_fields', ()) if name not in sources]
+    if deferred:
+        queryset = queryset.defer(*deferred)
+
+    for name in getattr(meta, 'expandable_fields', {}):
+        field = fields.get(name)
+        if not isinstance(field, serializers.BaseSerializer):
+            continue
+        model_field = queryset.model._meta.get_field(field.source)
+        if model_field.many_to_one or model_field.one_to_one:
+            queryset = queryset.select_related(field.source)
+        else:
+            queryset = queryset.prefetch_related(field.source)
+    return queryset
+
+
+class SparseFieldsetsViewMixin:
+    """Mixin de view que aplica ``sparse_queryset`` nas leituras."""
+
+    # filter_queryset (e não get_queryset, que as views sobrescrevem) roda
+    # tanto em list() quanto em get_object()
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS:
+            queryset = sparse_queryset(queryset, self.get_serializer())
+        return queryset
@@ -1,6 +1,9 @@
 """
 Test settings for RodoCheck backend.
 """
+import os
+import tempfile
+
 from .settings import *
 
 # Use in-memory database for tests
@@ -15,6 +18,16 @@ DATABASES = {
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Render checklist PDFs inline so tests can assert on the result
+PDF_RENDER_BACKEND = 'sync'
+PDF_DOWNLOAD_SENDFILE = ''
+PDF_STORAGE_ROOT = os.path.join(tempfile.gettempdir(), 'rodocheck-test-pdfs')
+PDF_IMAGE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'rodocheck-test-pdf-images')
+BLOB_BACKEND = 'filesystem'
+BLOB_ROOT = os.path.join(tempfile.gettempdir(), 'rodocheck-test-blobs')
+BLOB_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'rodocheck-test-blob-uploads')
+BLOB_DERIVATIVE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'rodocheck-test-blob-derivatives')
+
 # Disable logging for tests
 LOGGING = {
     'version': 1,
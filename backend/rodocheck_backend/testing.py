@@ -0,0 +1,36 @@
+"""
+Utilitários de teste para o RodoCheck Backend.
+Este módulo reúne asserções compartilhadas pelos testes das apps.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Asserção de orçamento de queries para endpoints de listagem.
+
+    ``assertQueryBudget`` chama o endpoint com quantidades crescentes de
+    linhas e falha se o número de queries variar com a quantidade (sinal de
+    N+1) ou passar do orçamento.
+    """
+
+    def assertQueryBudget(self, url, budget, populate, sizes=(1, 5, 20), params=None):
+        counts = {}
+        created = 0
+        for size in sizes:
+            populate(size - created)
+            created = size
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, f'{url}: {response.status_code}')
+            counts[size] = len(context.captured_queries)
+
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{url}: queries grow with the number of rows {counts}\n'
+            + '\n'.join(query['sql'] for query in context.captured_queries),
+        )
+        self.assertLessEqual(counts[sizes[-1]], budget, f'{url}: {counts[sizes[-1]]} queries > {budget}')
+        return counts[sizes[-1]]
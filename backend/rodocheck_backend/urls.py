@@ -17,6 +17,7 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/tires/', include('tires.urls')),
     path('api/ai/', include('ai_assistant.urls')),
+    path('api/blobs/', include('blobs.urls')),
     path('accounts/', include('allauth.urls')),
     # Rota raiz simples para evitar 404 na home
     path('', lambda request: JsonResponse({
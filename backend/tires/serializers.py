@@ -4,9 +4,11 @@ Serializers for Tires
 
 from rest_framework import serializers
 from .models import Tire
+from rodocheck_backend.sparse_fields import SparseFieldsetsMixin
+from vehicles.serializers import VehicleSerializer
 
 
-class TireSerializer(serializers.ModelSerializer):
+class TireSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Tire model."""
     vehicle_plate = serializers.CharField(source='vehicle.plate', read_only=True)
     created_by_email = serializers.CharField(source='created_by.email', read_only=True)
@@ -20,4 +22,5 @@ class TireSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'vehicle': VehicleSerializer}
 
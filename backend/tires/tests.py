@@ -1,3 +1,44 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from rodocheck_backend.testing import QueryBudgetMixin
+from vehicles.models import Vehicle
+from .models import Tire
+
+User = get_user_model()
+
+
+class TireQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='borracheiro', email='pneus@rodoan.com.br', password='senha-teste',
+        )
+        cls.vehicle = Vehicle.objects.create(
+            plate='ABC1234', model='FH 540', brand='Volvo', year=2022,
+            vehicle_type='truck', created_by=cls.user,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_tires(self, count):
+        start = Tire.objects.count()
+        Tire.objects.bulk_create([
+            Tire(serial_number=f'PN-{i:04d}', brand='Michelin', model='X Multi',
+                 size='295/80R22.5', vehicle=self.vehicle, created_by=self.user)
+            for i in range(start, start + count)
+        ])
+
+    def test_tire_list(self):
+        self.assertQueryBudget('/api/tires/', 2, self.add_tires)
+
+        tire = self.client.get('/api/tires/').json()['results'][0]
+        self.assertEqual(tire['vehicle_plate'], 'ABC1234')
+        self.assertEqual(tire['created_by_email'], 'pneus@rodoan.com.br')
+
+    def test_tire_list_expanded(self):
+        self.assertQueryBudget('/api/tires/', 2, self.add_tires, params={'expand': 'vehicle'})
@@ -11,27 +11,28 @@ from django.db import models
 
 from .models import Tire
 from .serializers import TireSerializer
+from rodocheck_backend.sparse_fields import SparseFieldsetsViewMixin
 
 
-class TireListCreateView(generics.ListCreateAPIView):
+class TireListCreateView(SparseFieldsetsViewMixin, generics.ListCreateAPIView):
     """View for listing and creating tires."""
     serializer_class = TireSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Tire.objects.filter(created_by=self.request.user)
+        return Tire.objects.filter(created_by=self.request.user).select_related('vehicle', 'created_by')
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class TireDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TireDetailView(SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for tire details."""
     serializer_class = TireSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Tire.objects.filter(created_by=self.request.user)
+        return Tire.objects.filter(created_by=self.request.user).select_related('vehicle', 'created_by')
 
 
 @api_view(['GET'])
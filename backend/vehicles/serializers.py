@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import Vehicle
+from rodocheck_backend.sparse_fields import SparseFieldsetsMixin
 
 
-class VehicleSerializer(serializers.ModelSerializer):
+class VehicleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Vehicle model."""
     
     class Meta:
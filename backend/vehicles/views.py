@@ -2,9 +2,11 @@ from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from .models import Vehicle
 from .serializers import VehicleSerializer
+from rodocheck_backend.conditional import ConditionalGetMixin
+from rodocheck_backend.sparse_fields import SparseFieldsetsViewMixin
 
 
-class VehicleListCreateView(generics.ListCreateAPIView):
+class VehicleListCreateView(ConditionalGetMixin, SparseFieldsetsViewMixin, generics.ListCreateAPIView):
     """List and create vehicles."""
     queryset = Vehicle.objects.filter(is_active=True)
     serializer_class = VehicleSerializer
@@ -14,7 +16,7 @@ class VehicleListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class VehicleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class VehicleDetailView(ConditionalGetMixin, SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete vehicle."""
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
@@ -109,7 +109,9 @@ export function ManagerDashboard() {
       setMaintenanceVehicles((vehiclesData as any[]).filter(v => v.status === 'Em Manutenção'));
 
       // Checklists
-      const checklistsResp = await apiClient.getChecklists();
+      const checklistsResp = await apiClient.getChecklists({
+        fields: 'id,vehicle,vehicle_plate,created_at,final_status,questions',
+      });
       const checklistsData = (checklistsResp.data as any[]) || [];
       if (!isMounted) return;
       setChecklists(checklistsData as CompletedChecklist[]);
@@ -10,6 +10,23 @@ interface ApiResponse<T> {
   message?: string;
 }
 
+export interface BlobUpload {
+  id: string;
+  size: number;
+  chunk_size: number;
+  chunks: number;
+  received: number[];
+  expires_at: string;
+}
+
+export interface UploadedBlob {
+  sha256: string;
+  ref: string;
+  url: string;
+  size: number;
+  content_type: string;
+}
+
 class ApiClient {
   private baseURL: string;
   private token: string | null = null;
@@ -104,8 +121,28 @@ class ApiClient {
   }
 
   // Checklist methods
-  async getChecklists() {
-    return this.request('/api/checklists/');
+  // The list returns a summary; heavy fields (e.g. questions) must be asked for via `fields`
+  async getChecklists(params?: { fields?: string; expand?: string }) {
+    const query = new URLSearchParams(
+      Object.entries(params || {}).filter(([, value]) => value) as [string, string][]
+    ).toString();
+    return this.request(`/api/checklists/${query ? `?${query}` : ''}`);
+  }
+
+  async searchChecklists(q: string, params?: { page?: number; page_size?: number }) {
+    const query = new URLSearchParams({ q });
+    Object.entries(params || {}).forEach(([key, value]) => {
+      if (value) query.set(key, String(value));
+    });
+    return this.request(`/api/checklists/search/?${query.toString()}`);
+  }
+
+  async getChecklistStats(params?: { days?: number; date_from?: string; date_to?: string }) {
+    const query = new URLSearchParams();
+    Object.entries(params || {}).forEach(([key, value]) => {
+      if (value) query.set(key, String(value));
+    });
+    return this.request(`/api/checklists/stats/checklists/?${query.toString()}`);
   }
 
   async deleteChecklist(id: string) {
@@ -135,6 +172,32 @@ class ApiClient {
     return this.request(`/api/checklists/${id}/status/`);
   }
 
+  // Resumable chunked uploads (photos go to the blob store)
+  async startUpload(params: { size: number; sha256: string; content_type: string; chunk_size?: number }) {
+    return this.request<BlobUpload>('/api/blobs/uploads/', {
+      method: 'POST',
+      body: JSON.stringify(params),
+    });
+  }
+
+  async getUpload(id: string) {
+    return this.request<BlobUpload>(`/api/blobs/uploads/${id}/`);
+  }
+
+  async uploadChunk(id: string, index: number, chunk: Blob) {
+    return this.request(`/api/blobs/uploads/${id}/chunks/${index}/`, {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/octet-stream' },
+      body: chunk,
+    });
+  }
+
+  async finalizeUpload(id: string) {
+    return this.request<UploadedBlob>(`/api/blobs/uploads/${id}/finalize/`, {
+      method: 'POST',
+    });
+  }
+
   // Checklist templates
   async getChecklistTemplates() {
     return this.request('/api/checklists/templates/');
@@ -0,0 +1,72 @@
+/**
+ * Photo uploads to the backend blob store, in resumable chunks.
+ *
+ * Each photo is sent in numbered chunks: a dropped connection only repeats
+ * the chunk in flight, and an upload interrupted by a reload resumes from the
+ * chunks the server already has (the upload id is kept in localStorage, keyed
+ * by the photo's SHA-256).
+ */
+
+import { apiClient, BlobUpload } from './api';
+
+const PENDING_KEY_PREFIX = 'blob_upload:';
+const MAX_ATTEMPTS = 5;
+
+async function sha256Hex(blob: Blob): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+function sleep(ms: number) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function withRetries<T>(call: () => Promise<{ data?: T; error?: string }>): Promise<T> {
+  let lastError = 'Erro de conexão';
+  for (let attempt = 0; attempt < MAX_ATTEMPTS; attempt++) {
+    const { data, error } = await call();
+    if (!error) return data as T;
+    lastError = error;
+    await sleep(Math.min(1000 * 2 ** attempt, 15000));
+  }
+  throw new Error(lastError);
+}
+
+async function resumeOrStart(blob: Blob, sha256: string): Promise<BlobUpload> {
+  const pendingId = typeof window !== 'undefined' ? localStorage.getItem(PENDING_KEY_PREFIX + sha256) : null;
+  if (pendingId) {
+    const { data } = await apiClient.getUpload(pendingId);
+    if (data) return data;
+  }
+  const upload = await withRetries(() =>
+    apiClient.startUpload({ size: blob.size, sha256, content_type: blob.type || 'image/jpeg' })
+  );
+  if (typeof window !== 'undefined') localStorage.setItem(PENDING_KEY_PREFIX + sha256, upload.id);
+  return upload;
+}
+
+/** Upload a photo and return its signed URL, to be stored in the checklist. */
+export async function uploadBlobResumable(blob: Blob, onProgress?: (fraction: number) => void): Promise<string> {
+  const sha256 = await sha256Hex(blob);
+  const upload = await resumeOrStart(blob, sha256);
+  const received = new Set(upload.received);
+
+  for (let index = 0; index < upload.chunks; index++) {
+    if (!received.has(index)) {
+      const chunk = blob.slice(index * upload.chunk_size, (index + 1) * upload.chunk_size);
+      await withRetries(() => apiClient.uploadChunk(upload.id, index, chunk));
+      received.add(index);
+    }
+    onProgress?.(received.size / upload.chunks);
+  }
+
+  const result = await withRetries(() => apiClient.finalizeUpload(upload.id));
+  if (typeof window !== 'undefined') localStorage.removeItem(PENDING_KEY_PREFIX + sha256);
+  return result.url;
+}
+
+/** Upload an image given as a data URL; ``path`` and ``filename`` are kept for older callers. */
+export async function uploadImageAndGetURLClient(dataUrl: string, path?: string, filename?: string): Promise<string> {
+  const blob = await fetch(dataUrl).then(res => res.blob());
+  return uploadBlobResumable(blob);
+}